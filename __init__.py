@@ -68,9 +68,18 @@ class GenericLandmarksPreferences(bpy.types.AddonPreferences):
         min=0,
         max=59)
 
+    # Memory budget of the in-memory spectral cache (utils/spectralmagic.py)
+    spectral_cache_budget = bpy.props.IntProperty(
+        name='Spectral Cache (MB)',
+        description="Memory held by cached laplacians, their factorizations, eigenvectors and signatures across all meshes before the least recently used mesh is evicted",
+        default=2048,
+        min=64)
+
     def draw(self, context):
         layout = self.layout
 
+        layout.prop(self, "spectral_cache_budget")
+
         # Works best if a column, or even just self.layout.
         mainrow = layout.row()
         col = mainrow.column()
@@ -98,6 +107,10 @@ def register():
 
 
 def unregister():
+    # geodesics/ is not a package, so auto_load does not unregister its modules.
+    # Stop the path worker processes and free their shared memory here
+    from .geodesics.pathjobs import releasePathWorkers
+    releasePathWorkers()
     auto_load.unregister()
     addon_updater_ops.unregister()
     bpy.utils.unregister_class(GenericLandmarksPreferences)
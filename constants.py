@@ -5,6 +5,6 @@ TIME_INTERVAL_KEY_PRESS = 1;
 TIME_INTERVAL_MOUSE_PRESS = 1;
 MARKER_MIN_DISTANCE = 3e-05;
 KEYS_MAPPING = ["ONE", "TWO", "THREE", "FOUR", "FIVE"];
-PATH_NAME_MAPPING = ["CHENHAN", "DIJKSTRA-TRI", "DIJKSTRA-QUAD", "FMM"];
+PATH_NAME_MAPPING = ["CHENHAN", "DIJKSTRA-TRI", "DIJKSTRA-QUAD", "FMM", "HEAT"];
 LABEL_TIME_MAX = 10;
 MOUSE_RATIO = 0.535;
\ No newline at end of file
@@ -4,31 +4,43 @@ Created on Jun 30, 2016
 @author: ashok
 '''
 # import gc;
-from GenericMarkerCreator28.utils.geodesics.ImprovedCHWithEdgeValve import ImprovedCHWithEdgeValve
-from queue import PriorityQueue
-from GenericMarkerCreator28.utils.geodesics.GeodesicComponents import InfoAtAngle
-import GenericMarkerCreator28.utils.geodesics.Constants as Constants;
+from GenericMarkerCreator28.geodesics.ImprovedCHWithEdgeValve import ImprovedCHWithEdgeValve
+from GenericMarkerCreator28.geodesics.GeodesicComponents import InfoAtAngles, HeapQueue
+import GenericMarkerCreator28.geodesics.Constants as Constants;
 
 class CICHWithFurtherPriorityQueue(ImprovedCHWithEdgeValve):
     
-    def __init__(self, *, inputModel=None, indexOfSourceVerts=None):
+    #Bounds of the propagation, see IsBoundReached
+    indexOfTargetVert = -1;
+    maxDistance = Constants.FLT_MAX;
+    fTerminatedEarly = False;
+    
+    def __init__(self, *, inputModel=None, indexOfSourceVerts=None, indexOfTargetVert=-1, maxDistance=Constants.FLT_MAX):
         super().__init__(inputModel=inputModel, indexOfSourceVerts=indexOfSourceVerts);
         self.nameOfAlgorithm = "ImprovedCHWithPriorityQueue";
+        self.indexOfTargetVert = indexOfTargetVert;
+        self.maxDistance = maxDistance;
+        self.fTerminatedEarly = False;
         
     def InitContainers(self):
-        self.m_QueueForPseudoSources = PriorityQueue();
-        self.m_QueueForWindows = PriorityQueue();
-        self.m_InfoAtAngles = [InfoAtAngle() for i in range(self.model.GetNumOfEdges())];
+        self.m_QueueForPseudoSources = HeapQueue();
+        self.m_QueueForWindows = HeapQueue();
+        self.m_InfoAtAngles = InfoAtAngles(self.model.GetNumOfEdges());
+        self.memory += self.m_InfoAtAngles.nbytes / 1024 / 1024;
     
     def ClearContainers(self):
-        self.m_QueueForWindows = PriorityQueue();
-        self.m_QueueForPseudoSources = PriorityQueue();
+        self.m_QueueForWindows = HeapQueue();
+        self.m_QueueForPseudoSources = HeapQueue();
         
     def BuildSequenceTree(self):
         self.ComputeChildrenOfSource();
         fFromQueueOfPseudoSources = self.UpdateTreeDepthBackWithChoice();
         runcounter = 0;
         while (not self.m_QueueForPseudoSources.empty() or not self.m_QueueForWindows.empty()):            
+            if (self.IsBoundReached(fFromQueueOfPseudoSources)):
+                self.fTerminatedEarly = True;
+                break;
+                
             if (self.m_QueueForWindows.qsize() > self.nMaxLenOfWindowQueue):
                 self.nMaxLenOfWindowQueue = self.m_QueueForWindows.qsize();
                 
@@ -47,7 +59,22 @@ class CICHWithFurtherPriorityQueue(ImprovedCHWithEdgeValve):
 
             fFromQueueOfPseudoSources = self.UpdateTreeDepthBackWithChoice();
             runcounter += 1;
-        print('SEQUENCE TREE BUILT!, RAN FOR ITERATIONS ::: ', runcounter);
+        print('SEQUENCE TREE BUILT!, RAN FOR ITERATIONS ::: ', runcounter, ' VISITED ::: ', self.GetVisitedFraction());
+    
+    #Both queues are ordered by distance and nothing popped later can be closer
+    #than the head. So once the head is beyond the target's distance that
+    #distance (and the path to it) is final, and once it is beyond maxDistance
+    #no vertex within the radius can change any more
+    def IsBoundReached(self, fFromQueueOfPseudoSources):
+        if (self.indexOfTargetVert == -1 and self.maxDistance >= Constants.FLT_MAX):
+            return False;
+        if (fFromQueueOfPseudoSources):
+            headDistance = self.m_QueueForPseudoSources.queue[0].disUptodate;
+        else:
+            headDistance = self.m_QueueForWindows.queue[0].disUptodate;
+        if (headDistance > self.maxDistance):
+            return True;
+        return (self.indexOfTargetVert != -1 and self.m_InfoAtVertices.disUptodate[self.indexOfTargetVert] <= headDistance);
 
     def GetMinDisOfWindow(self, w):
         projProp = w.coordOfPseudoSource.first / self.model.m_Edges[w.indexOfCurEdge].edge_length;
@@ -67,21 +94,21 @@ class CICHWithFurtherPriorityQueue(ImprovedCHWithEdgeValve):
         self.nCountOfWindows += 1;
     
     def UpdateTreeDepthBackWithChoice(self):
-        while (not self.m_QueueForPseudoSources.empty() and self.m_QueueForPseudoSources.queue[0].birthTime != self.m_InfoAtVertices[self.m_QueueForPseudoSources.queue[0].indexOfVert].birthTime):
+        while (not self.m_QueueForPseudoSources.empty() and self.m_QueueForPseudoSources.queue[0].birthTime != self.m_InfoAtVertices.birthTime[self.m_QueueForPseudoSources.queue[0].indexOfVert]):
             self.m_QueueForPseudoSources.get();
     
         while (not self.m_QueueForWindows.empty()):
             quoteW = self.m_QueueForWindows.queue[0];
             if (quoteW.pWindow.fParentIsPseudoSource):
-                if (quoteW.pWindow.birthTimeOfParent != self.m_InfoAtVertices[quoteW.pWindow.indexOfParent].birthTime):
+                if (quoteW.pWindow.birthTimeOfParent != self.m_InfoAtVertices.birthTime[quoteW.pWindow.indexOfParent]):
                     quoteW.pWindow = None;
                     self.m_QueueForWindows.get();
                 else:
                     break;
             else:
-                if (quoteW.pWindow.birthTimeOfParent == self.m_InfoAtAngles[quoteW.pWindow.indexOfParent].birthTime):
+                if (quoteW.pWindow.birthTimeOfParent == self.m_InfoAtAngles.birthTime[quoteW.pWindow.indexOfParent]):
                     break;
-                elif (quoteW.pWindow.fIsOnLeftSubtree == (quoteW.pWindow.entryPropOfParent < self.m_InfoAtAngles[quoteW.pWindow.indexOfParent].entryProp)):
+                elif (quoteW.pWindow.fIsOnLeftSubtree == (quoteW.pWindow.entryPropOfParent < self.m_InfoAtAngles.entryProp[quoteW.pWindow.indexOfParent])):
                     break;
                 else:
                     quoteW.pWindow = None;
@@ -90,8 +117,8 @@ class CICHWithFurtherPriorityQueue(ImprovedCHWithEdgeValve):
         fFromQueueOfPseudoSources = False;        
         if (self.m_QueueForWindows.empty()):
             if (not self.m_QueueForPseudoSources.empty()):
-                infoOfHeadElemOfPseudoSources = self.m_InfoAtVertices[self.m_QueueForPseudoSources.queue[0].indexOfVert];
-                self.depthOfResultingTree = max(self.depthOfResultingTree, infoOfHeadElemOfPseudoSources.level);
+                levelOfHeadElemOfPseudoSources = self.m_InfoAtVertices.level[self.m_QueueForPseudoSources.queue[0].indexOfVert];
+                self.depthOfResultingTree = max(self.depthOfResultingTree, levelOfHeadElemOfPseudoSources);
                 fFromQueueOfPseudoSources = True;
         else:
             if (self.m_QueueForPseudoSources.empty()):
@@ -102,7 +129,7 @@ class CICHWithFurtherPriorityQueue(ImprovedCHWithEdgeValve):
                 headElemOfPseudoSources = self.m_QueueForPseudoSources.queue[0];
                 headElemOfWindows = self.m_QueueForWindows.queue[0];
                 if (headElemOfPseudoSources.disUptodate <= headElemOfWindows.disUptodate):
-                    self.depthOfResultingTree = max(self.depthOfResultingTree, self.m_InfoAtVertices[headElemOfPseudoSources.indexOfVert].level);
+                    self.depthOfResultingTree = max(self.depthOfResultingTree, self.m_InfoAtVertices.level[headElemOfPseudoSources.indexOfVert]);
                     fFromQueueOfPseudoSources = True;
                 else:
                     self.depthOfResultingTree = max(self.depthOfResultingTree, headElemOfWindows.pWindow.level);
@@ -4,10 +4,11 @@ Created on Jun 30, 2016
 @author: ashok
 '''
 import sys, time;
-import GenericMarkerCreator28.utils.geodesics.Constants as Constants;
-from GenericMarkerCreator28.utils.geodesics.GeodesicComponents import InfoAtVertex, QuoteInfoAtVertex;
-from GenericMarkerCreator28.utils.geodesics.MeshData import CombinePointAndNormalTo, CombineTwoNormalsTo;
-from GenericMarkerCreator28.utils.geodesics.MeshComponents import EdgePoint;
+from array import array;
+import numpy as np;
+import GenericMarkerCreator28.geodesics.Constants as Constants;
+from GenericMarkerCreator28.geodesics.GeodesicComponents import InfoAtVertices, QuoteInfoAtVertex, EdgePoint;
+from GenericMarkerCreator28.geodesics.MeshData import CombinePointAndNormalTo, CombineTwoNormalsTo;
 
 class ExactMethodForDGP():
     fComputationCompleted = False;
@@ -15,7 +16,7 @@ class ExactMethodForDGP():
     totalLen = Constants.MAX_VAL;
     nTotalCurves = Constants.MAX_VAL;
     
-    indexOfSourceVerts = set();
+    indexOfSourceVerts = None;
     nCountOfWindows = 0;
     nTotalMilliSeconds = 0;
     nMaxLenOfWindowQueue = 0;
@@ -24,10 +25,10 @@ class ExactMethodForDGP():
     NPE = 0;
     memory = 0;
     farthestDis = 0;
-    m_tableOfResultingPaths = [];
+    m_tableOfResultingPaths = None;
     model = None; #Instance of the RichModel
     nameOfAlgorithm = "--";
-    m_InfoAtVertices = [];#Collection of InfoAtVertex instances
+    m_InfoAtVertices = None;#An InfoAtVertices object
     
     def __init__(self, *, inputModel=None, indexOfSourceVerts=None):
         self.nameOfAlgorithm = "ExactMethodForDGP"
@@ -44,8 +45,9 @@ class ExactMethodForDGP():
         self.memory = 0;
         self.nTotalCurves = 0;
         self.nameOfAlgorithm = "";
-        self.m_InfoAtVertices = [InfoAtVertex() for i in range(self.model.GetNumOfVerts())];
-        self.memory += float(self.model.GetNumOfVerts()) * sys.getsizeof(InfoAtVertex) / 1024 / 1024;
+        self.m_tableOfResultingPaths = [];
+        self.m_InfoAtVertices = InfoAtVertices(self.model.GetNumOfVerts());
+        self.memory += self.m_InfoAtVertices.nbytes / 1024 / 1024;
     
     def PickShortestPaths(self, num):
         if(num >= self.model.GetNumOfVerts()):
@@ -79,7 +81,7 @@ class ExactMethodForDGP():
                                 
     
     def BackTrace(self, indexOfVert):
-        if(self.m_InfoAtVertices[indexOfVert].birthTime == -1):
+        if(self.m_InfoAtVertices.birthTime[indexOfVert] == -1):
             assert(self.model.GetNumOfComponents() != -1 or len(self.model.Neigh(indexOfVert)) != 0);
             print('RETURN EMPTY HANDED, SORRY!');
             return;
@@ -89,12 +91,12 @@ class ExactMethodForDGP():
         index = indexOfVert;
         vertexNodes.append(index);
         
-        while(self.m_InfoAtVertices[index].disUptodate > Constants.FLT_EPSILON):            
-            indexOfParent = self.m_InfoAtVertices[index].indexOfParent;          
-            if(self.m_InfoAtVertices[index].fParentIsPseudoSource):
+        while(self.m_InfoAtVertices.disUptodate[index] > Constants.FLT_EPSILON):            
+            indexOfParent = self.m_InfoAtVertices.indexOfParent[index];          
+            if(self.m_InfoAtVertices.fParentIsPseudoSource[index]):
                 index = indexOfParent;
             else:
-                index = self.m_InfoAtVertices[index].indexOfRootVertOfParent;   
+                index = self.m_InfoAtVertices.indexOfRootVertOfParent[index];   
                              
             vertexNodes.append(index);
         
@@ -106,14 +108,14 @@ class ExactMethodForDGP():
             pt = self.model.ComputeShiftPoint(lastVert);
             self.m_tableOfResultingPaths[posOfTable].append(pt);
             
-            if(self.m_InfoAtVertices[lastVert].fParentIsPseudoSource):
+            if(self.m_InfoAtVertices.fParentIsPseudoSource[lastVert]):
                 continue;
             
-            parentEdgeIndex = self.m_InfoAtVertices[lastVert].indexOfParent;
+            parentEdgeIndex = self.m_InfoAtVertices.indexOfParent[lastVert];
             edgeIndex = self.model.Edge(parentEdgeIndex).indexOfReverseEdge;
             coord = self.model.GetNew2DCoordinatesByReversingCurrentEdge(parentEdgeIndex, self.model.Edge(parentEdgeIndex).coordOfOppositeVert);
             
-            proportion = 1.0 - self.m_InfoAtVertices[lastVert].entryProp;
+            proportion = 1.0 - self.m_InfoAtVertices.entryProp[lastVert];
             
             while(1):
                 pt1 = self.model.ComputeShiftPoint(self.model.Edge(edgeIndex).indexOfLeftVert);
@@ -144,22 +146,33 @@ class ExactMethodForDGP():
     
     
     def FindSourceVertex(self, indexOfVert):
-        resultingPath = [];
-        
-        if(self.m_InfoAtVertices[indexOfVert].birthTime == -1 or self.m_InfoAtVertices[indexOfVert].disUptodate > Constants.FLT_MAX):
+        if(self.m_InfoAtVertices.birthTime[indexOfVert] == -1 or self.m_InfoAtVertices.disUptodate[indexOfVert] > Constants.FLT_MAX):
             assert(self.model.GetNumOfComponents() != -1 or len(self.model.Neigh(indexOfVert)) != 0);
         
+        resultingPath = [];
+        for index, proportion, fIsVertex in self.WalkBack(indexOfVert):
+            if(fIsVertex):
+                resultingPath.append(EdgePoint(index=index));
+            else:
+                resultingPath.append(EdgePoint(index=index, proportion=proportion));
+            indexOfSourceVert = index;
+        
+        return resultingPath, indexOfSourceVert;
+    
+    #Edge points of the geodesic from indexOfVert back to its source as
+    #(index, proportion, fIsVertex) records, the source vertex is the last one
+    def WalkBack(self, indexOfVert):
         vertexNodes = [];
         index = indexOfVert;
         vertexNodes.append(index);
         
-        while(self.m_InfoAtVertices[index].disUptodate > Constants.FLT_EPSILON):
-            indexOfParent = self.m_InfoAtVertices[index].indexOfParent;
-            if(self.m_InfoAtVertices[index].fParentIsPseudoSource):
+        while(self.m_InfoAtVertices.disUptodate[index] > Constants.FLT_EPSILON):
+            indexOfParent = self.m_InfoAtVertices.indexOfParent[index];
+            if(self.m_InfoAtVertices.fParentIsPseudoSource[index]):
                 index = indexOfParent;
             
             else:
-                index = self.m_InfoAtVertices[index].indexOfRootVertOfParent;
+                index = self.m_InfoAtVertices.indexOfRootVertOfParent[index];
             
             vertexNodes.append(index);
         
@@ -167,19 +180,19 @@ class ExactMethodForDGP():
         
         for i in range(len(vertexNodes) - 1):
             lastVert = vertexNodes[i];
-            resultingPath.append(EdgePoint(index=lastVert));
+            yield (lastVert, 0.0, True);
             
-            if(self.m_InfoAtVertices[lastVert].fParentIsPseudoSource):
+            if(self.m_InfoAtVertices.fParentIsPseudoSource[lastVert]):
                 continue;
             
-            parentEdgeIndex = self.m_InfoAtVertices[lastVert].indexOfParent;
+            parentEdgeIndex = self.m_InfoAtVertices.indexOfParent[lastVert];
             edgeIndex = self.model.Edge(parentEdgeIndex).indexOfReverseEdge;
             coord = self.model.GetNew2DCoordinatesByReversingCurrentEdge(parentEdgeIndex, self.model.Edge(parentEdgeIndex).coordOfOppositeVert);
             
-            proportion = 1.0 - self.m_InfoAtVertices[lastVert].entryProp;
+            proportion = 1.0 - self.m_InfoAtVertices.entryProp[lastVert];
             
             while(1):
-                resultingPath.append(EdgePoint(index=edgeIndex, proportion=proportion));
+                yield (edgeIndex, proportion, False);
                 
                 if(self.model.Edge(edgeIndex).indexOfOppositeVert == vertexNodes[i + 1]):
                     break;
@@ -201,12 +214,37 @@ class ExactMethodForDGP():
                     coord = self.model.GetNew2DCoordinatesByRotatingAroundRightChildEdge(edgeIndex, coord);
                     edgeIndex = self.model.Edge(edgeIndex).indexOfRightEdge;
             
-        resultingPath.append(EdgePoint(index=indexOfSourceVert));
-        
-        return resultingPath, indexOfSourceVert;
-            
+        yield (indexOfSourceVert, 0.0, True);
     
+    #Purpose: The geodesics of many vertices at once, as arrays instead of
+    #EdgePoint objects. A point is (1 - proportion) * firstVerts + proportion *
+    #secondVerts, a vertex on the path is stored as (v, v, 0)
+    #Returns: firstVerts, secondVerts (int64), proportions (float64) of all the
+    #points and offsets (len(indicesOfVerts) + 1). The path of the k-th vertex
+    #is [offsets[k]:offsets[k+1]], from the vertex to its source, and empty if
+    #the propagation did not reach it
+    def TracePaths(self, indicesOfVerts):
+        firstVerts, secondVerts, proportions = array('q'), array('q'), array('d');
+        offsets = array('q', [0]);
+        for indexOfVert in indicesOfVerts:
+            if(self.m_InfoAtVertices.birthTime[indexOfVert] != -1 and self.m_InfoAtVertices.disUptodate[indexOfVert] < Constants.FLT_MAX):
+                for index, proportion, fIsVertex in self.WalkBack(indexOfVert):
+                    if(fIsVertex):
+                        firstVerts.append(index);
+                        secondVerts.append(index);
+                        proportions.append(0.0);
+                    else:
+                        edge = self.model.Edge(index);
+                        firstVerts.append(edge.indexOfLeftVert);
+                        secondVerts.append(edge.indexOfRightVert);
+                        proportions.append(proportion);
+            offsets.append(len(proportions));
+        return np.frombuffer(firstVerts, dtype=np.int64), np.frombuffer(secondVerts, dtype=np.int64), np.frombuffer(proportions, dtype=np.float64), np.frombuffer(offsets, dtype=np.int64);
     
+    #Purpose: The propagation result as a compact geodesic tree, see
+    #InfoAtVertices.asTreeArrays
+    def GetGeodesicTree(self):
+        return self.m_InfoAtVertices.asTreeArrays();
     
     def Execute(self):
         if(self.fComputationCompleted):
@@ -237,11 +275,9 @@ class ExactMethodForDGP():
             self.fLocked = False;
     
     
+    #Milliseconds of a monotonic clock, GetRunTime is the difference of two
     def GetTickCount(self):
-        tb = time.time();
-        millis = int(round(tb * 1000));
-        nCount = millis + (tb * 0xFFFFFF) * 1000;
-        return nCount;
+        return time.perf_counter() * 1000.0;
     
     def BuildSequenceTree(self):
         print('ABSTRACT BUILD SEQUENCE TREE');
@@ -255,6 +291,10 @@ class ExactMethodForDGP():
     def InitContainers(self):
         print('ABSTRACT INIT CONTAINERS');
     
+    #Per vertex records as returned by py_chenhancc (see InfoAtVertices)
+    def GetVertexDistances(self):
+        return self.m_InfoAtVertices;
+    
     def GetRunTime(self):
         return self.nTotalMilliSeconds;
     
@@ -270,6 +310,12 @@ class ExactMethodForDGP():
     def GetDepthOfSequenceTree(self):
         return self.depthOfResultingTree;
     
+    #Fraction of the vertices the propagation reached, below 1 when it was
+    #bounded by a target or a radius
+    def GetVisitedFraction(self):
+        visited = len(self.m_InfoAtVertices) - self.m_InfoAtVertices.birthTime.count(-1);
+        return visited / max(len(self.m_InfoAtVertices), 1);
+    
     def GetNPE(self):
         return self.NPE;
     
@@ -280,15 +326,15 @@ class ExactMethodForDGP():
         return self.fComputationCompleted;
     
     def GetRootSourceOfVert(self, index):
-        if (self.m_InfoAtVertices[index].disUptodate > Constants.FLT_MAX):
+        if (self.m_InfoAtVertices.disUptodate[index] > Constants.FLT_MAX):
             return index;
     
-        while (self.m_InfoAtVertices[index].disUptodate > Constants.FLT_EPSILON):
-            indexOfParent = self.m_InfoAtVertices[index].indexOfParent;
-            if (self.m_InfoAtVertices[index].fParentIsPseudoSource):
+        while (self.m_InfoAtVertices.disUptodate[index] > Constants.FLT_EPSILON):
+            indexOfParent = self.m_InfoAtVertices.indexOfParent[index];
+            if (self.m_InfoAtVertices.fParentIsPseudoSource[index]):
                 index = indexOfParent;
             else:
-                index = self.m_InfoAtVertices[index].indexOfRootVertOfParent;
+                index = self.m_InfoAtVertices.indexOfRootVertOfParent[index];
                 
         return index;
 
@@ -0,0 +1,121 @@
+'''
+Fast marching geodesic distances on triangle meshes (Kimmel and Sethian,
+"Computing geodesic paths on manifolds", 1998).
+
+The front is advanced from the sources in order of distance. A vertex is
+updated from every triangle it shares with an accepted vertex, assuming a
+planar wavefront across the triangle. When the wavefront would arrive from
+outside the triangle the update falls back to the edge lengths (Dijkstra).
+
+This is a reference implementation, the march is inherently sequential and
+runs as a python heap loop. Everything that only depends on the geometry (the
+inverse gram matrix of every corner) is computed once with numpy so the loop
+does plain float arithmetic, but the heat method and the dijkstra backends are
+still the ones to use for interactive previews on large meshes.
+'''
+import heapq, math;
+import numpy as np;
+
+class FastMarching():
+    #Vertex positions N x 3 and triangles F x 3
+    vpos = None;
+    faces = None;
+    #Updates from every vertex v, one per triangle corner c of v's triangles
+    #(other than v) with o the third vertex. They are the python lists
+    #corner_updates[corner_ptr[v]:corner_ptr[v+1]] of tuples
+    #(c, o, |v-c|, |o-c|, q_aa, q_ab, q_bb, sum_q) where q is the inverse gram
+    #matrix of the edges c->v and c->o (sum_q = 0 for degenerate triangles)
+    corner_ptr = None;
+    corner_updates = None;
+    #Fraction of the vertices accepted by the last call to distances
+    visited_fraction = 0.0;
+
+    def __init__(self, vpos, faces):
+        self.vpos = np.asarray(vpos, dtype=np.float64);
+        self.faces = np.asarray(faces, dtype=np.int64);
+        N = self.vpos.shape[0];
+        f = self.faces;
+        #The 6 ordered (v, c) pairs of every triangle and their third vertex
+        v = np.concatenate((f[:,0], f[:,0], f[:,1], f[:,1], f[:,2], f[:,2]));
+        c = np.concatenate((f[:,1], f[:,2], f[:,0], f[:,2], f[:,0], f[:,1]));
+        o = np.concatenate((f[:,2], f[:,1], f[:,2], f[:,0], f[:,1], f[:,0]));
+        va = self.vpos[v] - self.vpos[c];
+        vb = self.vpos[o] - self.vpos[c];
+        dot_aa = np.sum(va * va, axis=1);
+        dot_ab = np.sum(va * vb, axis=1);
+        dot_bb = np.sum(vb * vb, axis=1);
+        det = dot_aa * dot_bb - dot_ab * dot_ab;
+        valid = det > 1e-20;
+        safe_det = np.where(valid, det, 1.0);
+        q_aa = np.where(valid, dot_bb / safe_det, 0.0);
+        q_ab = np.where(valid, -dot_ab / safe_det, 0.0);
+        q_bb = np.where(valid, dot_aa / safe_det, 0.0);
+        sum_q = q_aa + 2.0 * q_ab + q_bb;
+
+        order = np.argsort(v, kind='stable');
+        self.corner_ptr = np.concatenate(([0], np.cumsum(np.bincount(v, minlength=N)))).tolist();
+        self.corner_updates = list(zip(c[order].tolist(), o[order].tolist(), np.sqrt(dot_aa[order]).tolist(), np.sqrt(dot_bb[order]).tolist(), q_aa[order].tolist(), q_ab[order].tolist(), q_bb[order].tolist(), sum_q[order].tolist()));
+
+    #Arrival time at c from the accepted vertices a and b of a triangle, given
+    #the edge lengths |a-c|, |b-c| and the inverse gram matrix of the triangle
+    @staticmethod
+    def triangleUpdate(T_a, T_b, length_a, length_b, q_aa, q_ab, q_bb, sum_q):
+        if(sum_q > 0.0):
+            q_t_a = q_aa * T_a + q_ab * T_b;
+            q_t_b = q_ab * T_a + q_bb * T_b;
+            sum_q_t = q_t_a + q_t_b;
+            t_q_t = T_a * q_t_a + T_b * q_t_b;
+            discriminant = sum_q_t * sum_q_t - sum_q * (t_q_t - 1.0);
+            if(discriminant >= 0.0):
+                T_c = (sum_q_t + math.sqrt(discriminant)) / sum_q;
+                #The characteristic through c has to come from inside the triangle
+                w_a = q_t_a - T_c * (q_aa + q_ab);
+                w_b = q_t_b - T_c * (q_ab + q_bb);
+                if(w_a <= 0.0 and w_b <= 0.0 and T_c >= max(T_a, T_b)):
+                    return T_c;
+        return min(T_a + length_a, T_b + length_b);
+
+    #Purpose: Geodesic distance of every vertex to the closest of the sources
+    #Inputs: sources (a vertex index or a list of them), target (stop once the
+    #distance of this vertex is final), radius (stop beyond this distance)
+    #Returns: distances (N), np.inf for vertices not reachable from a source
+    #or not reached before the march stopped
+    def distances(self, sources, target=-1, radius=np.inf):
+        sources = np.atleast_1d(np.asarray(sources, dtype=np.int64));
+        N = self.vpos.shape[0];
+        inf = math.inf;
+        T = [inf] * N;
+        accepted = [False] * N;
+        corner_ptr = self.corner_ptr;
+        corner_updates = self.corner_updates;
+        triangleUpdate = self.triangleUpdate;
+        heap = [];
+        for source in sources.tolist():
+            T[source] = 0.0;
+            heapq.heappush(heap, (0.0, source));
+
+        while(heap):
+            T_v, v = heapq.heappop(heap);
+            if(accepted[v]):
+                continue;
+            if(T_v > radius):
+                break;
+            accepted[v] = True;
+            if(v == target):
+                break;
+            for c, o, length_a, length_b, q_aa, q_ab, q_bb, sum_q in corner_updates[corner_ptr[v]:corner_ptr[v+1]]:
+                if(accepted[c]):
+                    continue;
+                if(accepted[o]):
+                    T_c = triangleUpdate(T_v, T[o], length_a, length_b, q_aa, q_ab, q_bb, sum_q);
+                else:
+                    T_c = T_v + length_a;
+                if(T_c < T[c]):
+                    T[c] = T_c;
+                    heapq.heappush(heap, (T_c, c));
+        distances = np.array(T);
+        accepted = np.array(accepted, dtype=bool);
+        #Tentative arrival times of the front are not final
+        distances[~accepted] = np.inf;
+        self.visited_fraction = np.count_nonzero(accepted) / max(N, 1);
+        return distances;
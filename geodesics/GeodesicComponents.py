@@ -3,71 +3,261 @@ Created on Jun 30, 2016
 
 @author: ashok
 '''
-import GenericMarkerCreator28.utils.geodesics.Constants as Constants;
-from GenericMarkerCreator28.utils.geodesics.stl_classes import Pair;
+from array import array;
+from collections import deque;
+from heapq import heappush, heappop;
+from operator import attrgetter;
+import numpy as np;
+import GenericMarkerCreator28.geodesics.Constants as Constants;
 
+#Per vertex state of a propagation as one typed array per field (structure of
+#arrays) instead of one InfoAtVertex object per vertex. The algorithms index
+#the fields directly, e.g. infos.disUptodate[index]
+class InfoAtVertices():
+    __slots__ = ('fParentIsPseudoSource', 'birthTime', 'indexOfParent', 'indexOfRootVertOfParent', 'level', 'disUptodate', 'entryProp');
+    
+    def __init__(self, count):
+        self.fParentIsPseudoSource = array('b', bytes(count));
+        self.birthTime = array('q', [-1]) * count;
+        self.indexOfParent = array('q', [-1]) * count;
+        self.indexOfRootVertOfParent = array('q', [-1]) * count;
+        self.level = array('q', [0]) * count;
+        self.disUptodate = array('d', [Constants.FLT_MAX]) * count;
+        self.entryProp = array('d', [Constants.CPP_DOUBLE]) * count;
+    
+    def __len__(self):
+        return len(self.birthTime);
+    
+    #Record like access (infos[index].disUptodate) for code outside the
+    #algorithms, e.g. ChenhanGeodesics reading GetVertexDistances()
+    def __getitem__(self, index):
+        if(index < -len(self) or index >= len(self)):
+            raise IndexError(index);
+        return InfoAtVertex(self, index);
+    
+    def __iter__(self):
+        for index in range(len(self)):
+            yield InfoAtVertex(self, index);
+    
+    @property
+    def nbytes(self):
+        return sum(len(values) * values.itemsize for values in (getattr(self, name) for name in self.__slots__));
+    
+    #Returns: distances (float32) and parents (int32, the vertex or pseudo source
+    #the geodesic comes through, -1 for the sources and unreached vertices)
+    def asArrays(self):
+        distances = np.frombuffer(self.disUptodate, dtype=np.float64);
+        parents = np.where(np.frombuffer(self.fParentIsPseudoSource, dtype=np.int8) != 0, np.frombuffer(self.indexOfParent, dtype=np.int64), np.frombuffer(self.indexOfRootVertOfParent, dtype=np.int64));
+        unreached = distances >= Constants.FLT_MAX;
+        parents[(distances <= Constants.FLT_EPSILON) | unreached] = -1;
+        return np.where(unreached, np.inf, distances).astype(np.float32), parents.astype(np.int32);
+    
+    #Returns: the geodesic tree as parents (int32, as in asArrays), parentEdges
+    #(int32, the edge a vertex is entered through, -1 if its parent is a pseudo
+    #source) and entryProps (float32, where on that edge the geodesic enters)
+    def asTreeArrays(self):
+        distances, parents = self.asArrays();
+        fromEdge = (np.frombuffer(self.fParentIsPseudoSource, dtype=np.int8) == 0) & (parents != -1);
+        parentEdges = np.where(fromEdge, np.frombuffer(self.indexOfParent, dtype=np.int64), -1).astype(np.int32);
+        entryProps = np.where(fromEdge, np.frombuffer(self.entryProp, dtype=np.float64), 0.0).astype(np.float32);
+        return parents, parentEdges, entryProps;
+
+#A point of a geodesic path (EdgePoint of py_chenhancc). Either a vertex, when
+#index is the vertex, or a point on the edge index at proportion from its
+#left vertex (0) to its right vertex (1)
+class EdgePoint():
+    __slots__ = ('index', 'proportion', 'isVertex');
+    
+    def __init__(self, *, index=-1, proportion=None):
+        self.index = index;
+        self.isVertex = proportion is None;
+        self.proportion = 0.0 if self.isVertex else proportion;
+    
+    #Returns: position of the point as a numpy 3 vector, model is a MeshData.EdgeModel
+    #or RichModel
+    def Get3DPoint(self, model):
+        if(self.isVertex):
+            return model.Vert(self.index);
+        edge = model.Edge(self.index);
+        return (1.0 - self.proportion) * model.Vert(edge.indexOfLeftVert) + self.proportion * model.Vert(edge.indexOfRightVert);
+
+#py_chenhancc reports unreached vertices with its own FLT_MAX and the sources
+#with a zero distance
+CPP_UNREACHED_DISTANCE = 1e30;
+CPP_SOURCE_DISTANCE = 1e-6;
+
+#Purpose: The geodesic tree of a propagation as compact arrays. The records
+#py_chenhancc returns (a list of InfoAtVertex) are read in one pass into a
+#N x 5 array and converted with numpy, the python InfoAtVertices already are
+#arrays
+#Returns: distances (float32, inf if unreached), parents, parentEdges and
+#entryProps as in InfoAtVertices.asTreeArrays
+def getTreeArrays(infos):
+    if(isinstance(infos, InfoAtVertices)):
+        distances, __ = infos.asArrays();
+        return (distances,) + infos.asTreeArrays();
+    fields = attrgetter('disUptodate', 'fParentIsPseudoSource', 'indexOfParent', 'indexOfRootVertOfParent', 'entryProp');
+    records = np.array(list(map(fields, infos)), dtype=np.float64).reshape(-1, 5);
+    distances = records[:,0];
+    fromPseudoSource = records[:,1] != 0.0;
+    unreached = distances >= CPP_UNREACHED_DISTANCE;
+    noParent = unreached | (distances <= CPP_SOURCE_DISTANCE);
+    parents = np.where(fromPseudoSource, records[:,2], records[:,3]).astype(np.int32);
+    parents[noParent] = -1;
+    fromEdge = ~fromPseudoSource & ~noParent;
+    parentEdges = np.where(fromEdge, records[:,2], -1).astype(np.int32);
+    entryProps = np.where(fromEdge, records[:,4], 0.0).astype(np.float32);
+    return np.where(unreached, np.inf, distances).astype(np.float32), parents, parentEdges, entryProps;
+
+#The geodesic tree of one propagation as compact arrays (see getTreeArrays).
+#They are enough to trace the geodesic from any vertex back to its source
+#without the propagation and its windows. model is a MeshData.EdgeModel (or
+#RichModel), its edges are numbered like the py_chenhancc ones, so the trees
+#of either implementation can be traced with it
+class GeodesicTree():
+    model = None;
+    distances = None;
+    parents = None;
+    parentEdges = None;
+    entryProps = None;
+    
+    def __init__(self, model, distances, parents, parentEdges, entryProps):
+        self.model = model;
+        self.distances = distances;
+        self.parents = parents;
+        self.parentEdges = parentEdges;
+        self.entryProps = entryProps;
+    
+    def IsReached(self, indexOfVert):
+        return bool(np.isfinite(self.distances[indexOfVert]));
+    
+    #Edge points of the geodesic from indexOfVert back to its source as
+    #(index, proportion, fIsVertex) records, the source vertex is the last one.
+    #The same walk as ExactMethodForDGP.WalkBack over the compact arrays
+    def WalkBack(self, indexOfVert):
+        model = self.model;
+        vertexNodes = [int(indexOfVert)];
+        while(self.parents[vertexNodes[-1]] != -1 and len(vertexNodes) <= len(self.parents)):
+            vertexNodes.append(int(self.parents[vertexNodes[-1]]));
+        
+        for i in range(len(vertexNodes) - 1):
+            lastVert = vertexNodes[i];
+            yield (lastVert, 0.0, True);
+            
+            parentEdgeIndex = int(self.parentEdges[lastVert]);
+            if(parentEdgeIndex == -1):
+                continue;
+            
+            edgeIndex = model.Edge(parentEdgeIndex).indexOfReverseEdge;
+            coord = model.GetNew2DCoordinatesByReversingCurrentEdge(parentEdgeIndex, model.Edge(parentEdgeIndex).coordOfOppositeVert);
+            proportion = 1.0 - float(self.entryProps[lastVert]);
+            
+            while(1):
+                yield (edgeIndex, proportion, False);
+                
+                edge = model.Edge(edgeIndex);
+                if(edge.indexOfOppositeVert == vertexNodes[i + 1]):
+                    break;
+                
+                oldProportion = proportion;
+                proportion = model.ProportionOnLeftEdgeByImage(edgeIndex, coord, oldProportion);
+                if(edge.indexOfLeftEdge == -1 or edge.indexOfRightEdge == -1):
+                    break;
+                
+                if(proportion >= -Constants.LENGTH_EPSILON_CONTROL and proportion <= 1):
+                    proportion = max(proportion, 0.0);
+                    coord = model.GetNew2DCoordinatesByRotatingAroundLeftChildEdge(edgeIndex, coord);
+                    edgeIndex = edge.indexOfLeftEdge;
+                else:
+                    proportion = model.ProportionOnRightEdgeByImage(edgeIndex, coord, oldProportion);
+                    proportion = min(max(proportion, 0.0), 1.0);
+                    coord = model.GetNew2DCoordinatesByRotatingAroundRightChildEdge(edgeIndex, coord);
+                    edgeIndex = edge.indexOfRightEdge;
+        
+        yield (vertexNodes[-1], 0.0, True);
+    
+    #Returns: (EdgePoint list from indexOfVert to its source, source vertex)
+    def FindSourceVertex(self, indexOfVert):
+        resultingPath = [];
+        indexOfSourceVert = indexOfVert;
+        for index, proportion, fIsVertex in self.WalkBack(indexOfVert):
+            if(fIsVertex):
+                resultingPath.append(EdgePoint(index=index));
+            else:
+                resultingPath.append(EdgePoint(index=index, proportion=proportion));
+            indexOfSourceVert = index;
+        return resultingPath, indexOfSourceVert;
+    
+    #Purpose: The geodesics of many vertices as arrays, see
+    #ExactMethodForDGP.TracePaths
+    def TracePaths(self, indicesOfVerts):
+        firstVerts, secondVerts, proportions = array('q'), array('q'), array('d');
+        offsets = array('q', [0]);
+        for indexOfVert in indicesOfVerts:
+            if(self.IsReached(indexOfVert)):
+                for index, proportion, fIsVertex in self.WalkBack(indexOfVert):
+                    if(fIsVertex):
+                        firstVerts.append(index);
+                        secondVerts.append(index);
+                        proportions.append(0.0);
+                    else:
+                        edge = self.model.Edge(index);
+                        firstVerts.append(edge.indexOfLeftVert);
+                        secondVerts.append(edge.indexOfRightVert);
+                        proportions.append(proportion);
+            offsets.append(len(proportions));
+        return np.frombuffer(firstVerts, dtype=np.int64), np.frombuffer(secondVerts, dtype=np.int64), np.frombuffer(proportions, dtype=np.float64), np.frombuffer(offsets, dtype=np.int64);
+    
+    @property
+    def nbytes(self):
+        return sum(values.nbytes for values in (self.distances, self.parents, self.parentEdges, self.entryProps));
+
+#View of one vertex of an InfoAtVertices
 class InfoAtVertex():
-    fParentIsPseudoSource = False;
-    birthTime = -1;
-    indexOfParent = -1;
-    indexOfRootVertOfParent = -1;
-    level = 0;
-    disUptodate = Constants.FLT_MAX;
-    entryProp = Constants.CPP_DOUBLE;
+    __slots__ = ('infos', 'index');
     
-    def __init__(self):
-#         self.fParentIsPseudoSource = False;
-        self.birthTime = -1;
-#         self.indexOfParent = -1;
-#         self.indexOfRootVertOfParent = -1;
-#         self.level = -1;
-        self.disUptodate = Constants.FLT_MAX;
-#         self.entryProp = Constants.FLT_MAX;
+    def __init__(self, infos, index):
+        self.infos = infos;
+        self.index = index;
+    
+    def __getattr__(self, name):
+        return getattr(self.infos, name)[self.index];
         
 class QuoteInfoAtVertex():
-    birthTime = -1;
-    indexOfVert = -1;
-    disUptodate = Constants.CPP_DOUBLE;
+    __slots__ = ('birthTime', 'indexOfVert', 'disUptodate');
     
     def __lt__(self, other):
-        assert(type(self) == type(other));        
 #         return (self.disUptodate > other.disUptodate);#Original idea for cpp priority_queue
         return (self.disUptodate < other.disUptodate);
     
-    def __init__(self, *, birthTime = -1, indexOfVert = -1, disUptodate = -1.0):
-        if(birthTime != -1):
-            self.birthTime = birthTime;
-        if(indexOfVert != -1):
-            self.indexOfVert = indexOfVert;
-        if(disUptodate != -1.0):
-            self.disUptodate = disUptodate;
+    def __init__(self, *, birthTime = -1, indexOfVert = -1, disUptodate = Constants.CPP_DOUBLE):
+        self.birthTime = birthTime;
+        self.indexOfVert = indexOfVert;
+        self.disUptodate = disUptodate;
 
-class InfoAtAngle():
-    birthTime = -1;
-    disUptodate = Constants.FLT_MAX;
-    entryprop = Constants.CPP_DOUBLE;
+#Per edge (angle) state of a propagation, structure of arrays as InfoAtVertices
+class InfoAtAngles():
+    __slots__ = ('birthTime', 'disUptodate', 'entryProp');
     
-    def __init__(self):
-        self.birthTime  = -1;
-        self.disUptodate = Constants.FLT_MAX;
+    def __init__(self, count):
+        self.birthTime = array('q', [-1]) * count;
+        self.disUptodate = array('d', [Constants.FLT_MAX]) * count;
+        self.entryProp = array('d', [Constants.CPP_DOUBLE]) * count;
+    
+    def __len__(self):
+        return len(self.birthTime);
+    
+    @property
+    def nbytes(self):
+        return sum(len(values) * values.itemsize for values in (self.birthTime, self.disUptodate, self.entryProp));
 
+#Windows are the bulk of the allocations of a propagation, __slots__ keeps each
+#one to the fields below without a per instance __dict__
 class Window():
-    fIsOnLeftSubtree = False;
-    fParentIsPseudoSource = False;
-    fDirectParentEdgeOnLeft = False;
-    fDirectParenIsPseudoSource = False;
-    birthTimeOfParent = -1;
-    indexOfParent = -1;
-    indexOfRoot = -1;
-    indexOfCurEdge = -1;
-    level = -1;
-    disToRoot = Constants.FLT_MAX;
-    proportions = [-1.0, -1.0];
-    entryPropOfParent = Constants.CPP_DOUBLE;    
-    coordOfPseudoSource = Pair(-1.0, -1.0);
+    __slots__ = ('fIsOnLeftSubtree', 'fParentIsPseudoSource', 'fDirectParentEdgeOnLeft', 'fDirectParenIsPseudoSource', 'birthTimeOfParent', 'indexOfParent', 'indexOfRoot', 'indexOfCurEdge', 'level', 'disToRoot', 'proportions', 'entryPropOfParent', 'coordOfPseudoSource');
     
     def __init__(self):        
-        self.fIsOneLeftSubTree = False;
+        self.fIsOnLeftSubtree = False;
         self.fParentIsPseudoSource = False;
         self.fDirectParentEdgeOnLeft = False;
         self.fDirectParenIsPseudoSource = False;
@@ -79,12 +269,10 @@ class Window():
         self.disToRoot = Constants.CPP_DOUBLE;
         self.proportions = [Constants.CPP_DOUBLE, Constants.CPP_DOUBLE];
         self.entryPropOfParent = Constants.CPP_DOUBLE;        
-        self.coordOfPseudoSource = Pair(Constants.CPP_DOUBLE, Constants.CPP_DOUBLE);
+        self.coordOfPseudoSource = None;
     
 class QuoteWindow():
-    
-    pWindow = None;
-    disUptodate = Constants.CPP_DOUBLE;
+    __slots__ = ('pWindow', 'disUptodate');
     
     def __init__(self):
         self.pWindow = None;
@@ -93,6 +281,42 @@ class QuoteWindow():
     def __lt__(self, other):
 #         return (self.disUptodate > other.disUptodate);
         return (self.disUptodate < other.disUptodate);
+
+#Single threaded replacements of queue.Queue and queue.PriorityQueue with the
+#same put/get/empty/qsize interface. The head is queue[0] in both, as the
+#algorithms peek at it. queue.Queue takes a lock on every call, these do not
+class FIFOQueue():
+    __slots__ = ('queue',);
     
+    def __init__(self):
+        self.queue = deque();
+    
+    def put(self, item):
+        self.queue.append(item);
+    
+    def get(self):
+        return self.queue.popleft();
+    
+    def empty(self):
+        return not self.queue;
+    
+    def qsize(self):
+        return len(self.queue);
 
-    
\ No newline at end of file
+class HeapQueue():
+    __slots__ = ('queue',);
+    
+    def __init__(self):
+        self.queue = [];
+    
+    def put(self, item):
+        heappush(self.queue, item);
+    
+    def get(self):
+        return heappop(self.queue);
+    
+    def empty(self):
+        return not self.queue;
+    
+    def qsize(self):
+        return len(self.queue);
@@ -0,0 +1,421 @@
+'''
+Created on Jun 30, 2016
+
+@author: ashok
+'''
+import math;
+import numpy as np;
+from scipy.sparse import coo_matrix;
+from scipy.sparse.csgraph import connected_components;
+import GenericMarkerCreator28.geodesics.Constants as Constants;
+from GenericMarkerCreator28.geodesics.stl_classes import make_pair;
+
+#Pure python counterpart of CRichModel (and CBaseModel) of py_chenhancc, the
+#mesh the python Chen-Han fallback (ExactMethodForDGP and its subclasses)
+#propagates on. Vertices and faces are numpy arrays, points returned by Vert,
+#ComputeShiftPoint etc are numpy 3 vectors and 2D coordinates are Pairs.
+#The directed edges are created in the same order as CRichModel does, so an
+#edge index means the same edge in both models
+
+def CombinePointAndNormalTo(pt, normal):
+    return pt + normal * Constants.RateOfNormalShift;
+
+def CombineTwoNormalsTo(pt1, coef1, pt2, coef2):
+    return coef1 * pt1 + coef2 * pt2;
+
+#Directed edge, the face in front of it is on its left (CEdge of py_chenhancc)
+class Edge():
+    __slots__ = ('indexOfLeftVert', 'indexOfRightVert', 'indexOfOppositeVert', 'indexOfLeftEdge', 'indexOfRightEdge', 'indexOfReverseEdge', 'indexOfFrontFace', 'edge_length', 'coordOfOppositeVert', 'matrixRotatedToLeftEdge', 'matrixRotatedToRightEdge');
+
+    def __init__(self, indexOfLeftVert, indexOfRightVert, indexOfOppositeVert, indexOfLeftEdge, indexOfRightEdge, indexOfReverseEdge, indexOfFrontFace, edge_length, coordOfOppositeVert, matrixRotatedToLeftEdge, matrixRotatedToRightEdge):
+        self.indexOfLeftVert = indexOfLeftVert;
+        self.indexOfRightVert = indexOfRightVert;
+        #-1 for the edges on a boundary (extreme edges)
+        self.indexOfOppositeVert = indexOfOppositeVert;
+        self.indexOfLeftEdge = indexOfLeftEdge;
+        self.indexOfRightEdge = indexOfRightEdge;
+        self.indexOfReverseEdge = indexOfReverseEdge;
+        self.indexOfFrontFace = indexOfFrontFace;
+        self.edge_length = edge_length;
+        #Position of the opposite vertex with the edge on the x axis, left vertex at the origin
+        self.coordOfOppositeVert = coordOfOppositeVert;
+        #Rotations (cos, sin) of the plane of this edge to the planes of the child edges
+        self.matrixRotatedToLeftEdge = matrixRotatedToLeftEdge;
+        self.matrixRotatedToRightEdge = matrixRotatedToRightEdge;
+
+#The directed edges of a mesh as numpy arrays only, numbered like the edges of
+#CRichModel. It has what GeodesicComponents.GeodesicTree needs to trace the
+#geodesic trees of either implementation (edges, their planar coordinates and
+#the unfolding methods) without the Edge objects, neighbourhoods and angles
+#the propagation needs. Edge builds the Edge of an index from the arrays
+class EdgeModel():
+    #Positions of each vertex as a numpy N x 3 (float)
+    m_Verts = None;
+    #Vertex indices of each triangle as a numpy F x 3 (int)
+    m_Faces = None;
+    #The edges as numpy arrays (E) by Edge field name, the pairs as E x 2
+    #arrays, see CreateEdgeArrays and ComputePlanarCoordArrays
+    m_EdgeArrays = None;
+
+    def __init__(self):
+        self.m_Verts = np.zeros((0, 3), dtype=np.float64);
+        self.m_Faces = np.zeros((0, 3), dtype=np.int64);
+        self.m_EdgeArrays = {};
+
+    #Inputs: vertices (N x 3 float), faces (F x 3 int)
+    def LoadModel(self, vertices, faces):
+        self.m_Verts = np.array(vertices, dtype=np.float64).reshape(-1, 3);
+        self.m_Faces = np.array(faces, dtype=np.int64).reshape(-1, 3);
+
+    def Preprocess(self):
+        self.CreateEdgeArrays();
+        self.ComputePlanarCoordArrays();
+
+    #The corners (j, (j+2)%3) of face i in the order CRichModel visits them give
+    #the half edge (Face(i)[(j+2)%3], Face(i)[j]). The first time an undirected
+    #edge is met it becomes the edge 2k in that direction and 2k+1 is its reverse
+    def CreateEdgeArrays(self):
+        f = self.m_Faces;
+        N, F = self.GetNumOfVerts(), self.GetNumOfFaces();
+        j = np.arange(3);
+        lefts = f[:, (j + 2) % 3].ravel();
+        rights = f[:, j].ravel();
+        opposites = f[:, (j + 1) % 3].ravel();
+        fronts = np.repeat(np.arange(F, dtype=np.int64), 3);
+
+        keys = np.minimum(lefts, rights) * N + np.maximum(lefts, rights);
+        __, first, inverse = np.unique(keys, return_index=True, return_inverse=True);
+        order = np.argsort(first, kind='stable');
+        rank = np.empty_like(order);
+        rank[order] = np.arange(len(order));
+        halfedges = 2 * rank[inverse.ravel()] + (lefts != lefts[first][inverse.ravel()]);
+        if(np.any(np.bincount(halfedges) > 1)):
+            raise ValueError('Repeated edges!');
+
+        E = 2 * len(order);
+        left_vert = np.empty(E, dtype=np.int64);
+        right_vert = np.empty(E, dtype=np.int64);
+        left_vert[0::2], right_vert[0::2] = lefts[first[order]], rights[first[order]];
+        left_vert[1::2], right_vert[1::2] = rights[first[order]], lefts[first[order]];
+        opposite_vert = np.full(E, -1, dtype=np.int64);
+        opposite_vert[halfedges] = opposites;
+        front_face = np.full(E, -1, dtype=np.int64);
+        front_face[halfedges] = fronts;
+        reverse_edge = np.arange(E, dtype=np.int64) ^ 1;
+
+        face_edges = halfedges.reshape(F, 3);
+        left_edge = np.full(E, -1, dtype=np.int64);
+        right_edge = np.full(E, -1, dtype=np.int64);
+        left_edge[face_edges] = face_edges[:, (j + 2) % 3] ^ 1;
+        right_edge[face_edges] = face_edges[:, (j + 1) % 3] ^ 1;
+        lengths = np.sqrt(np.sum((self.m_Verts[left_vert] - self.m_Verts[right_vert])**2, axis=1));
+
+        self.m_EdgeArrays = {'indexOfLeftVert': left_vert, 'indexOfRightVert': right_vert, 'indexOfOppositeVert': opposite_vert, 'indexOfLeftEdge': left_edge, 'indexOfRightEdge': right_edge, 'indexOfReverseEdge': reverse_edge, 'indexOfFrontFace': front_face, 'edge_length': lengths};
+
+    def ComputePlanarCoordArrays(self):
+        lengths = self.m_EdgeArrays['edge_length'];
+        left_edge, right_edge = self.m_EdgeArrays['indexOfLeftEdge'], self.m_EdgeArrays['indexOfRightEdge'];
+        reverse_edge = self.m_EdgeArrays['indexOfReverseEdge'];
+        inner = self.m_EdgeArrays['indexOfOppositeVert'] != -1;
+        E = len(lengths);
+
+        x, y = np.zeros(E), np.zeros(E);
+        bottom = lengths[inner];
+        left_len = lengths[left_edge[inner]];
+        right_len = lengths[right_edge[inner]];
+        x[inner] = ((left_len**2 - right_len**2) / bottom + bottom) / 2.0;
+        y[inner] = np.sqrt(np.maximum(0.0, left_len**2 - x[inner]**2));
+
+        def normalized(dx, dy):
+            scale = np.abs(dx) + np.abs(dy);
+            dx, dy = dx / scale, dy / scale;
+            norm = np.sqrt(dx * dx + dy * dy);
+            return dx / norm, dy / norm;
+
+        left_rotations, right_rotations = np.zeros((E, 2)), np.zeros((E, 2));
+        with np.errstate(divide='ignore', invalid='ignore'):
+            reverse_left = reverse_edge[left_edge[inner]];
+            left_rotations[inner, 0], left_rotations[inner, 1] = normalized(lengths[reverse_left] - x[reverse_left], -y[reverse_left]);
+            reverse_right = reverse_edge[right_edge[inner]];
+            right_rotations[inner, 0], right_rotations[inner, 1] = normalized(x[reverse_right], y[reverse_right]);
+
+        self.m_EdgeArrays['coordOfOppositeVert'] = np.column_stack((x, y));
+        self.m_EdgeArrays['matrixRotatedToLeftEdge'] = left_rotations;
+        self.m_EdgeArrays['matrixRotatedToRightEdge'] = right_rotations;
+
+    def GetNumOfVerts(self):
+        return len(self.m_Verts);
+
+    def GetNumOfFaces(self):
+        return len(self.m_Faces);
+
+    def GetNumOfEdges(self):
+        return len(self.m_EdgeArrays.get('edge_length', ()));
+
+    def Vert(self, vertIndex):
+        return self.m_Verts[vertIndex];
+
+    def Edge(self, edgeIndex):
+        arrays = self.m_EdgeArrays;
+        fields = [int(arrays[name][edgeIndex]) for name in ('indexOfLeftVert', 'indexOfRightVert', 'indexOfOppositeVert', 'indexOfLeftEdge', 'indexOfRightEdge', 'indexOfReverseEdge', 'indexOfFrontFace')];
+        pairs = [make_pair(*arrays[name][edgeIndex].tolist()) for name in ('coordOfOppositeVert', 'matrixRotatedToLeftEdge', 'matrixRotatedToRightEdge')];
+        return Edge(*fields, float(arrays['edge_length'][edgeIndex]), *pairs);
+
+    def ProportionOnEdgeByImage(self, edgeIndex, coord):
+        edge = self.Edge(edgeIndex);
+        res = edge.coordOfOppositeVert.first * coord.second - edge.coordOfOppositeVert.second * coord.first;
+        return res / ((coord.second - edge.coordOfOppositeVert.second) * edge.edge_length);
+
+    def ProportionOnLeftEdgeByImage(self, edgeIndex, coord, proportion):
+        edge = self.Edge(edgeIndex);
+        xBalance = proportion * edge.edge_length;
+        res = edge.coordOfOppositeVert.first * coord.second - edge.coordOfOppositeVert.second * (coord.first - xBalance);
+        return xBalance * coord.second / res;
+
+    def ProportionOnRightEdgeByImage(self, edgeIndex, coord, proportion):
+        edge = self.Edge(edgeIndex);
+        part1 = edge.edge_length * coord.second;
+        part2 = proportion * edge.edge_length * edge.coordOfOppositeVert.second;
+        part3 = edge.coordOfOppositeVert.second * coord.first - edge.coordOfOppositeVert.first * coord.second;
+        return (part3 + proportion * part1 - part2) / (part3 + part1 - part2);
+
+    def GetNew2DCoordinatesByRotatingAroundLeftChildEdge(self, edgeIndex, input2DCoordinates):
+        matrix = self.Edge(edgeIndex).matrixRotatedToLeftEdge;
+        return make_pair(matrix.first * input2DCoordinates.first - matrix.second * input2DCoordinates.second, matrix.second * input2DCoordinates.first + matrix.first * input2DCoordinates.second);
+
+    def GetNew2DCoordinatesByRotatingAroundRightChildEdge(self, edgeIndex, input2DCoordinates):
+        edge = self.Edge(edgeIndex);
+        reverseEdge = self.Edge(edge.indexOfRightEdge).indexOfReverseEdge;
+        coordOfLeftEnd = self.GetNew2DCoordinatesByReversingCurrentEdge(reverseEdge, self.Edge(reverseEdge).coordOfOppositeVert);
+        matrix = edge.matrixRotatedToRightEdge;
+        return make_pair(matrix.first * input2DCoordinates.first - matrix.second * input2DCoordinates.second + coordOfLeftEnd.first, matrix.second * input2DCoordinates.first + matrix.first * input2DCoordinates.second + coordOfLeftEnd.second);
+
+    def GetNew2DCoordinatesByReversingCurrentEdge(self, edgeIndex, input2DCoordinates):
+        return make_pair(self.Edge(edgeIndex).edge_length - input2DCoordinates.first, -input2DCoordinates.second);
+
+class RichModel(EdgeModel):
+    #Unit vertex normals as a numpy N x 3 (float)
+    m_NormalsToVerts = None;
+    #2 / largest side of the bounding box, the vertices are not rescaled
+    m_scale = 1.0;
+    #Edge objects as used by the algorithms, the same edges as m_EdgeArrays
+    m_Edges = None;
+    #Outgoing edges of every vertex in counter clockwise order with the angle
+    #between each edge and the next one, as Pair(edge, angle)
+    m_NeighsAndAngles = None;
+    m_FlagsForCheckingConvexVerts = None;
+    m_nBoundries = 0;
+    m_nIsolatedVerts = 0;
+    m_nComponents = 0;
+    fBePreprocessed = False;
+
+    def __init__(self):
+        super().__init__();
+        self.m_NormalsToVerts = np.zeros((0, 3), dtype=np.float64);
+        self.m_Edges = [];
+        self.m_NeighsAndAngles = [];
+        self.m_FlagsForCheckingConvexVerts = [];
+        self.fBePreprocessed = False;
+
+    #Inputs: vertices (N x 3 float), faces (F x 3 int)
+    def LoadModel(self, vertices, faces):
+        super().LoadModel(vertices, faces);
+        self.fBePreprocessed = False;
+        if(self.GetNumOfVerts() and self.GetNumOfFaces()):
+            self.AdjustScaleAndComputeNormalsToVerts();
+
+    def AdjustScaleAndComputeNormalsToVerts(self):
+        v, f = self.m_Verts, self.m_Faces;
+        normals = np.cross(v[f[:,1]] - v[f[:,0]], v[f[:,2]] - v[f[:,1]]);
+        areas = np.sqrt(np.sum(normals**2, axis=1));
+        normals[areas > 0.0] /= areas[areas > 0.0, None];
+        vertex_normals = np.zeros(v.shape, dtype=np.float64);
+        for j in range(3):
+            np.add.at(vertex_normals, f[:,j], normals);
+        lengths = np.sqrt(np.sum(vertex_normals**2, axis=1));
+        valid = np.sum(np.abs(vertex_normals), axis=1) >= Constants.FLT_EPSILON;
+        vertex_normals[valid] /= lengths[valid, None];
+        self.m_NormalsToVerts = vertex_normals;
+        self.m_scale = 2.0 / np.max(v.max(axis=0) - v.min(axis=0));
+
+    def Preprocess(self):
+        if(self.fBePreprocessed):
+            return;
+        self.CreateEdgesFromVertsAndFaces();
+        self.CollectAndArrangeNeighs();
+        self.ComputeNumOfHoles();
+        self.ComputeNumOfComponents();
+        self.ComputeAnglesAroundVerts();
+        self.ComputePlanarCoordsOfIncidentVertForEdges();
+        self.fBePreprocessed = True;
+
+    def CreateEdgesFromVertsAndFaces(self):
+        self.CreateEdgeArrays();
+        arrays = self.m_EdgeArrays;
+        self.m_Edges = [Edge(*fields, None, None, None) for fields in zip(*[arrays[name].tolist() for name in ('indexOfLeftVert', 'indexOfRightVert', 'indexOfOppositeVert', 'indexOfLeftEdge', 'indexOfRightEdge', 'indexOfReverseEdge', 'indexOfFrontFace', 'edge_length')])];
+
+    def CollectAndArrangeNeighs(self):
+        N = self.GetNumOfVerts();
+        left_vert = self.m_EdgeArrays['indexOfLeftVert'];
+        opposite_vert = self.m_EdgeArrays['indexOfOppositeVert'];
+        start_edges = (opposite_vert[self.m_EdgeArrays['indexOfReverseEdge']] == -1).tolist();
+        extreme_edges = (opposite_vert == -1).tolist();
+        left_edges = self.m_EdgeArrays['indexOfLeftEdge'].tolist();
+        degrees = np.bincount(left_vert, minlength=N).tolist();
+
+        starts = [[-1] for i in range(N)];
+        for i, left in enumerate(left_vert.tolist()):
+            vert_starts = starts[left];
+            if(vert_starts[0] == -1 or not start_edges[vert_starts[0]]):
+                vert_starts[0] = i;
+            elif(start_edges[i]):
+                vert_starts.append(i);
+
+        self.m_nIsolatedVerts = 0;
+        self.m_NeighsAndAngles = [];
+        for i in range(N):
+            if(starts[i][0] == -1):
+                self.m_NeighsAndAngles.append([]);
+                self.m_nIsolatedVerts += 1;
+                continue;
+            neighs = [];
+            for start_edge in starts[i]:
+                cur_edge = start_edge;
+                while(True):
+                    neighs.append(make_pair(cur_edge, 0.0));
+                    if(len(neighs) >= degrees[i] or extreme_edges[cur_edge]):
+                        break;
+                    cur_edge = left_edges[cur_edge];
+                    if(cur_edge == start_edge):
+                        break;
+                if(len(neighs) >= degrees[i]):
+                    break;
+            if(len(neighs) != degrees[i]):
+                raise ValueError('Complex vertices');
+            self.m_NeighsAndAngles.append(neighs);
+
+    def ComputeNumOfHoles(self):
+        self.m_nBoundries = 0;
+        if(self.IsClosedModel()):
+            return;
+        remaining = set(np.flatnonzero(self.m_EdgeArrays['indexOfOppositeVert'] == -1).tolist());
+        for first_edge in sorted(remaining):
+            if(first_edge not in remaining):
+                continue;
+            self.m_nBoundries += 1;
+            edge = first_edge;
+            while(edge in remaining):
+                remaining.discard(edge);
+                root = self.m_Edges[edge].indexOfRightVert;
+                index = self.GetSubindexToVert(root, self.m_Edges[edge].indexOfLeftVert);
+                neighs = self.m_NeighsAndAngles[root];
+                edge = neighs[(index - 1 + len(neighs)) % len(neighs)].first;
+
+    def ComputeNumOfComponents(self):
+        N = self.GetNumOfVerts();
+        left_vert, right_vert = self.m_EdgeArrays['indexOfLeftVert'], self.m_EdgeArrays['indexOfRightVert'];
+        graph = coo_matrix((np.ones(len(left_vert)), (left_vert, right_vert)), shape=(N, N));
+        self.m_nComponents, __ = connected_components(graph, directed=False);
+
+    #The angles of all the vertices are computed at once over the flattened
+    #neighbour lists and then written back into their Pairs
+    def ComputeAnglesAroundVerts(self):
+        counts = np.array([len(neighs) for neighs in self.m_NeighsAndAngles], dtype=np.int64);
+        flattened = [neigh for neighs in self.m_NeighsAndAngles for neigh in neighs];
+        edges = np.fromiter((neigh.first for neigh in flattened), dtype=np.int64, count=len(flattened));
+        offsets = np.repeat(np.cumsum(counts) - counts, counts);
+        positions = np.arange(len(edges)) - offsets;
+        nexts = edges[offsets + (positions + 1) % np.repeat(np.maximum(counts, 1), counts)];
+        lengths = self.m_EdgeArrays['edge_length'];
+        extreme = self.m_EdgeArrays['indexOfOppositeVert'][edges] == -1;
+        l = lengths[edges];
+        r = lengths[nexts];
+        b = lengths[np.where(extreme, edges, self.m_EdgeArrays['indexOfRightEdge'][edges])];
+        with np.errstate(divide='ignore', invalid='ignore'):
+            angles = np.arccos(np.clip((l * l + r * r - b * b) / (2.0 * l * r), -1.0, 1.0));
+        angles[extreme] = 2.0 * Constants.M_PI + 0.1;
+        angle_sums = np.bincount(np.repeat(np.arange(len(counts)), counts), weights=angles, minlength=len(counts));
+        self.m_FlagsForCheckingConvexVerts = (angle_sums < 2.0 * Constants.M_PI - Constants.ToleranceOfConvexAngle).tolist();
+        for neigh, angle in zip(flattened, angles.tolist()):
+            neigh.second = angle;
+
+    def ComputePlanarCoordsOfIncidentVertForEdges(self):
+        self.ComputePlanarCoordArrays();
+        arrays = self.m_EdgeArrays;
+        for edge, coord, lrot, rrot in zip(self.m_Edges, arrays['coordOfOppositeVert'].tolist(), arrays['matrixRotatedToLeftEdge'].tolist(), arrays['matrixRotatedToRightEdge'].tolist()):
+            edge.coordOfOppositeVert = make_pair(*coord);
+            edge.matrixRotatedToLeftEdge = make_pair(*lrot);
+            edge.matrixRotatedToRightEdge = make_pair(*rrot);
+
+    def GetNumOfEdges(self):
+        return len(self.m_Edges);
+
+    def GetNumOfValidDirectedEdges(self):
+        return self.GetNumOfFaces() * 3;
+
+    def GetNumOfTotalUndirectedEdges(self):
+        return self.GetNumOfEdges() // 2;
+
+    def GetNumOfComponents(self):
+        return self.m_nComponents;
+
+    def GetNumOfBoundries(self):
+        return self.m_nBoundries;
+
+    def GetNumOfIsolated(self):
+        return self.m_nIsolatedVerts;
+
+    def IsClosedModel(self):
+        return self.GetNumOfValidDirectedEdges() == self.GetNumOfEdges();
+
+    def HasBeenProcessed(self):
+        return self.fBePreprocessed;
+
+    def Normal(self, vertIndex):
+        return self.m_NormalsToVerts[vertIndex];
+
+    def Face(self, faceIndex):
+        return self.m_Faces[faceIndex];
+
+    def Edge(self, edgeIndex):
+        return self.m_Edges[edgeIndex];
+
+    def Neigh(self, root):
+        return self.m_NeighsAndAngles[root];
+
+    def AngleSum(self, vertIndex):
+        return sum(neigh.second for neigh in self.Neigh(vertIndex));
+
+    def IsConvexVert(self, index):
+        return self.m_FlagsForCheckingConvexVerts[index];
+
+    def isBoundaryVert(self, index):
+        return self.IsStartEdge(self.Neigh(index)[0].first);
+
+    def IsExtremeEdge(self, edgeIndex):
+        return self.m_Edges[edgeIndex].indexOfOppositeVert == -1;
+
+    def IsStartEdge(self, edgeIndex):
+        return self.m_Edges[self.m_Edges[edgeIndex].indexOfReverseEdge].indexOfOppositeVert == -1;
+
+    def GetSubindexToVert(self, root, neigh):
+        for i, entry in enumerate(self.Neigh(root)):
+            if(self.m_Edges[entry.first].indexOfRightVert == neigh):
+                return i;
+        return -1;
+
+    def GetEdgeIndexFromTwoVertices(self, leftVert, rightVert):
+        subIndex = self.GetSubindexToVert(leftVert, rightVert);
+        assert(subIndex != -1);
+        return self.Neigh(leftVert)[subIndex].first;
+
+    def DistanceToIncidentAngle(self, edgeIndex, coord):
+        edge = self.m_Edges[edgeIndex];
+        detaX = coord.first - edge.coordOfOppositeVert.first;
+        detaY = coord.second - edge.coordOfOppositeVert.second;
+        return math.sqrt(detaX * detaX + detaY * detaY);
+
+    def ComputeShiftPoint(self, indexOfVert, epsilon=None):
+        if(epsilon is None):
+            epsilon = Constants.RateOfNormalShift / self.m_scale;
+        return self.m_Verts[indexOfVert] + self.m_NormalsToVerts[indexOfVert] * epsilon;
@@ -4,28 +4,26 @@ Created on Jun 30, 2016
 @author: ashok
 '''
 import sys, math, gc;
-from collections import deque;
-import GenericMarkerCreator28.utils.geodesics.Constants as Constants;
-from GenericMarkerCreator28.utils.geodesics.GeodesicComponents import QuoteWindow, QuoteInfoAtVertex, InfoAtVertex, InfoAtAngle, Window
-from GenericMarkerCreator28.utils.geodesics.ExactMethodForDGP import ExactMethodForDGP
-from queue import Queue;
+import GenericMarkerCreator28.geodesics.Constants as Constants;
+from GenericMarkerCreator28.geodesics.GeodesicComponents import QuoteWindow, QuoteInfoAtVertex, InfoAtAngles, Window, FIFOQueue
+from GenericMarkerCreator28.geodesics.ExactMethodForDGP import ExactMethodForDGP
+
+WINDOW_RECORD_BYTES = sys.getsizeof(QuoteWindow()) + sys.getsizeof(Window()) + sys.getsizeof([0.0, 0.0]) + 64;
 
 class PreviousCH(ExactMethodForDGP):
-    m_QueueForWindows = None;#A Queue object
-    m_QueueForPseudoSources = None;#A Queue object
-    m_InfoAtAngles = None;#A simple list object
+    m_QueueForWindows = None;#A FIFOQueue object
+    m_QueueForPseudoSources = None;#A FIFOQueue object
+    m_InfoAtAngles = None;#An InfoAtAngles object
     
     def __init__(self, *, inputModel=None, indexOfSourceVerts=None):
         super().__init__(inputModel=inputModel, indexOfSourceVerts=indexOfSourceVerts);
         self.nameOfAlgorithm = "CH";        
     
     def InitContainers(self):
-#         self.m_QueueForPseudoSources = deque();
-#         self.m_QueueForWindows = deque();
-        self.m_QueueForPseudoSources = Queue();
-        self.m_QueueForWindows = Queue();
-        self.m_InfoAtAngles = [InfoAtAngle() for i in range(self.model.GetNumOfEdges())];
-        self.memory += float(self.model.GetNumOfEdges()) * sys.getsizeof(InfoAtAngle) / 1024 / 1024;
+        self.m_QueueForPseudoSources = FIFOQueue();
+        self.m_QueueForWindows = FIFOQueue();
+        self.m_InfoAtAngles = InfoAtAngles(self.model.GetNumOfEdges());
+        self.memory += self.m_InfoAtAngles.nbytes / 1024 / 1024;
     
     def BuildSequenceTree(self):
         self.ComputeChildrenOfSource();
@@ -60,10 +58,13 @@ class PreviousCH(ExactMethodForDGP):
     
     def FillExperimentalResults(self):
         self.NPE = 1;
+        #Peak number of queued windows, each a QuoteWindow, a Window, its
+        #proportions and the 2D coordinates of its pseudo source
+        self.memory += float(self.nMaxLenOfWindowQueue) * WINDOW_RECORD_BYTES / 1024 / 1024;
     
     def ClearContainers(self):
-        self.m_QueueForWindows = Queue();
-        self.m_QueueForPseudoSources = Queue();    
+        self.m_QueueForWindows = FIFOQueue();
+        self.m_QueueForPseudoSources = FIFOQueue();    
     
     def AddIntoQueueOfPseudoSources(self, quoteOfPseudoSource):
 #         self.m_QueueForPseudoSources.append(quoteOfPseudoSource);
@@ -74,21 +75,21 @@ class PreviousCH(ExactMethodForDGP):
         self.nCountOfWindows += 1;
     
     def UpdateTreeDepthBackWithChoice(self):
-        while (not self.m_QueueForPseudoSources.empty() and (self.m_QueueForPseudoSources.queue[0].birthTime != self.m_InfoAtVertices[self.m_QueueForPseudoSources.queue[0].indexOfVert].birthTime)):
+        while (not self.m_QueueForPseudoSources.empty() and (self.m_QueueForPseudoSources.queue[0].birthTime != self.m_InfoAtVertices.birthTime[self.m_QueueForPseudoSources.queue[0].indexOfVert])):
             self.m_QueueForPseudoSources.get();
     
         while (not self.m_QueueForWindows.empty()):
             quoteW = self.m_QueueForWindows.queue[0];
             if (quoteW.pWindow.fParentIsPseudoSource):
-                if (quoteW.pWindow.birthTimeOfParent != self.m_InfoAtVertices[quoteW.pWindow.indexOfParent].birthTime):
+                if (quoteW.pWindow.birthTimeOfParent != self.m_InfoAtVertices.birthTime[quoteW.pWindow.indexOfParent]):
                     quoteW.pWindow = None;
                     self.m_QueueForWindows.get();
                 else:
                     break;
             else:
-                if (quoteW.pWindow.birthTimeOfParent == self.m_InfoAtAngles[quoteW.pWindow.indexOfParent].birthTime):
+                if (quoteW.pWindow.birthTimeOfParent == self.m_InfoAtAngles.birthTime[quoteW.pWindow.indexOfParent]):
                     break;
-                elif (quoteW.pWindow.fIsOnLeftSubtree == (quoteW.pWindow.entryPropOfParent < self.m_InfoAtAngles[quoteW.pWindow.indexOfParent].entryProp)):
+                elif (quoteW.pWindow.fIsOnLeftSubtree == (quoteW.pWindow.entryPropOfParent < self.m_InfoAtAngles.entryProp[quoteW.pWindow.indexOfParent])):
                     break;
                 else:
                     quoteW.pWindow = None;
@@ -97,8 +98,8 @@ class PreviousCH(ExactMethodForDGP):
         fFromQueueOfPseudoSources = False;        
         if (self.m_QueueForWindows.empty()):
             if (not self.m_QueueForPseudoSources.empty()):
-                infoOfHeadElemOfPseudoSources = self.m_InfoAtVertices[self.m_QueueForPseudoSources.queue[0].indexOfVert];
-                self.depthOfResultingTree = max(self.depthOfResultingTree, infoOfHeadElemOfPseudoSources.level);
+                levelOfHeadElemOfPseudoSources = self.m_InfoAtVertices.level[self.m_QueueForPseudoSources.queue[0].indexOfVert];
+                self.depthOfResultingTree = max(self.depthOfResultingTree, levelOfHeadElemOfPseudoSources);
                 fFromQueueOfPseudoSources = True;
         else:
             if (self.m_QueueForPseudoSources.empty()):
@@ -106,11 +107,11 @@ class PreviousCH(ExactMethodForDGP):
                 self.depthOfResultingTree = max(self.depthOfResultingTree, infoOfHeadElemOfWindows.level);
                 fFromQueueOfPseudoSources = False;
             else:
-                infoOfHeadElemOfPseudoSources = self.m_InfoAtVertices[self.m_QueueForPseudoSources.queue[0].indexOfVert];
+                levelOfHeadElemOfPseudoSources = self.m_InfoAtVertices.level[self.m_QueueForPseudoSources.queue[0].indexOfVert];
                 infoOfHeadElemOfWindows = self.m_QueueForWindows.queue[0].pWindow;
                 
-                if (infoOfHeadElemOfPseudoSources.level <= infoOfHeadElemOfWindows.level):
-                    self.depthOfResultingTree = max(self.depthOfResultingTree, infoOfHeadElemOfPseudoSources.level);
+                if (levelOfHeadElemOfPseudoSources <= infoOfHeadElemOfWindows.level):
+                    self.depthOfResultingTree = max(self.depthOfResultingTree, levelOfHeadElemOfPseudoSources);
                     fFromQueueOfPseudoSources = True;
                 else:
                     self.depthOfResultingTree = max(self.depthOfResultingTree, infoOfHeadElemOfWindows.level);
@@ -126,9 +127,9 @@ class PreviousCH(ExactMethodForDGP):
     
     def ComputeChildrenOfSource(self, indexOfSourceVert=-1):
         if(indexOfSourceVert != -1):
-            self.m_InfoAtVertices[indexOfSourceVert].birthTime += 1;
-            self.m_InfoAtVertices[indexOfSourceVert].level = 0;
-            self.m_InfoAtVertices[indexOfSourceVert].disUptodate = 0.0;
+            self.m_InfoAtVertices.birthTime[indexOfSourceVert] += 1;
+            self.m_InfoAtVertices.level[indexOfSourceVert] = 0;
+            self.m_InfoAtVertices.disUptodate[indexOfSourceVert] = 0.0;
             degree = len(self.model.Neigh(indexOfSourceVert));
             
             for i in range(degree):
@@ -146,7 +147,7 @@ class PreviousCH(ExactMethodForDGP):
     def ComputeChildrenOfPseudoSourceFromPseudoSource(self, indexOfParentVertex):        
         degree = len(self.model.Neigh(indexOfParentVertex));
         neighs = self.model.Neigh(indexOfParentVertex);
-        indexOfParentOfParent = self.m_InfoAtVertices[indexOfParentVertex].indexOfParent;
+        indexOfParentOfParent = self.m_InfoAtVertices.indexOfParent[indexOfParentVertex];
         subIndex = self.model.GetSubindexToVert(indexOfParentVertex, indexOfParentOfParent);
         angleSum = 0.0;
         indexPlus = subIndex;
@@ -184,13 +185,13 @@ class PreviousCH(ExactMethodForDGP):
     def ComputeChildrenOfPseudoSourceFromWindow(self, indexOfParentVertex):
         degree = len(self.model.Neigh(indexOfParentVertex));
         neighs = self.model.Neigh(indexOfParentVertex);
-        indexOfParentOfParent = self.m_InfoAtVertices[indexOfParentVertex].indexOfParent;
+        indexOfParentOfParent = self.m_InfoAtVertices.indexOfParent[indexOfParentVertex];
         leftVert = self.model.m_Edges[indexOfParentOfParent].indexOfLeftVert;
         rightVert = self.model.m_Edges[indexOfParentOfParent].indexOfRightVert;
         subIndexLeft = self.model.GetSubindexToVert(indexOfParentVertex, leftVert);
         subIndexRight = (subIndexLeft + 1) % degree;
         
-        x1 = self.m_InfoAtVertices[indexOfParentVertex].entryProp * self.model.m_Edges[indexOfParentOfParent].edge_length;
+        x1 = self.m_InfoAtVertices.entryProp[indexOfParentVertex] * self.model.m_Edges[indexOfParentOfParent].edge_length;
         y1 = 0.0;
         x2 = self.model.m_Edges[indexOfParentOfParent].edge_length;
         y2 = 0.0;
@@ -256,17 +257,17 @@ class PreviousCH(ExactMethodForDGP):
         fWIsWinning = False;
         totalDis = w.disToRoot + disToAngle;
      
-        if (self.m_InfoAtAngles[w.indexOfCurEdge].birthTime == -1):
+        if (self.m_InfoAtAngles.birthTime[w.indexOfCurEdge] == -1):
             fLeftChildToCompute = True;
             fRightChildToCompute = True;
             fWIsWinning = True;
         else:
-            if (totalDis < (self.m_InfoAtAngles[w.indexOfCurEdge].disUptodate - Constants.LENGTH_EPSILON_CONTROL)):
+            if (totalDis < (self.m_InfoAtAngles.disUptodate[w.indexOfCurEdge] - Constants.LENGTH_EPSILON_CONTROL)):
                 fLeftChildToCompute = True;
                 fRightChildToCompute = True;
                 fWIsWinning = True;
             else:
-                fLeftChildToCompute = (entryProp < self.m_InfoAtAngles[w.indexOfCurEdge].entryProp);
+                fLeftChildToCompute = (entryProp < self.m_InfoAtAngles.entryProp[w.indexOfCurEdge]);
                 fRightChildToCompute = not fLeftChildToCompute;
                 fWIsWinning = False;
 
@@ -277,27 +278,27 @@ class PreviousCH(ExactMethodForDGP):
                 self.ComputeTheOnlyRightTrimmedChild(w);
             return;
      
-        self.m_InfoAtAngles[w.indexOfCurEdge].disUptodate = totalDis;
-        self.m_InfoAtAngles[w.indexOfCurEdge].entryProp = entryProp;
-        self.m_InfoAtAngles[w.indexOfCurEdge].birthTime += 1;
+        self.m_InfoAtAngles.disUptodate[w.indexOfCurEdge] = totalDis;
+        self.m_InfoAtAngles.entryProp[w.indexOfCurEdge] = entryProp;
+        self.m_InfoAtAngles.birthTime[w.indexOfCurEdge] += 1;
      
         self.ComputeLeftTrimmedChildWithParent(w);
         self.ComputeRightTrimmedChildWithParent(w);    
         
-        if (totalDis < (self.m_InfoAtVertices[incidentVertex].disUptodate - Constants.LENGTH_EPSILON_CONTROL)):
-            self.m_InfoAtVertices[incidentVertex].fParentIsPseudoSource = False;
-            self.m_InfoAtVertices[incidentVertex].birthTime += 1;
-            self.m_InfoAtVertices[incidentVertex].indexOfParent = w.indexOfCurEdge;
-            self.m_InfoAtVertices[incidentVertex].indexOfRootVertOfParent = w.indexOfRoot;
-            self.m_InfoAtVertices[incidentVertex].level = w.level + 1;
-            self.m_InfoAtVertices[incidentVertex].disUptodate = totalDis;
-            self.m_InfoAtVertices[incidentVertex].entryProp = entryProp;
+        if (totalDis < (self.m_InfoAtVertices.disUptodate[incidentVertex] - Constants.LENGTH_EPSILON_CONTROL)):
+            self.m_InfoAtVertices.fParentIsPseudoSource[incidentVertex] = False;
+            self.m_InfoAtVertices.birthTime[incidentVertex] += 1;
+            self.m_InfoAtVertices.indexOfParent[incidentVertex] = w.indexOfCurEdge;
+            self.m_InfoAtVertices.indexOfRootVertOfParent[incidentVertex] = w.indexOfRoot;
+            self.m_InfoAtVertices.level[incidentVertex] = w.level + 1;
+            self.m_InfoAtVertices.disUptodate[incidentVertex] = totalDis;
+            self.m_InfoAtVertices.entryProp[incidentVertex] = entryProp;
              
             if (not self.model.IsConvexVert(incidentVertex)):
-                self.AddIntoQueueOfPseudoSources(QuoteInfoAtVertex(birthTime = self.m_InfoAtVertices[incidentVertex].birthTime, indexOfVert = incidentVertex, disUptodate = totalDis));
+                self.AddIntoQueueOfPseudoSources(QuoteInfoAtVertex(birthTime = self.m_InfoAtVertices.birthTime[incidentVertex], indexOfVert = incidentVertex, disUptodate = totalDis));
      
     def ComputeChildrenOfPseudoSource(self, indexOfParentVertex):
-        if (self.m_InfoAtVertices[indexOfParentVertex].fParentIsPseudoSource):
+        if (self.m_InfoAtVertices.fParentIsPseudoSource[indexOfParentVertex]):
             self.ComputeChildrenOfPseudoSourceFromPseudoSource(indexOfParentVertex);
         else:
             self.ComputeChildrenOfPseudoSourceFromWindow(indexOfParentVertex);
@@ -319,12 +320,12 @@ class PreviousCH(ExactMethodForDGP):
         quoteW.pWindow = Window();
         quoteW.pWindow.fParentIsPseudoSource = True;
         quoteW.pWindow.fDirectParenIsPseudoSource = True;
-        quoteW.pWindow.birthTimeOfParent = self.m_InfoAtVertices[source].birthTime;
+        quoteW.pWindow.birthTimeOfParent = self.m_InfoAtVertices.birthTime[source];
         quoteW.pWindow.indexOfParent = source;
         quoteW.pWindow.indexOfRoot = source;
         quoteW.pWindow.indexOfCurEdge = edgeIndex;
-        quoteW.pWindow.level = self.m_InfoAtVertices[source].level + 1;
-        quoteW.pWindow.disToRoot = self.m_InfoAtVertices[source].disUptodate;
+        quoteW.pWindow.level = self.m_InfoAtVertices.level[source] + 1;
+        quoteW.pWindow.disToRoot = self.m_InfoAtVertices.disUptodate[source];
         quoteW.pWindow.proportions[0] = 0.0;
         quoteW.pWindow.proportions[1] = 1.0;
         quoteW.pWindow.entryPropOfParent;
@@ -335,19 +336,19 @@ class PreviousCH(ExactMethodForDGP):
     def FillVertChildOfPseudoSource(self,  source, subIndexOfVert):
         edge = self.model.m_Edges[self.model.Neigh(source)[subIndexOfVert].first];
         index = edge.indexOfRightVert;        
-        dis = (self.m_InfoAtVertices[source].disUptodate + edge.edge_length);
+        dis = (self.m_InfoAtVertices.disUptodate[source] + edge.edge_length);
         
-        if (dis >= (self.m_InfoAtVertices[index].disUptodate - Constants.LENGTH_EPSILON_CONTROL)):
+        if (dis >= (self.m_InfoAtVertices.disUptodate[index] - Constants.LENGTH_EPSILON_CONTROL)):
             return;
         
-        self.m_InfoAtVertices[index].fParentIsPseudoSource = True;
-        self.m_InfoAtVertices[index].birthTime += 1;
-        self.m_InfoAtVertices[index].indexOfParent = source;
-        self.m_InfoAtVertices[index].level = self.m_InfoAtVertices[source].level + 1;
-        self.m_InfoAtVertices[index].disUptodate = dis;
+        self.m_InfoAtVertices.fParentIsPseudoSource[index] = True;
+        self.m_InfoAtVertices.birthTime[index] += 1;
+        self.m_InfoAtVertices.indexOfParent[index] = source;
+        self.m_InfoAtVertices.level[index] = self.m_InfoAtVertices.level[source] + 1;
+        self.m_InfoAtVertices.disUptodate[index] = dis;
         
         if (not self.model.IsConvexVert(index)):
-            self.AddIntoQueueOfPseudoSources(QuoteInfoAtVertex(birthTime=self.m_InfoAtVertices[index].birthTime, indexOfVert=index, disUptodate=dis));
+            self.AddIntoQueueOfPseudoSources(QuoteInfoAtVertex(birthTime=self.m_InfoAtVertices.birthTime[index], indexOfVert=index, disUptodate=dis));
       
       
     def ComputeTheOnlyLeftChild(self, w):
@@ -510,11 +511,11 @@ class PreviousCH(ExactMethodForDGP):
             return;
         
         quoteW.pWindow.level = w.level + 1;    
-        quoteW.pWindow.birthTimeOfParent = self.m_InfoAtAngles[w.indexOfCurEdge].birthTime;
+        quoteW.pWindow.birthTimeOfParent = self.m_InfoAtAngles.birthTime[w.indexOfCurEdge];
         quoteW.pWindow.indexOfParent = w.indexOfCurEdge;
         quoteW.pWindow.indexOfRoot = w.indexOfRoot;
         quoteW.pWindow.fIsOnLeftSubtree = True;
-        quoteW.pWindow.entryPropOfParent = self.m_InfoAtAngles[w.indexOfCurEdge].entryProp;
+        quoteW.pWindow.entryPropOfParent = self.m_InfoAtAngles.entryProp[w.indexOfCurEdge];
         self.AddIntoQueueOfWindows(quoteW);
      
     def ComputeRightTrimmedChildWithParent(self, w):
@@ -542,10 +543,10 @@ class PreviousCH(ExactMethodForDGP):
             return;
         
         quoteW.pWindow.fIsOnLeftSubtree = False;
-        quoteW.pWindow.birthTimeOfParent = self.m_InfoAtAngles[w.indexOfCurEdge].birthTime;
+        quoteW.pWindow.birthTimeOfParent = self.m_InfoAtAngles.birthTime[w.indexOfCurEdge];
         quoteW.pWindow.indexOfParent = w.indexOfCurEdge;
         quoteW.pWindow.indexOfRoot = w.indexOfRoot;
         quoteW.pWindow.level = w.level + 1;    
-        quoteW.pWindow.entryPropOfParent = self.m_InfoAtAngles[w.indexOfCurEdge].entryProp;
+        quoteW.pWindow.entryPropOfParent = self.m_InfoAtAngles.entryProp[w.indexOfCurEdge];
         self.AddIntoQueueOfWindows(quoteW);
      
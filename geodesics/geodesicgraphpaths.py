@@ -1,22 +1,48 @@
 import sys, time, math;
+from collections import OrderedDict;
 from mathutils import Vector;
 
 import bpy;
-from GenericMarkerCreator28.utils.mathandmatrices import getBMMesh, ensurelookuptable
+from GenericMarkerCreator28.utils.mathandmatrices import getBMMesh, ensurelookuptable, getMeshVPos, getMeshTriangles, getEdgeVertices, getMeshFingerprint
 __fastAlgorithm = False;
 try:
 	import py_chenhancc;
 	from py_chenhancc import CRichModel as RichModel, CICHWithFurtherPriorityQueue, CPoint3D, CFace;
 	__fastAlgorithm = True;
 except ImportError:
-	from GenericMarkerCreator28.utils.geodesics.CICHWithFurtherPriorityQueue import CICHWithFurtherPriorityQueue
+	pass;
+import GenericMarkerCreator28.geodesics.Constants as Constants;
+from GenericMarkerCreator28.geodesics.GeodesicComponents import getTreeArrays, GeodesicTree;
 
 import numpy as np;
+import scipy.sparse as spsp;
 from mathutils import Vector, Color;
+from scipy.sparse.csgraph import dijkstra;
+from GenericMarkerCreator28.geodesics.HeatMethod import HeatMethod;
+from GenericMarkerCreator28.geodesics.FastMarching import FastMarching;
+
+#Prefactored heat method solvers by object name, with the geometry fingerprint
+#they were built for
+HEAT_METHODS = {};
+#Preprocessed py_chenhancc models by object name, with the geometry fingerprint
+#they were built for
+RICH_MODELS = {};
+#Edge array models (MeshData.EdgeModel) the geodesic trees are traced with
+#when RICH_MODELS holds py_chenhancc ones, same layout
+TRACING_MODELS = {};
 
 def isFastAlgorithmLoaded():
 	return __fastAlgorithm;
 
+#Purpose: The Chen-Han propagation class, py_chenhancc if it is installed.
+#The pure python fallback is imported on first use so that a failure there
+#only affects ChenhanGeodesics and not the other GEODESIC_ALGORITHMS
+def getChenhanAlgorithm():
+    if(isFastAlgorithmLoaded()):
+        return CICHWithFurtherPriorityQueue;
+    from GenericMarkerCreator28.geodesics.CICHWithFurtherPriorityQueue import CICHWithFurtherPriorityQueue as PythonCICH;
+    return PythonCICH;
+
 
 class GraphPaths:
     # Reference to the blender object;
@@ -27,6 +53,8 @@ class GraphPaths:
     m_context = None;
     # indices of seed paths;
     m_seed_indices = None;
+    # fraction of the mesh visited by the last bounded_path_between;
+    m_visited_fraction = 1.0;
     
     def __init__(self, context, mesh, bm_mesh):
         self.m_mesh = mesh;
@@ -54,44 +82,647 @@ class GraphPaths:
     def path_between_raw(self, seed_index, target_index):        
         return [];
     
+    #Path from the target to the seed with a propagation that stops as soon as
+    #the target is settled or radius is exceeded (None if the target is farther
+    #than radius). Backends that cannot stop early propagate over the whole mesh
+    def bounded_path_between(self, seed_index, target_index, local_path=True, radius=None):
+        self.addSeedIndex(seed_index);
+        self.m_visited_fraction = 1.0;
+        return self.path_between(seed_index, target_index, local_path=local_path);
+    
+    #Purpose: To split a path query of geodesics/pathjobs.py into a task run on
+    #a worker thread and finishPathTask, run on the main thread with the result.
+    #This part and finishPathTask read bpy data and the caches of the backend,
+    #the task only numpy arrays and solvers. Here the path is computed right
+    #away, the backends below leave their propagations to the task
+    #Returns: function without arguments, its result is for finishPathTask
+    def getPathTask(self, seed_index, target_index, bounded=False, radius=None):
+        if(bounded):
+            path = self.bounded_path_between(seed_index, target_index, local_path=True, radius=radius);
+        else:
+            self.addSeedIndex(seed_index);
+            path = self.path_between(seed_index, target_index, local_path=True);
+        points = None if path is None else np.array([tuple(co) for co in path], dtype=np.float64).reshape(-1, 3);
+        return lambda: points;
+    
+    #Purpose: To store what a task of getPathTask computed in the caches
+    #Returns: points of the path in local space (P x 3 float64) from the target
+    #to the seed or None
+    def finishPathTask(self, seed_index, target_index, radius, result):
+        return result;
+    
+    #Purpose: The paths from one seed to many targets in one flat array
+    #Inputs: seed_index, target_indices, local_path (False for world space)
+    #Returns: points (P x 3 float64) and offsets (len(target_indices) + 1), the
+    #path to the k-th target is points[offsets[k]:offsets[k+1]] (from the
+    #target to the seed, empty if it is unreachable)
+    def paths_between(self, seed_index, target_indices, local_path=True):
+        self.addSeedIndex(seed_index);
+        paths = [self.path_between(seed_index, target_index, local_path=True) or [] for target_index in target_indices];
+        offsets = np.concatenate(([0], np.cumsum([len(path) for path in paths]))).astype(np.int64);
+        points = np.array([co[:] for path in paths for co in path], dtype=np.float64).reshape(-1, 3);
+        return getPathPoints(self.m_mesh, points, local_path), offsets;
+    
+    def getVisitedFraction(self):
+        return self.m_visited_fraction;
+    
     def getSeedIndices(self):
         return self.m_seed_indices;
     
     def getVertexDistances(self, seed_index):
     	return [];
+    
+    #Distance of every vertex to the closest of the seed_indices
+    def getMultiSourceDistances(self, seed_indices):
+        distances = None;
+        for seed_index in seed_indices:
+            self.addSeedIndex(seed_index);
+            seed_distances = np.asarray(self.getVertexDistances(seed_index), dtype=np.float64);
+            distances = seed_distances if distances is None else np.minimum(distances, seed_distances);
+        return distances;
+    
+    #Purpose: Geodesic voronoi regions of the seed_indices
+    #Returns: distances (N) to the closest seed and labels (N int32), the
+    #position in seed_indices of that seed, -1 for unreached vertices.
+    #Backends that cannot propagate from many sources run one seed at a time
+    def getMultiSourceLabels(self, seed_indices):
+        distances, labels = None, None;
+        for label, seed_index in enumerate(seed_indices):
+            self.addSeedIndex(seed_index);
+            seed_distances = np.asarray(self.getVertexDistances(seed_index), dtype=np.float64);
+            if(distances is None):
+                distances = seed_distances.copy();
+                labels = np.where(np.isfinite(distances), label, -1).astype(np.int32);
+                continue;
+            closer = seed_distances < distances;
+            distances[closer] = seed_distances[closer];
+            labels[closer] = label;
+        return distances, labels;
+
+#Purpose: Vertex neighbourhoods of a mesh as a csr matrix, the neighbours of
+#vertex i are indices[indptr[i]:indptr[i+1]]
+def getVertexNeighbourhoods(mesh):
+    edges = getEdgeVertices(mesh);
+    N = getMeshVPos(mesh).shape[0];
+    rows = np.concatenate((edges[:,0], edges[:,1]));
+    cols = np.concatenate((edges[:,1], edges[:,0]));
+    return spsp.csr_matrix((np.ones(rows.shape[0]), (rows, cols)), shape=(N, N));
+
+#Purpose: To trace a vertex path down a distance field, from start to the
+#vertex the field is zero at (the source), moving to the neighbour with the
+#smallest distance at every step
+#Returns: list of vertex indices, empty if the descent gets stuck
+def descendDistanceField(distances, neighbourhoods, start):
+    path = [start];
+    current = start;
+    indptr, indices = neighbourhoods.indptr, neighbourhoods.indices;
+    while(distances[current] > 0.0):
+        neighbours = indices[indptr[current]:indptr[current+1]];
+        if(not neighbours.shape[0]):
+            return [];
+        following = int(neighbours[np.argmin(distances[neighbours])]);
+        if(distances[following] >= distances[current]):
+            return [];
+        path.append(following);
+        current = following;
+    return path;
+
+#Purpose: Local path points as they are, or moved to world space with one
+#matrix multiply instead of one per point
+def getPathPoints(mesh, points, local_path=True):
+    if(local_path):
+        return points;
+    M = np.array(mesh.matrix_world, dtype=np.float64);
+    return points @ M[:3,:3].T + M[:3,3];
+
+#Purpose: Local positions of the edge points of a traced path (P x 3), None
+#if there is no path
+def getEdgePointsArray(model, pathp3d):
+    if(pathp3d is None):
+        return None;
+    return np.array([eitem.Get3DPoint(model) for eitem in pathp3d], dtype=np.float64).reshape(-1, 3);
+
+#Purpose: Positions of edge points given as (first vertex, second vertex,
+#proportion), a vertex being (v, v, 0), see ExactMethodForDGP.TracePaths
+def getEdgePointPositions(vpos, first_verts, second_verts, proportions):
+    proportions = proportions[:,np.newaxis];
+    return vpos[first_verts] * (1.0 - proportions) + vpos[second_verts] * proportions;
+
+#Purpose: The neighbour every vertex descends to in a distance field, the one
+#with the smallest distance if it is smaller than that of the vertex
+#Returns: N indices, a vertex without a closer neighbour points to itself
+def getDescentPointers(distances, neighbourhoods):
+    N = distances.shape[0];
+    indptr, indices = neighbourhoods.indptr, neighbourhoods.indices;
+    rows = np.repeat(np.arange(N), np.diff(indptr));
+    order = np.lexsort((distances[indices], rows));
+    pointers = np.arange(N);
+    #The first neighbour of a row after sorting is the closest one
+    firsts = order[indptr[:-1][np.diff(indptr) > 0]];
+    owners = rows[firsts];
+    closest = indices[firsts];
+    descend = distances[closest] < distances[owners];
+    pointers[owners[descend]] = closest[descend];
+    return pointers;
+
+#Purpose: To label every vertex with the source its chain of pointers (parents
+#or descent pointers) ends at, by pointer jumping
+#Inputs: pointers (N, a root points to itself or is negative), seed_indices
+#Returns: labels (N int32), the position in seed_indices of the source, -1 if
+#the chain ends at a vertex that is not a source
+def getSourceLabels(pointers, seed_indices):
+    N = pointers.shape[0];
+    roots = np.asarray(pointers, dtype=np.int64).copy();
+    roots[roots < 0] = np.arange(N)[roots < 0];
+    while(True):
+        jumped = roots[roots];
+        if(np.array_equal(jumped, roots)):
+            break;
+        roots = jumped;
+    seed_labels = np.full(N, -1, dtype=np.int32);
+    seed_labels[np.asarray(seed_indices, dtype=np.int64)] = np.arange(len(seed_indices), dtype=np.int32);
+    return seed_labels[roots];
+
+#Purpose: To build and preprocess a RichModel from arrays, the py_chenhancc
+#one if it is installed and the python one (geodesics/MeshData.py) otherwise.
+#Both create their edges in the same order
+#Inputs: vpos (N x 3 float), faces (F x 3 int)
+def loadRichModel(vpos, faces):
+    start = time.time();
+    if(isFastAlgorithmLoaded()):
+        verts = [CPoint3D(x, y, z) for x, y, z in np.asarray(vpos, dtype=np.float64).tolist()];
+        triangles = [CFace(a, b, c) for a, b, c in np.asarray(faces, dtype=np.int64).tolist()];
+        richmodel = RichModel();
+        richmodel.LoadModel(verts, triangles);
+    else:
+        from GenericMarkerCreator28.geodesics.MeshData import RichModel as PythonRichModel;
+        richmodel = PythonRichModel();
+        richmodel.LoadModel(vpos, faces);
+    richmodel.Preprocess();
+    print('RICHMODEL LOADED AND PREPROCESSED IN %.3f SECONDS'%(time.time() - start));
+    return richmodel;
+
+#Purpose: The preprocessed RichModel of a mesh, built once per geometry from
+#the cached position and triangle arrays and shared by every ChenhanGeodesics
+#(GeodesicPaths, GeodesicCutterWithLandmarks) of that mesh
+def getRichModel(mesh):
+    fingerprint = getMeshFingerprint(mesh);
+    try:
+        model_fingerprint, richmodel = RICH_MODELS[mesh.name];
+        if(model_fingerprint == fingerprint):
+            return richmodel;
+    except KeyError:
+        pass;
+    richmodel = loadRichModel(getMeshVPos(mesh), getMeshTriangles(mesh));
+    RICH_MODELS[mesh.name] = (fingerprint, richmodel);
+    return richmodel;
+
+#Purpose: The model geodesic trees of a mesh are traced with (see
+#GeodesicComponents.GeodesicTree). It is the model of getRichModel unless that
+#is a py_chenhancc model, which does not expose its edges. Then it is a
+#MeshData.EdgeModel, the edge arrays only without the Edge objects and
+#neighbourhoods of a python RichModel
+def getTracingModel(mesh):
+    if(not isFastAlgorithmLoaded()):
+        return getRichModel(mesh);
+    fingerprint = getMeshFingerprint(mesh);
+    try:
+        model_fingerprint, edgemodel = TRACING_MODELS[mesh.name];
+        if(model_fingerprint == fingerprint):
+            return edgemodel;
+    except KeyError:
+        pass;
+    from GenericMarkerCreator28.geodesics.MeshData import EdgeModel;
+    start = time.time();
+    edgemodel = EdgeModel();
+    edgemodel.LoadModel(getMeshVPos(mesh), getMeshTriangles(mesh));
+    edgemodel.Preprocess();
+    print('EDGEMODEL LOADED AND PREPROCESSED IN %.3f SECONDS'%(time.time() - start));
+    TRACING_MODELS[mesh.name] = (fingerprint, edgemodel);
+    return edgemodel;
+
+#Purpose: The heat method solver of a mesh, prefactored once per geometry
+def getHeatMethod(mesh):
+    fingerprint = getMeshFingerprint(mesh);
+    try:
+        heat_fingerprint, heat_method = HEAT_METHODS[mesh.name];
+        if(heat_fingerprint == fingerprint):
+            return heat_method;
+    except KeyError:
+        pass;
+    heat_method = HeatMethod(getMeshVPos(mesh), getMeshTriangles(mesh));
+    HEAT_METHODS[mesh.name] = (fingerprint, heat_method);
+    return heat_method;
+
+#Purpose: To trace the vertex path from start back to its source through an
+#array of parents (parent of a source or unreached vertex is negative)
+#Returns: list of vertex indices, empty if start was not reached
+def followParents(parents, start):
+    path = [start];
+    current = start;
+    while(parents[current] >= 0):
+        current = int(parents[current]);
+        path.append(current);
+        if(len(path) > parents.shape[0]):
+            return [];
+    return path;
+
+#Purpose: Edge graph of a mesh as a csr matrix weighted by the edge lengths
+def getEdgeGraph(mesh):
+    vpos = getMeshVPos(mesh);
+    edges = getEdgeVertices(mesh);
+    return getWeightedGraph(vpos, edges);
+
+#Purpose: Edge graph with the face diagonals added. The loop triangles provide
+#the mesh edges and one diagonal of every quad (or n-gon fan), and the
+#vertices opposite to every edge shared by two triangles give the other
+#diagonal of a quad and the "flip" diagonal of two adjacent triangles
+def getEdgeDiagonalGraph(mesh):
+    vpos = getMeshVPos(mesh);
+    triangles = getMeshTriangles(mesh);
+    triangle_edges = np.vstack((triangles[:,[0, 1]], triangles[:,[1, 2]], triangles[:,[2, 0]]));
+    opposite = np.concatenate((triangles[:,2], triangles[:,0], triangles[:,1]));
+    
+    keys = np.sort(triangle_edges, axis=1);
+    __, inverse, counts = np.unique(keys, axis=0, return_inverse=True, return_counts=True);
+    inverse = inverse.ravel();
+    shared = counts[inverse] == 2;
+    order = np.argsort(inverse[shared], kind='stable');
+    opposite_pairs = opposite[shared][order].reshape(-1, 2);
+    
+    edges = np.vstack((getEdgeVertices(mesh), triangle_edges, opposite_pairs));
+    return getWeightedGraph(vpos, edges);
+
+#Symmetric csr graph of the given vertex pairs weighted by their distances.
+#Repeated pairs are merged (csr sums duplicates, so they are removed first)
+def getWeightedGraph(vpos, edges):
+    N = vpos.shape[0];
+    edges = np.unique(np.sort(edges, axis=1), axis=0);
+    edges = edges[edges[:,0] != edges[:,1]];
+    lengths = np.sqrt(np.sum((vpos[edges[:,0]] - vpos[edges[:,1]])**2, axis=1));
+    rows = np.concatenate((edges[:,0], edges[:,1]));
+    cols = np.concatenate((edges[:,1], edges[:,0]));
+    return spsp.csr_matrix((np.concatenate((lengths, lengths)), (rows, cols)), shape=(N, N));
+
+#Base of the backends that compute a whole distance field per seed as numpy
+#arrays (heat method, dijkstra, fast marching). Subclasses implement
+#computeField, returning the distances and optionally the parent of every
+#vertex on its shortest path. Paths follow the parents when there are any and
+#descend the distance field along mesh edges otherwise
+class DistanceFieldGeodesics(GraphPaths):
+    
+    m_all_distances = None;
+    m_all_parents = None;
+    m_neighbourhoods = None;
+    #Vertex positions the fields are computed for
+    m_vpos = None;
+    #Vertex paths of the bounded queries by (seed, target, radius)
+    m_bounded_paths = None;
+    
+    def __init__(self, context, mesh, bm_mesh, richmodel=None):
+        super().__init__(context, mesh, bm_mesh);
+        self.m_all_distances = [];
+        self.m_all_parents = [];
+        self.m_bounded_paths = {};
+        self.m_neighbourhoods = getVertexNeighbourhoods(mesh);
+        self.m_vpos = getMeshVPos(mesh);
+    
+    #Returns: (distances, parents or None) for the given sources
+    def computeField(self, seed_indices):
+        raise NotImplementedError;
+    
+    #Returns: (distances, parents or None, visited fraction) of a propagation
+    #that may stop once target_index is settled or radius is exceeded. The
+    #distances of the vertices it did not settle are np.inf
+    def computeBoundedField(self, seed_indices, target_index=-1, radius=np.inf):
+        distances, parents = self.computeField(seed_indices);
+        return distances, parents, 1.0;
+    
+    def getSeedDistances(self, indice):
+        if(self.m_all_distances[indice] is None):
+            distances, parents = self.computeField([self.m_seed_indices[indice]]);
+            self.m_all_distances[indice] = distances;
+            self.m_all_parents[indice] = parents;
+        return self.m_all_distances[indice];
+    
+    def addSeedIndex(self, seed_index, passive=False, log=False):
+        if(seed_index in self.m_seed_indices):
+            return;
+        super().addSeedIndex(seed_index);
+        self.m_all_distances.append(None);
+        self.m_all_parents.append(None);
+        if(not passive):
+            start = time.time();
+            self.getSeedDistances(len(self.m_seed_indices)-1);
+            if(log):
+                print('TOTAL TIME FOR SEEDING ::: ', (time.time() - start), " seconds");
+    
+    def removeSeedIndex(self, seed_index):
+        removed_index = super().removeSeedIndex(seed_index);
+        if(removed_index != -1):
+            del self.m_all_distances[removed_index];
+            del self.m_all_parents[removed_index];
+            self.m_bounded_paths = {key:path for key, path in self.m_bounded_paths.items() if key[0] != seed_index};
+        return removed_index;
+    
+    def getVertexDistances(self, seed_index):
+        try:
+            return self.getSeedDistances(self.m_seed_indices.index(seed_index));
+        except ValueError:
+            print("THE intended seed_index does not exist, so returning NONE");
+            return None;
+    
+    #All the sources are solved together in one propagation
+    def getMultiSourceDistances(self, seed_indices):
+        distances, __ = self.computeField(list(seed_indices));
+        return distances;
+    
+    #One propagation from all the sources, the label of a vertex is found by
+    #following its parents (or the descent of the field) back to a source
+    def getMultiSourceLabels(self, seed_indices):
+        distances, parents = self.computeField(list(seed_indices));
+        distances = np.asarray(distances, dtype=np.float64);
+        if(parents is None):
+            parents = getDescentPointers(distances, self.m_neighbourhoods);
+        labels = getSourceLabels(parents, seed_indices);
+        labels[~np.isfinite(distances)] = -1;
+        return distances, labels;
+    
+    #Vertex path from target_index to the source of a field, through the
+    #parents when there are any and down the distances otherwise
+    def getFieldPath(self, distances, parents, target_index):
+        if(parents is not None):
+            return followParents(parents, target_index);
+        return descendDistanceField(distances, self.m_neighbourhoods, target_index);
+    
+    #Returns: (vertex path or None, visited fraction) of a propagation that
+    #stops once target_index is settled or radius is exceeded
+    def computeBoundedPath(self, seed_index, target_index, radius):
+        distances, parents, visited_fraction = self.computeBoundedField([seed_index], target_index, radius);
+        if(not np.isfinite(distances[target_index]) or distances[target_index] > radius):
+            return None, visited_fraction;
+        return self.getFieldPath(distances, parents, target_index), visited_fraction;
+    
+    def path_between_raw(self, seed_index, target_index):
+        distances = self.getVertexDistances(seed_index);
+        if(distances is None):
+            return None;
+        parents = self.m_all_parents[self.m_seed_indices.index(seed_index)];
+        return self.getFieldPath(distances, parents, target_index);
+    
+    #Always returns the path in reverse i.e from the target to the seed
+    def path_between(self, seed_index, target_index, local_path=True):
+        return self.vertexPathToPoints(self.path_between_raw(seed_index, target_index), local_path);
+    
+    def bounded_path_between(self, seed_index, target_index, local_path=True, radius=None):
+        self.addSeedIndex(seed_index, passive=True);
+        indice = self.m_seed_indices.index(seed_index);
+        radius = np.inf if radius is None else radius;
+        key = (seed_index, target_index, radius);
+        
+        #A field computed for the whole mesh already has every path
+        if(self.m_all_distances[indice] is not None):
+            self.m_visited_fraction = 1.0;
+            if(self.m_all_distances[indice][target_index] > radius):
+                return None;
+            return self.path_between(seed_index, target_index, local_path);
+        
+        if(key not in self.m_bounded_paths):
+            start = time.time();
+            self.m_bounded_paths[key], self.m_visited_fraction = self.computeBoundedPath(seed_index, target_index, radius);
+            print('BOUNDED PATH IN %.3f SECONDS, VISITED %.1f%% OF THE MESH'%(time.time() - start, self.m_visited_fraction * 100.0));
+        return self.vertexPathToPoints(self.m_bounded_paths[key], local_path);
+    
+    #The task computes the field of the seed, or its bounded path, unless it is
+    #cached already. Its result is (distances, parents, vertex path, visited
+    #fraction, bounded), distances is None if no field was computed and bounded
+    #tells if the path comes from a bounded propagation
+    def getPathTask(self, seed_index, target_index, bounded=False, radius=None):
+        self.addSeedIndex(seed_index, passive=True);
+        indice = self.m_seed_indices.index(seed_index);
+        radius = np.inf if radius is None else radius;
+        distances, parents = self.m_all_distances[indice], self.m_all_parents[indice];
+        key = (seed_index, target_index, radius);
+        if(distances is not None):
+            vertex_path = None if bounded and distances[target_index] > radius else self.getFieldPath(distances, parents, target_index);
+            return lambda: (None, None, vertex_path, 1.0, False);
+        if(bounded and key in self.m_bounded_paths):
+            vertex_path, visited_fraction = self.m_bounded_paths[key], self.m_visited_fraction;
+            return lambda: (None, None, vertex_path, visited_fraction, False);
+        def task():
+            if(bounded):
+                vertex_path, visited_fraction = self.computeBoundedPath(seed_index, target_index, radius);
+                return None, None, vertex_path, visited_fraction, True;
+            distances, parents = self.computeField([seed_index]);
+            return distances, parents, self.getFieldPath(distances, parents, target_index), 1.0, False;
+        return task;
+    
+    #The seed may have been removed while the task ran, then nothing is cached
+    def finishPathTask(self, seed_index, target_index, radius, result):
+        distances, parents, vertex_path, self.m_visited_fraction, bounded = result;
+        if(seed_index in self.m_seed_indices):
+            indice = self.m_seed_indices.index(seed_index);
+            if(distances is not None and self.m_all_distances[indice] is None):
+                self.m_all_distances[indice], self.m_all_parents[indice] = distances, parents;
+            if(bounded):
+                self.m_bounded_paths[(seed_index, target_index, np.inf if radius is None else radius)] = vertex_path;
+        if(vertex_path is None):
+            return None;
+        return self.m_vpos[np.asarray(vertex_path, dtype=np.int64)];
+    
+    #The vertex paths of all the targets are gathered into one index array, so
+    #the positions are looked up (and transformed) once
+    def paths_between(self, seed_index, target_indices, local_path=True):
+        self.addSeedIndex(seed_index);
+        vertex_paths = [self.path_between_raw(seed_index, target_index) or [] for target_index in target_indices];
+        offsets = np.concatenate(([0], np.cumsum([len(path) for path in vertex_paths]))).astype(np.int64);
+        indices = np.fromiter((vid for path in vertex_paths for vid in path), dtype=np.int64, count=offsets[-1]);
+        return getPathPoints(self.m_mesh, getMeshVPos(self.m_mesh)[indices], local_path), offsets;
+    
+    def vertexPathToPoints(self, vertex_path, local_path=True):
+        if(vertex_path is None):
+            return None;
+        points = getPathPoints(self.m_mesh, getMeshVPos(self.m_mesh)[np.asarray(vertex_path, dtype=np.int64)], local_path);
+        return [Vector(co) for co in points.reshape(-1, 3).tolist()];
+
+#Geodesic distances with the heat method (see geodesics/HeatMethod.py). They
+#are approximate, but each seed costs two back-substitutions instead of a
+#full window propagation
+class HeatGeodesics(DistanceFieldGeodesics):
+    
+    m_heat = None;
+    
+    def __init__(self, context, mesh, bm_mesh, richmodel=None):
+        super().__init__(context, mesh, bm_mesh, richmodel);
+        self.m_heat = getHeatMethod(mesh);
+    
+    def computeField(self, seed_indices):
+        return self.m_heat.distances(seed_indices), None;
+
+#Shortest paths along the mesh edges (scipy.sparse.csgraph). Distances are
+#longer than the geodesic ones by the zigzag of the edges
+class DijkstraTriGeodesics(DistanceFieldGeodesics):
+    
+    m_graph = None;
+    
+    def __init__(self, context, mesh, bm_mesh, richmodel=None):
+        super().__init__(context, mesh, bm_mesh, richmodel);
+        self.m_graph = self.buildGraph(mesh);
+    
+    def buildGraph(self, mesh):
+        return getEdgeGraph(mesh);
+    
+    def computeField(self, seed_indices):
+        distances, parents, __ = dijkstra(self.m_graph, directed=False, indices=seed_indices, return_predecessors=True, min_only=True);
+        return distances, parents;
+    
+    #csgraph cannot stop at a target, so the search is limited to a distance
+    #instead. It starts at twice the straight line distance (a lower bound of
+    #the graph distance) and doubles until the target is reached or the search
+    #ran out of vertices (target in another component)
+    def computeBoundedField(self, seed_indices, target_index=-1, radius=np.inf):
+        N = self.m_graph.shape[0];
+        longest_edge = self.m_graph.data.max() if self.m_graph.nnz else 0.0;
+        limit = radius;
+        if(target_index != -1):
+            vpos = self.m_vpos;
+            straight = np.sqrt(np.sum((vpos[seed_indices] - vpos[target_index])**2, axis=1)).min();
+            limit = min(max(2.0 * straight, 1e-12), radius);
+        while(True):
+            distances, parents, __ = dijkstra(self.m_graph, directed=False, indices=seed_indices, return_predecessors=True, min_only=True, limit=limit);
+            if(target_index == -1 or np.isfinite(distances[target_index]) or limit >= radius):
+                break;
+            if(np.max(distances[np.isfinite(distances)]) + longest_edge < limit):
+                break;
+            limit = min(2.0 * limit, radius);
+        return distances, parents, np.count_nonzero(np.isfinite(distances)) / max(N, 1);
+
+#Shortest paths along the mesh edges and face diagonals, closer to the
+#geodesic distances than DijkstraTriGeodesics on quad and regular meshes
+class DijkstraQuadGeodesics(DijkstraTriGeodesics):
+    
+    def buildGraph(self, mesh):
+        return getEdgeDiagonalGraph(mesh);
+
+#Fast marching on the triangles of the mesh (see geodesics/FastMarching.py)
+class FastMarchingGeodesics(DistanceFieldGeodesics):
+    
+    m_fmm = None;
+    
+    def __init__(self, context, mesh, bm_mesh, richmodel=None):
+        super().__init__(context, mesh, bm_mesh, richmodel);
+        self.m_fmm = FastMarching(getMeshVPos(mesh), getMeshTriangles(mesh));
+    
+    def computeField(self, seed_indices):
+        return self.m_fmm.distances(seed_indices), None;
+    
+    def computeBoundedField(self, seed_indices, target_index=-1, radius=np.inf):
+        distances = self.m_fmm.distances(seed_indices, target_index, radius);
+        return distances, None, self.m_fmm.visited_fraction;
+
+#Default limits of the per seed geodesic trees kept by ChenhanGeodesics
+CHENHAN_CACHE_ENTRIES = 64;
+CHENHAN_CACHE_BYTES = 256 * 1024 * 1024;
+
+#Purpose: To turn the InfoAtVertex records of a Chen-Han propagation into
+#compact arrays (see GeodesicComponents.getTreeArrays)
+#Returns: read only distances (N float32), parents (N int32, the vertex or
+#pseudo source the geodesic to a vertex comes through, -1 for the seed and
+#unreached vertices), parentEdges (N int32) and entryProps (N float32)
+def getInfoAtVertexArrays(infos):
+    arrays = getTreeArrays(infos);
+    for values in arrays:
+        values.setflags(write=False);
+    return arrays;
+
+#Least recently used store of per seed arrays, bounded by a number of entries
+#and by the bytes of the arrays. Entries are tuples of numpy arrays
+class SeedFieldCache():
+    m_entries = None;
+    m_max_entries = CHENHAN_CACHE_ENTRIES;
+    m_max_bytes = CHENHAN_CACHE_BYTES;
+    m_bytes = 0;
+    m_stats = None;
+    
+    def __init__(self, max_entries=None, max_bytes=None):
+        self.m_entries = OrderedDict();
+        self.m_bytes = 0;
+        self.m_stats = {'hits':0, 'misses':0, 'evictions':0};
+        self.setLimits(max_entries, max_bytes);
+    
+    def setLimits(self, max_entries=None, max_bytes=None):
+        if(max_entries is not None):
+            self.m_max_entries = max(1, int(max_entries));
+        if(max_bytes is not None):
+            self.m_max_bytes = int(max_bytes);
+        self.evict();
+    
+    def __contains__(self, key):
+        return key in self.m_entries;
+    
+    def __len__(self):
+        return len(self.m_entries);
+    
+    def get(self, key):
+        try:
+            entry = self.m_entries[key];
+        except KeyError:
+            self.m_stats['misses'] += 1;
+            return None;
+        self.m_entries.move_to_end(key);
+        self.m_stats['hits'] += 1;
+        return entry;
+    
+    def put(self, key, entry):
+        self.remove(key);
+        self.m_entries[key] = entry;
+        self.m_bytes += sum(array.nbytes for array in entry);
+        self.evict();
+    
+    def remove(self, key):
+        entry = self.m_entries.pop(key, None);
+        if(entry is not None):
+            self.m_bytes -= sum(array.nbytes for array in entry);
+    
+    #The most recent entry is always kept, even if it alone exceeds the bytes
+    def evict(self):
+        while(len(self.m_entries) > 1 and (len(self.m_entries) > self.m_max_entries or self.m_bytes > self.m_max_bytes)):
+            key, entry = self.m_entries.popitem(last=False);
+            self.m_bytes -= sum(array.nbytes for array in entry);
+            self.m_stats['evictions'] += 1;
+    
+    def clear(self):
+        self.m_entries.clear();
+        self.m_bytes = 0;
+    
+    def getStats(self):
+        stats = dict(self.m_stats);
+        stats['entries'] = len(self.m_entries);
+        stats['bytes'] = self.m_bytes;
+        return stats;
 
 	
+#Exact geodesics (Chen-Han window propagation). Every seed keeps only its
+#geodesic tree as compact arrays (distances, parents, entry edges and entry
+#proportions) in a LRU cache bounded by entries and bytes. Paths are traced from
+#the trees, so the propagations and their windows are never kept, and evicted
+#seeds are propagated again when they are queried
 class ChenhanGeodesics(GraphPaths):
     
-    m_all_geos = None;
+    m_fields = None;
     m_richmodel = None;
-    algo = None;
+    #Python RichModel the trees are traced with (see getTracingModel)
+    m_tracemodel = None;
+    #Edge point paths of the bounded queries by (seed, target, radius)
+    m_bounded_paths = None;
     
-    def __init__(self, context, mesh, bm_mesh, richmodel):
+    def __init__(self, context, mesh, bm_mesh, richmodel=None, max_entries=None, max_bytes=None):
         super().__init__(context, mesh, bm_mesh);
-        self.m_all_geos = [];
+        self.m_fields = SeedFieldCache(max_entries, max_bytes);
+        self.m_bounded_paths = {};
         print('DO YOU HAVE THE FAST VERSION ? ', isFastAlgorithmLoaded());
         
-        if(isFastAlgorithmLoaded()):
-        	print('CREATE RICHMODEL USING C');
-        	verts = [];
-        	faces = [];
-        	loops = mesh.data.loops;
-        	self.m_richmodel = RichModel();
-        	print('CREATE RICHMODEL USING C FOR VERTICES');
-        	for v in mesh.data.vertices:
-        		p3d = CPoint3D(v.co.x, v.co.y, v.co.z);
-        		verts.append(p3d);
-        	print('CREATE RICHMODEL USING C FOR POLYGONS');
-        	for f in mesh.data.polygons:
-        		f_vids = [loops[lid].vertex_index for lid in f.loop_indices];
-        		faces.append(CFace(f_vids[0], f_vids[1], f_vids[2]));
-        	print('RICHMODEL LOAD THE MODEL');
-        	self.m_richmodel.LoadModel(verts, faces);
-        	print('RICHMODEL PREPROCESS');
-        	self.m_richmodel.Preprocess();
-        else:
-        	self.m_richmodel = richmodel;
+        self.m_richmodel = getRichModel(mesh) if richmodel is None else richmodel;
         
         print('ENSURE LOOKUP TABLE');
         ensurelookuptable(bm_mesh);
@@ -99,105 +730,211 @@ class ChenhanGeodesics(GraphPaths):
     def getRichModel(self):
     	return self.m_richmodel;
     
+    def getTracingModel(self):
+        if(self.m_tracemodel is None):
+            if(isFastAlgorithmLoaded()):
+                self.m_tracemodel = getTracingModel(self.m_mesh);
+            else:
+                self.m_tracemodel = self.m_richmodel;
+        return self.m_tracemodel;
+    
+    def setCacheLimits(self, max_entries=None, max_bytes=None):
+        self.m_fields.setLimits(max_entries, max_bytes);
+    
+    #One window propagation from a seed as its geodesic tree, not cached
+    def computeSeedField(self, seed_index, log=False):
+        start = time.time();
+        if(isFastAlgorithmLoaded()):
+            alg = CICHWithFurtherPriorityQueue(self.m_richmodel, set([seed_index]));
+        else:
+            alg = getChenhanAlgorithm()(inputModel=self.m_richmodel, indexOfSourceVerts=[seed_index]);
+        alg.Execute();
+        if(log):
+            print('TOTAL TIME FOR SEEDING ::: ', (time.time() - start), " seconds");
+        return getInfoAtVertexArrays(alg.GetVertexDistances());
+    
+    #One window propagation from a seed. Only its geodesic tree is kept
+    def propagate(self, seed_index, log=False):
+        field = self.computeSeedField(seed_index, log);
+        self.m_fields.put(seed_index, field);
+        return field;
+    
+    #Compact field (distances, parents, parentEdges, entryProps) of a seed,
+    #recomputed if it was evicted
+    def getSeedField(self, seed_index):
+        field = self.m_fields.get(seed_index);
+        if(field is None):
+            field = self.propagate(seed_index);
+        return field;
+    
+    #The geodesic tree of a seed, paths to it are traced from this
+    def getSeedTree(self, seed_index):
+        return GeodesicTree(self.getTracingModel(), *self.getSeedField(seed_index));
+    
+    #Returns: read only float32 view of the distances from the seed (N)
     def getVertexDistances(self, seed_index):
-    	try:
-    		indice = self.m_seed_indices.index(seed_index);
-    		if(not self.m_all_geos[indice]):
-    			if(isFastAlgorithmLoaded()):
-    				alg = CICHWithFurtherPriorityQueue(self.m_richmodel, set([seed_index]));
-    			else:
-    				alg = CICHWithFurtherPriorityQueue(inputModel=self.m_richmodel, indexOfSourceVerts=[seed_index]);
-    			alg.Execute();
-    		alg = self.m_all_geos[indice];
-    		return [iav.disUptodate for iav in alg.GetVertexDistances()];
-    	except ValueError:
-    		print("THE intended seed_index does not exist, so returning NONE");
-    		return None;
+        if(seed_index not in self.m_seed_indices):
+            print("THE intended seed_index does not exist, so returning NONE");
+            return None;
+        return self.getSeedField(seed_index)[0];
+    
+    #Returns: read only int32 view of the vertex every vertex is reached
+    #through on its way to the seed, -1 for the seed and unreached vertices
+    def getVertexParents(self, seed_index):
+        if(seed_index not in self.m_seed_indices):
+            print("THE intended seed_index does not exist, so returning NONE");
+            return None;
+        return self.getSeedField(seed_index)[1];
     
     def addSeedIndex(self, seed_index, passive=False, log=False):
         super().addSeedIndex(seed_index);
-        index = self.m_seed_indices.index(seed_index);
-        if(not passive):
-            try:
-                geos_index = self.m_all_geos[index];
-            except IndexError:
-                alg = None;
-                start = time.time();
-                if(isFastAlgorithmLoaded()):
-                	alg = CICHWithFurtherPriorityQueue(self.m_richmodel, set([seed_index]));
-                else:
-                	alg = CICHWithFurtherPriorityQueue(inputModel=self.m_richmodel, indexOfSourceVerts=[seed_index]);
-                alg.Execute();
-                end = time.time();
-                if(log):
-                	print('TOTAL TIME FOR SEEDING ::: ', (end - start), " seconds");
-                self.m_all_geos.append(alg);
-#                 self.m_all_geos.append(self.algo);
-        else:
-            self.m_all_geos.append(None);
+        if(not passive and seed_index not in self.m_fields):
+            self.propagate(seed_index, log);
     
     def removeSeedIndex(self, seed_index):
         removed_index = super().removeSeedIndex(seed_index);
         if(removed_index != -1):
-            del self.m_all_geos[removed_index];
+            self.m_fields.remove(seed_index);
+            self.m_bounded_paths = {key:path for key, path in self.m_bounded_paths.items() if key[0] != seed_index};
+        return removed_index;
+    
+    #One window propagation from all the sources. It is not cached as a seed
+    #field, only the distances and labels are returned
+    def getMultiSourceLabels(self, seed_indices):
+        start = time.time();
+        if(isFastAlgorithmLoaded()):
+            alg = CICHWithFurtherPriorityQueue(self.m_richmodel, set(seed_indices));
+        else:
+            alg = getChenhanAlgorithm()(inputModel=self.m_richmodel, indexOfSourceVerts=list(seed_indices));
+        alg.Execute();
+        distances, parents, __, __ = getInfoAtVertexArrays(alg.GetVertexDistances());
+        distances = np.asarray(distances, dtype=np.float64);
+        labels = getSourceLabels(parents, seed_indices);
+        labels[~np.isfinite(distances) | (distances >= 1e30)] = -1;
+        print('MULTI SOURCE PROPAGATION FROM %d SEEDS IN %.3f SECONDS'%(len(seed_indices), time.time() - start));
+        return distances, labels;
+    
+    def getMultiSourceDistances(self, seed_indices):
+        distances, __ = self.getMultiSourceLabels(seed_indices);
+        return distances;
     
     #Always returns the path in reverse i.e from the target to the seed
     def path_between(self, seed_index, target_index, local_path=True):
-        try:
-            indice = self.m_seed_indices.index(seed_index);
-            
-            if(not self.m_all_geos[indice]):
-                if(isFastAlgorithmLoaded()):
-                	alg = CICHWithFurtherPriorityQueue(self.m_richmodel, set([seed_index]));
-                else:
-                 	alg = CICHWithFurtherPriorityQueue(inputModel=self.m_richmodel, indexOfSourceVerts=[seed_index]);
-                alg.Execute();
-#                 self.m_all_geos[indice] = alg;
-#                 ensurelookuptable(self.m_bmesh);
-#                 self.algo = CICHWithFurtherPriorityQueue(inputModel=self.m_richmodel, indexOfSourceVerts=[v.index for v in self.m_bmesh.verts]);
-#                 self.algo.Execute();
-#                 self.m_all_geos[indice] = self.algo;
-            
-            if(isFastAlgorithmLoaded()):
-            	pathp3d = self.m_all_geos[indice].FindSourceVertex(target_index, []);
-            else:
-            	pathp3d, sourceindex = self.m_all_geos[indice].FindSourceVertex(target_index);
-            path = [];
-#             print('SOURCE INDEX ::: ', sourceindex, ' GIVEN SEED INDEX ::: ', seed_index, ' GIVEN TARGET INDEX ', target_index);
-#             print('TABLE OF RESULTING PATHS ::: ');
-#             print(self.algo.m_tableOfResultingPaths);
-            
-            for eitem in pathp3d:
-            	vco = eitem.Get3DPoint(self.m_richmodel);
-            	if(isFastAlgorithmLoaded()):
-            		vco = Vector((vco.x, vco.y, vco.z));
-            	if(not local_path):
-            		path.append(self.m_mesh.matrix_world @ vco);
-            	else:
-            		path.append(vco);
-            
-            return path;
+        return self.edgePointsToPath(self.path_between_raw(seed_index, target_index), local_path);
+    
+    #py_chenhancc has no bounded propagation, so there the whole mesh is
+    #propagated (and cached for the seed) as in path_between. The python
+    #implementation stops once the target is settled or radius is exceeded
+    def bounded_path_between(self, seed_index, target_index, local_path=True, radius=None):
+        self.addSeedIndex(seed_index, passive=True);
+        if(isFastAlgorithmLoaded() or seed_index in self.m_fields):
+            self.m_visited_fraction = 1.0;
+            distances = self.getVertexDistances(seed_index);
+            if(radius is not None and distances[target_index] > radius):
+                return None;
+            return self.path_between(seed_index, target_index, local_path);
         
-        except ValueError:
-            print("THE intended seed_index does not exist, so returning NONE");
+        radius = Constants.FLT_MAX if radius is None else radius;
+        key = (seed_index, target_index, radius);
+        if(key not in self.m_bounded_paths):
+            start = time.time();
+            self.m_bounded_paths[key], self.m_visited_fraction = self.computeBoundedPath(seed_index, target_index, radius);
+            print('BOUNDED PATH IN %.3f SECONDS, VISITED %.1f%% OF THE MESH'%(time.time() - start, self.m_visited_fraction * 100.0));
+        return self.edgePointsToPath(self.m_bounded_paths[key], local_path);
+    
+    #Returns: (edge points or None, visited fraction) of a python propagation
+    #that stops once target_index is settled or radius is exceeded
+    def computeBoundedPath(self, seed_index, target_index, radius):
+        alg = getChenhanAlgorithm()(inputModel=self.m_richmodel, indexOfSourceVerts=[seed_index], indexOfTargetVert=target_index, maxDistance=radius);
+        alg.Execute();
+        pathp3d = None;
+        if(alg.m_InfoAtVertices.disUptodate[target_index] <= radius):
+            pathp3d, sourceindex = alg.FindSourceVertex(target_index);
+        return pathp3d, alg.GetVisitedFraction();
+    
+    #The task propagates the seed (or runs the bounded python propagation)
+    #unless it is cached already and traces the path. Its result is (field or
+    #None if it was cached, edge points or None, visited fraction, bounded,
+    #local points or None), bounded tells if the edge points come from a
+    #bounded propagation
+    def getPathTask(self, seed_index, target_index, bounded=False, radius=None):
+        self.addSeedIndex(seed_index, passive=True);
+        field = self.m_fields.get(seed_index);
+        model = self.getTracingModel();
+        key = (seed_index, target_index, Constants.FLT_MAX if radius is None else radius);
+        bounded = bounded and field is None and not isFastAlgorithmLoaded();
+        if(bounded and key in self.m_bounded_paths):
+            pathp3d, visited_fraction = self.m_bounded_paths[key], self.m_visited_fraction;
+            return lambda: (None, pathp3d, visited_fraction, False, getEdgePointsArray(model, pathp3d));
+        def task():
+            if(bounded):
+                pathp3d, visited_fraction = self.computeBoundedPath(seed_index, target_index, key[2]);
+                return None, pathp3d, visited_fraction, True, getEdgePointsArray(model, pathp3d);
+            seed_field = self.computeSeedField(seed_index) if field is None else field;
+            tree = GeodesicTree(model, *seed_field);
+            pathp3d = None;
+            if(tree.IsReached(target_index) and (radius is None or tree.distances[target_index] <= radius)):
+                pathp3d, sourceindex = tree.FindSourceVertex(target_index);
+            return (seed_field if field is None else None), pathp3d, 1.0, False, getEdgePointsArray(model, pathp3d);
+        return task;
+    
+    #The seed may have been removed while the task ran, then nothing is cached
+    def finishPathTask(self, seed_index, target_index, radius, result):
+        field, pathp3d, self.m_visited_fraction, bounded, points = result;
+        if(seed_index in self.m_seed_indices):
+            if(field is not None and seed_index not in self.m_fields):
+                self.m_fields.put(seed_index, field);
+            if(bounded):
+                self.m_bounded_paths[(seed_index, target_index, Constants.FLT_MAX if radius is None else radius)] = pathp3d;
+        return points;
+    
+    #All the targets are traced from the one geodesic tree of the seed into
+    #index and proportion arrays, no Vector is made per point
+    def paths_between(self, seed_index, target_indices, local_path=True):
+        self.addSeedIndex(seed_index, passive=True);
+        first_verts, second_verts, proportions, offsets = self.getSeedTree(seed_index).TracePaths(target_indices);
+        points = getEdgePointPositions(getMeshVPos(self.m_mesh), first_verts, second_verts, proportions);
+        return getPathPoints(self.m_mesh, points, local_path), offsets;
+    
+    #Purpose: The geodesic tree of a seed as compact arrays: parents, entry
+    #edges and entry proportions (see InfoAtVertices.asTreeArrays)
+    def getGeodesicTree(self, seed_index):
+        self.addSeedIndex(seed_index, passive=True);
+        return self.getSeedField(seed_index)[1:];
+    
+    #The edge points are those of a GeodesicTree or of the python
+    #implementation, both refer to the edges of the tracing model
+    def edgePointsToPath(self, pathp3d, local_path=True):
+        if(pathp3d is None):
             return None;
+        model = self.getTracingModel();
+        path = [];
+        for eitem in pathp3d:
+            vco = Vector(eitem.Get3DPoint(model).tolist());
+            if(not local_path):
+                path.append(self.m_mesh.matrix_world @ vco);
+            else:
+                path.append(vco);
+        return path;
            
     def path_between_raw(self, seed_index, target_index, local_path=True):
-	    try:
-	        indice = self.m_seed_indices.index(seed_index);            
-        	if(not self.m_all_geos[indice]):
-		        if(isFastAlgorithmLoaded()):
-		            alg = CICHWithFurtherPriorityQueue(self.m_richmodel, set([seed_index]));
-		        else:
-		            alg = CICHWithFurtherPriorityQueue(inputModel=self.m_richmodel, indexOfSourceVerts=[seed_index]);
-		        alg.Execute();
-		     
-	        if(isFastAlgorithmLoaded()):
-		        pathp3d = self.m_all_geos[indice].FindSourceVertex(target_index, []);
-	        else:
-	        	pathp3d, sourceindex = self.m_all_geos[indice].FindSourceVertex(target_index);
-	        
-	        return pathp3d;
-	    except ValueError:
-		    print("THE intended seed_index does not exist, so returning NONE");
-		    return None;
\ No newline at end of file
+        if(seed_index not in self.m_seed_indices):
+            print("THE intended seed_index does not exist, so returning NONE");
+            return None;
+        tree = self.getSeedTree(seed_index);
+        if(not tree.IsReached(target_index)):
+            return None;
+        pathp3d, sourceindex = tree.FindSourceVertex(target_index);
+        return pathp3d;
+
+
+#Geodesic backends selectable per mesh (Object.geodesics_method)
+GEODESIC_ALGORITHMS = {'CHENHAN': ChenhanGeodesics, 'DIJKSTRA-TRI': DijkstraTriGeodesics, 'DIJKSTRA-QUAD': DijkstraQuadGeodesics, 'FMM': FastMarchingGeodesics, 'HEAT': HeatGeodesics};
+
+#Purpose: To create the GraphPaths backend chosen for a mesh
+#Inputs: mesh (blender object of type MESH), bm_mesh (bmesh of the mesh),
+#richmodel (Chen-Han only, getRichModel(mesh) if not given), method (name in
+#GEODESIC_ALGORITHMS, mesh.geodesics_method if not given)
+def getGeodesicAlgorithm(context, mesh, bm_mesh, richmodel=None, method=None):
+    method = method or mesh.geodesics_method;
+    return GEODESIC_ALGORITHMS.get(method, ChenhanGeodesics)(context, mesh, bm_mesh, richmodel);
@@ -0,0 +1,130 @@
+import bpy, os, sys, zlib;
+import multiprocessing;
+import numpy as np;
+
+from GenericMarkerCreator28.utils.mathandmatrices import getMeshVPos, getMeshTriangles, getMeshFingerprint;
+from GenericMarkerCreator28.geodesics.geodesicgraphpaths import isFastAlgorithmLoaded, DistanceFieldGeodesics, ChenhanGeodesics;
+
+#The worker module is imported by name in the worker processes. Importing it
+#through the addon package would run the package __init__ (and import bpy)
+#in every worker, so its folder is put on the path and it is loaded on its own
+WORKERS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'workers');
+
+#Object custom properties holding the persisted matrix and what it was computed for
+LANDMARK_DISTANCES_PROPERTY = 'landmark_geodesic_distances';
+LANDMARK_DISTANCES_KEY_PROPERTY = 'landmark_geodesic_key';
+
+def getLandmarkDistancesKey(mesh, seed_indices, method):
+    seeds = np.asarray(seed_indices, dtype=np.int64);
+    return '%s:%s:%d:%d'%(method, getMeshFingerprint(mesh), seeds.shape[0], zlib.crc32(seeds.tobytes()));
+
+#Purpose: The landmark distance matrix stored on the object (saved with the
+#.blend), or None if it was computed for other landmarks, geometry or method
+def loadLandmarkDistances(mesh, seed_indices, method):
+    key = getLandmarkDistancesKey(mesh, seed_indices, method);
+    if(mesh.get(LANDMARK_DISTANCES_KEY_PROPERTY, '') != key):
+        return None;
+    K = len(seed_indices);
+    distances = np.array(mesh[LANDMARK_DISTANCES_PROPERTY], dtype=np.float64);
+    if(distances.shape[0] != K * K):
+        return None;
+    print('LOADED LANDMARK DISTANCES FROM ', mesh.name);
+    return distances.reshape(K, K);
+
+def saveLandmarkDistances(mesh, seed_indices, method, distances):
+    mesh[LANDMARK_DISTANCES_PROPERTY] = distances.ravel().tolist();
+    mesh[LANDMARK_DISTANCES_KEY_PROPERTY] = getLandmarkDistancesKey(mesh, seed_indices, method);
+
+#Tasks of the upper triangle: the propagation from landmark i only has to
+#report the landmarks after it, the last landmark needs no propagation at all
+def getLandmarkTasks(seed_indices):
+    return [(i, seed_indices[i], seed_indices[i+1:]) for i in range(len(seed_indices)-1)];
+
+def getWorkerContext():
+    if(WORKERS_PATH not in sys.path):
+        sys.path.append(WORKERS_PATH);
+    ctx = multiprocessing.get_context('spawn');
+    #Blender before 2.91 reports its own binary as sys.executable
+    python_binary = getattr(bpy.app, 'binary_path_python', None);
+    if(python_binary):
+        ctx.set_executable(python_binary);
+    return ctx;
+
+#Share an array with the workers without pickling a copy per worker. Falls back
+#to passing the array itself on pythons without shared_memory (< 3.8)
+def shareArray(array):
+    try:
+        from multiprocessing import shared_memory;
+    except ImportError:
+        return array, None;
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1));
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array;
+    return (block.name, array.shape, array.dtype.str), block;
+
+#Purpose: The K x K exact geodesic distances between landmarks, one Chen-Han
+#propagation per landmark spread over a process pool
+#Inputs: vpos (N x 3), faces (F x 3), seed_indices (K vertex indices),
+#processes (worker count, all but one core by default), progress (optional
+#callback receiving the number of rows done)
+def getParallelLandmarkDistances(vpos, faces, seed_indices, processes=None, progress=None):
+    K = len(seed_indices);
+    distances = np.zeros((K, K));
+    tasks = getLandmarkTasks(seed_indices);
+    if(not tasks):
+        return distances;
+    processes = max(1, min(processes or (os.cpu_count() or 2) - 1, len(tasks)));
+
+    ctx = getWorkerContext();
+    import landmarkworker;
+    vpos_spec, vpos_block = shareArray(np.ascontiguousarray(vpos, dtype=np.float64));
+    faces_spec, faces_block = shareArray(np.ascontiguousarray(faces, dtype=np.int64));
+    try:
+        with ctx.Pool(processes, initializer=landmarkworker.initWorker, initargs=(vpos_spec, faces_spec)) as pool:
+            for done, (row, row_distances) in enumerate(pool.imap_unordered(landmarkworker.landmarkRow, tasks)):
+                distances[row, row+1:] = row_distances;
+                if(progress):
+                    progress(done+1);
+    finally:
+        for block in (vpos_block, faces_block):
+            if(block):
+                block.close();
+                block.unlink();
+
+    return distances + distances.T;
+
+#Purpose: The same matrix with any GraphPaths backend in this process. Every
+#row is computed and dropped again, so only K distances per landmark are kept.
+#The seeds and cached fields of algorithm are left as they were: the Chen-Han
+#rows are propagated by a private instance sharing its rich model
+def getSequentialLandmarkDistances(algorithm, seed_indices, progress=None):
+    K = len(seed_indices);
+    distances = np.zeros((K, K));
+    seeds = np.asarray(seed_indices, dtype=np.int64);
+    private = None;
+    if(isinstance(algorithm, ChenhanGeodesics)):
+        private = ChenhanGeodesics(algorithm.m_context, algorithm.m_mesh, algorithm.m_bmesh, algorithm.getRichModel(), max_entries=1);
+    for row, seed, targets in getLandmarkTasks(seed_indices):
+        if(private is not None):
+            field = private.propagate(seed)[0];
+        else:
+            field, __ = algorithm.computeField([seed]);
+        distances[row, row+1:] = np.asarray(field, dtype=np.float64)[seeds[row+1:]];
+        if(progress):
+            progress(row+1);
+    return distances + distances.T;
+
+#Purpose: The K x K geodesic distance matrix of the landmarks of a mesh with the
+#geodesics_method of the mesh. It is persisted on the object, so running the
+#spanning tree again for the same landmarks and geometry is free
+def getLandmarkDistances(context, mesh, seed_indices, algorithm=None, progress=None):
+    method = mesh.geodesics_method;
+    distances = loadLandmarkDistances(mesh, seed_indices, method);
+    if(distances is not None):
+        return distances;
+
+    if(method == 'CHENHAN' and isFastAlgorithmLoaded()):
+        distances = getParallelLandmarkDistances(getMeshVPos(mesh), getMeshTriangles(mesh), seed_indices, progress=progress);
+    else:
+        distances = getSequentialLandmarkDistances(algorithm, seed_indices, progress);
+    saveLandmarkDistances(mesh, seed_indices, method, distances);
+    return distances;
@@ -0,0 +1,131 @@
+import numpy as np;
+from concurrent.futures import ThreadPoolExecutor;
+
+from GenericMarkerCreator28.utils.mathandmatrices import getMeshVPos, getMeshTriangles, getMeshFingerprint;
+from GenericMarkerCreator28.geodesics.geodesicgraphpaths import isFastAlgorithmLoaded, ChenhanGeodesics;
+from GenericMarkerCreator28.geodesics.landmarkdistances import getWorkerContext, shareArray;
+
+#Path workers by object name: (geometry fingerprint, pool of one process with
+#the RichModel of that geometry, shared memory blocks it was started from).
+#A worker outlives the GeodesicPaths invocations, so invoking the operator
+#again on the same geometry neither spawns a process nor rebuilds the model
+PATH_WORKERS = {};
+
+#Purpose: The long lived path worker of a mesh, started again only when the
+#geometry changed
+def getPathWorker(mesh):
+    fingerprint = getMeshFingerprint(mesh);
+    try:
+        worker_fingerprint, pool, blocks = PATH_WORKERS[mesh.name];
+        if(worker_fingerprint == fingerprint):
+            return pool;
+        releasePathWorker(mesh.name);
+    except KeyError:
+        pass;
+    ctx = getWorkerContext();
+    import landmarkworker;
+    vpos_spec, vpos_block = shareArray(np.ascontiguousarray(getMeshVPos(mesh), dtype=np.float64));
+    faces_spec, faces_block = shareArray(np.ascontiguousarray(getMeshTriangles(mesh), dtype=np.int64));
+    pool = ctx.Pool(1, initializer=landmarkworker.initWorker, initargs=(vpos_spec, faces_spec));
+    PATH_WORKERS[mesh.name] = (fingerprint, pool, [block for block in (vpos_block, faces_block) if block]);
+    return pool;
+
+def releasePathWorker(name):
+    entry = PATH_WORKERS.pop(name, None);
+    if(entry is None):
+        return;
+    __, pool, blocks = entry;
+    pool.terminate();
+    pool.join();
+    for block in blocks:
+        block.close();
+        block.unlink();
+
+def releasePathWorkers():
+    for name in list(PATH_WORKERS.keys()):
+        releasePathWorker(name);
+
+#Geodesic paths computed away from the modal handler of GeodesicPaths, so the
+#viewport keeps drawing while a seed propagates. py_chenhancc holds the GIL
+#during a propagation, so exact Chen-Han paths run in the path worker of the
+#mesh with its own copy of the RichModel (see geodesics/workers/landmarkworker.py).
+#The other backends run on one worker thread: GraphPaths.getPathTask reads the
+#bpy data and caches on the main thread, the thread only computes over numpy
+#arrays and solvers and finishPathTask stores the result back in poll().
+#Jobs are keyed by (seed, target, preview) and collected with poll()
+class GeodesicPathJobs():
+    m_name = None;
+    m_geodesics = None;
+    m_pool = None;
+    m_executor = None;
+    #(job, radius) by key, job is an AsyncResult of the pool or a Future
+    m_pending = None;
+    m_finished = None;
+    
+    def __init__(self, mesh, geodesics):
+        self.m_name = mesh.name;
+        self.m_geodesics = geodesics;
+        self.m_pending = {};
+        self.m_finished = [];
+        if(isinstance(geodesics, ChenhanGeodesics) and isFastAlgorithmLoaded()):
+            self.m_pool = getPathWorker(mesh);
+        else:
+            self.m_executor = ThreadPoolExecutor(max_workers=1);
+    
+    def submit(self, seed_index, target_index, *, preview=False, bounded=False, radius=None):
+        key = (seed_index, target_index, preview);
+        if(key in self.m_pending):
+            return key;
+        if(self.m_pool):
+            import landmarkworker;
+            self.m_pending[key] = (self.m_pool.apply_async(landmarkworker.pathBetween, ((seed_index, target_index, bounded, radius),)), radius);
+            return key;
+        try:
+            task = self.m_geodesics.getPathTask(seed_index, target_index, bounded, radius);
+        except Exception as error:
+            print('GEODESIC PATH JOB FAILED ', key, error);
+            self.m_finished.append((key, None));
+            return key;
+        self.m_pending[key] = (self.m_executor.submit(task), radius);
+        return key;
+    
+    def isPending(self, preview=None):
+        return any(preview is None or key[2] == preview for key in self.m_pending);
+    
+    #Returns: list of (key, points of the path in local space or None) of the
+    #jobs finished since the last poll
+    def poll(self):
+        finished = self.m_finished;
+        self.m_finished = [];
+        for key, (job, radius) in list(self.m_pending.items()):
+            if(not (job.ready() if self.m_pool else job.done())):
+                continue;
+            del self.m_pending[key];
+            try:
+                if(self.m_pool):
+                    path = job.get();
+                else:
+                    path = self.m_geodesics.finishPathTask(key[0], key[1], radius, job.result());
+            except Exception as error:
+                print('GEODESIC PATH JOB FAILED ', key, error);
+                path = None;
+            finished.append((key, path));
+        return finished;
+    
+    #Drop every pending job. The worker is kept for the next invocation unless
+    #it is still busy with a job, a propagation cannot be interrupted so then
+    #it is terminated and started again when needed. The thread finishes the
+    #task it is running and its result is dropped
+    def cancel(self):
+        if(self.m_pool and any(not job.ready() for job, __ in self.m_pending.values())):
+            entry = PATH_WORKERS.get(self.m_name);
+            if(entry and entry[1] is self.m_pool):
+                releasePathWorker(self.m_name);
+        if(self.m_executor):
+            for job, __ in self.m_pending.values():
+                job.cancel();
+            self.m_executor.shutdown(wait=False);
+        self.m_pool = None;
+        self.m_executor = None;
+        self.m_pending.clear();
+        self.m_finished = [];
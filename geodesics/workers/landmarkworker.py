@@ -0,0 +1,81 @@
+'''
+Worker side of the parallel landmark distance matrix (see
+geodesics/landmarkdistances.py) and of the background paths of GeodesicPaths
+(see geodesics/pathjobs.py). This module is imported by name in fresh worker
+processes, so it must not import bpy or anything from the addon package: only
+numpy and py_chenhancc.
+'''
+from operator import attrgetter;
+import numpy as np;
+from py_chenhancc import CRichModel, CICHWithFurtherPriorityQueue, CPoint3D, CFace;
+
+#Rich model of the mesh, built once per worker process
+WORKER_MODEL = None;
+#Seed, propagation and distances of the last path, consecutive paths often
+#share a seed
+WORKER_LAST_SEED = -1;
+WORKER_LAST_ALGORITHM = None;
+WORKER_LAST_DISTANCES = None;
+
+#Attach an array created by the parent, either a shared memory block
+#described by (name, shape, dtype) or the array itself
+def attachArray(spec):
+    if(isinstance(spec, np.ndarray)):
+        return spec, None;
+    from multiprocessing import shared_memory;
+    name, shape, dtype = spec;
+    block = shared_memory.SharedMemory(name=name);
+    return np.ndarray(shape, dtype=dtype, buffer=block.buf), block;
+
+def initWorker(vpos_spec, faces_spec):
+    global WORKER_MODEL;
+    vpos, vpos_block = attachArray(vpos_spec);
+    faces, faces_block = attachArray(faces_spec);
+    #One bulk conversion to python floats and ints instead of numpy scalars
+    verts = [CPoint3D(x, y, z) for x, y, z in vpos.tolist()];
+    triangles = [CFace(a, b, c) for a, b, c in faces.tolist()];
+    del vpos, faces;
+    for block in (vpos_block, faces_block):
+        if(block):
+            block.close();
+    WORKER_MODEL = CRichModel();
+    WORKER_MODEL.LoadModel(verts, triangles);
+    WORKER_MODEL.Preprocess();
+
+#py_chenhancc reports unreached vertices with its own FLT_MAX (see
+#GeodesicComponents.CPP_UNREACHED_DISTANCE)
+CPP_UNREACHED_DISTANCE = 1e30;
+
+#Purpose: One row of the landmark distance matrix
+#Inputs: task (row index, seed vertex, vertex indices of the landmarks needed)
+#Returns: (row index, distances to the targets)
+def landmarkRow(task):
+    row, seed, targets = task;
+    alg = CICHWithFurtherPriorityQueue(WORKER_MODEL, set([int(seed)]));
+    alg.Execute();
+    infos = alg.GetVertexDistances();
+    return row, np.array([infos[int(target)].disUptodate for target in targets], dtype=np.float64);
+
+#Purpose: The exact geodesic path between two vertices
+#Inputs: task (seed vertex, target vertex, bounded, radius). py_chenhancc has
+#no bounded propagation, a bounded path beyond radius is dropped like in
+#ChenhanGeodesics.bounded_path_between
+#Returns: points of the path from the target to the seed (P x 3, local space),
+#None if the target is not reached or is beyond radius
+def pathBetween(task):
+    global WORKER_LAST_SEED, WORKER_LAST_ALGORITHM, WORKER_LAST_DISTANCES;
+    seed, target, bounded, radius = int(task[0]), int(task[1]), task[2], task[3];
+    if(seed != WORKER_LAST_SEED):
+        WORKER_LAST_ALGORITHM = CICHWithFurtherPriorityQueue(WORKER_MODEL, set([seed]));
+        WORKER_LAST_ALGORITHM.Execute();
+        infos = WORKER_LAST_ALGORITHM.GetVertexDistances();
+        WORKER_LAST_DISTANCES = np.fromiter(map(attrgetter('disUptodate'), infos), dtype=np.float64, count=len(infos));
+        WORKER_LAST_SEED = seed;
+    distance = WORKER_LAST_DISTANCES[target];
+    if(distance >= CPP_UNREACHED_DISTANCE or (bounded and radius is not None and distance > radius)):
+        return None;
+    points = [];
+    for eitem in WORKER_LAST_ALGORITHM.FindSourceVertex(target, []):
+        p3d = eitem.Get3DPoint(WORKER_MODEL);
+        points.append((p3d.x, p3d.y, p3d.z));
+    return np.array(points, dtype=np.float64).reshape(-1, 3);
@@ -2,6 +2,7 @@ import bpy
 import bgl
 import gpu
 from gpu_extras.batch import batch_for_shader
+from mathutils import Vector;
 from mathutils.bvhtree import BVHTree;
 
 import numpy as np;
@@ -10,11 +11,50 @@ from scipy.sparse import csr_matrix, lil_matrix;
 from scipy.sparse.csgraph import minimum_spanning_tree;
 
 from GenericMarkerCreator28.utils.interactiveutilities import ScreenPoint3D;
-from GenericMarkerCreator28.utils.bgl_utilities import getPointBatch, getHollowCircleBatch, getPathBatch, getPathAsBatchesWithPoints, getPathAsBatchesWithLines
-from GenericMarkerCreator28.utils.mathandmatrices import buildKDTree, getBMMesh, ensurelookuptable
+from GenericMarkerCreator28.utils.bgl_utilities import getPointBatch, getHollowCircleBatch, getHollowCirclePositions, getPathBatch, getPathAsBatchesWithPoints, getPathAsBatchesWithLines
+from GenericMarkerCreator28.utils.bgl_utilities import getPolylineSegments, getMergedLinesBatch, getMergedPointsBatch
+from GenericMarkerCreator28.utils.mathandmatrices import buildKDTree, getBMMesh, ensurelookuptable, setMeshVertexAttribute
 from GenericMarkerCreator28.utils.staticutilities import detectMN
 
-from GenericMarkerCreator28.geodesics.geodesicgraphpaths import ChenhanGeodesics, isFastAlgorithmLoaded;
+from GenericMarkerCreator28.geodesics.geodesicgraphpaths import ChenhanGeodesics, isFastAlgorithmLoaded, getGeodesicAlgorithm;
+from GenericMarkerCreator28.geodesics.landmarkdistances import getLandmarkDistances;
+from GenericMarkerCreator28.geodesics.pathjobs import GeodesicPathJobs;
+
+#Seconds between two polls of the background geodesic paths
+PATH_JOBS_POLL_INTERVAL = 0.1;
+#Colors of the straight lines drawn until the exact paths arrive, and of the
+#exact path under the mouse
+PROVISIONAL_PATH_COLOR = (0.5, 0.5, 0.5, 1);
+PREVIEW_PATH_COLOR = (0.0, 0.25, 0.25, 1);
+
+#Purpose: To orient the edges of a spanning tree of the landmarks so the seeds
+#(first landmark of every edge) are a minimum vertex cover of the tree. Paths
+#are traced from the geodesic tree of their seed, so this is the fewest
+#propagations that give every edge its path
+#Inputs: edges (pairs of landmark indices)
+#Returns: list of (seed, target) sorted by seed, the edges of a seed follow
+#each other so its propagation stays in the cache while they are traced
+def orientSpanningTreeEdges(edges):
+    edges = list(edges);
+    neighbours = {};
+    for a, b in edges:
+        neighbours.setdefault(a, set()).add(b);
+        neighbours.setdefault(b, set()).add(a);
+    #The neighbour of a leaf covers the leaf edge in some minimum cover
+    seeds = set();
+    leaves = [v for v, adjacent in neighbours.items() if len(adjacent) == 1];
+    while(leaves):
+        leaf = leaves.pop();
+        if(not neighbours[leaf]):
+            continue;
+        seed = neighbours[leaf].pop();
+        seeds.add(seed);
+        for v in neighbours[seed]:
+            neighbours[v].discard(seed);
+            if(len(neighbours[v]) == 1):
+                leaves.append(v);
+        neighbours[seed] = set();
+    return sorted((a, b) if a in seeds else (b, a) for a, b in edges);
 
 class GeodesicCutterWithLandmarks(bpy.types.Operator):
     bl_idname = "genericlandmarks.geodesic_cutter_landmarks";
@@ -36,29 +76,16 @@ class GeodesicCutterWithLandmarks(bpy.types.Operator):
 
     def getGeodesicAlgorithm(self, context, mesh):
         bm = getBMMesh(context, mesh, False)
-        richmodel = None
-
-        if(not isFastAlgorithmLoaded):
-            richmodel = RichModel(bm, mesh)
-            richmodel.Preprocess()
-        
-        chenhan = ChenhanGeodesics(context, mesh, bm, richmodel)        
-        return chenhan, bm
+        algorithm = getGeodesicAlgorithm(context, mesh, bm)
+        return algorithm, bm
 
     def getGeodesicMatrixGraph(self, context, mesh):
         seed_indices = [gm.bestVertexIndex() for gm in mesh.generic_landmarks]
         algorithm, bm = self.getGeodesicAlgorithm(context, mesh)
-        K = len(seed_indices)
-        np_matrix = np.zeros((K, K))
 
         wm = context.window_manager
         wm.progress_begin(0, len(seed_indices))
-        for i,vid in enumerate(seed_indices):
-            algorithm.addSeedIndex(vid)
-            v_distances = algorithm.getVertexDistances(vid);
-            np_matrix[i] = np.array(v_distances)[seed_indices];
-            wm.progress_update(i+1)
-
+        np_matrix = getLandmarkDistances(context, mesh, seed_indices, algorithm, progress=wm.progress_update)
         wm.progress_end()
         bm.free()
         return csr_matrix(np_matrix), algorithm
@@ -79,7 +106,7 @@ class GeodesicCutterWithLandmarks(bpy.types.Operator):
         #         plotting Minimum spanning tree
         coo = spanningtree.tocoo()
         edges = zip(coo.row, coo.col)
-        edges = sorted(tuple(sorted(pair)) for pair in edges)
+        edges = orientSpanningTreeEdges(tuple(sorted(pair)) for pair in edges)
 
         return edges, geodesc_alg_M, geodesc_alg_N
     
@@ -101,6 +128,10 @@ class GeodesicCutterWithLandmarks(bpy.types.Operator):
         gm_from_id, gm_to_id = gm_from.id, gm_to.id
         vid1, vid2 = gm_from.v_indices[np.argmax(gm_from.v_ratios)], gm_to.v_indices[np.argmax(gm_to.v_ratios)]
         
+        #The seed is propagated once and kept in the cache of the algorithm,
+        #the other spanning tree edges from it only trace their paths (see
+        #orientSpanningTreeEdges)
+        geodesic_algorithm.addSeedIndex(vid1)
         geodesic_path = geodesic_algorithm.path_between(vid1, vid2, local_path=False)
         
         curve_name = '%s-path-%s-%s'%(mesh.name, gm_from_id, gm_to_id)
@@ -142,7 +173,7 @@ class GeodesicCutterWithLandmarks(bpy.types.Operator):
             self.report({'ERROR'}, 'Works only with meshes')
             return {'CANCELLED'}
 
-        if(not isFastAlgorithmLoaded()):
+        if(context.active_object.geodesics_method == 'CHENHAN' and not isFastAlgorithmLoaded()):
             self.report({'ERROR'}, 'You need py_chenhancc for this operator to work. Install using pip install py_chenhancc')
             return {'CANCELLED'}
 
@@ -186,6 +217,47 @@ class GeodesicCutterWithLandmarks(bpy.types.Operator):
         return confirm
 
 
+class GeodesicVoronoiLabels(bpy.types.Operator):
+    bl_idname = "genericlandmarks.geodesic_voronoi_labels";
+    bl_label = "Landmark Geodesic Regions";
+    bl_space_type = "VIEW_3D";
+    bl_region_type = "UI";
+    bl_context = "objectmode";
+    bl_description = "Label every vertex with its geodesically closest landmark using one propagation from all the landmarks"
+
+    label_attribute: bpy.props.StringProperty(name="Label Attribute", description="Integer vertex attribute receiving the index of the closest landmark (-1 if unreachable)", default="landmark_region")
+    distance_attribute: bpy.props.StringProperty(name="Distance Attribute", description="Float vertex attribute receiving the geodesic distance to the closest landmark", default="landmark_distance")
+
+    def execute(self, context):
+        mesh = context.active_object
+        if(not mesh or mesh.type != 'MESH'):
+            self.report({'ERROR'}, 'Works only with meshes')
+            return {'CANCELLED'}
+        if(len(mesh.generic_landmarks) < 1):
+            self.report({'ERROR'}, 'Works only on meshes with landmarks')
+            return {'CANCELLED'}
+        if(mesh.geodesics_method == 'CHENHAN' and not isFastAlgorithmLoaded()):
+            self.report({'ERROR'}, 'You need py_chenhancc for this operator to work. Install using pip install py_chenhancc')
+            return {'CANCELLED'}
+
+        seed_indices = [gm.bestVertexIndex() for gm in mesh.generic_landmarks]
+        bm = getBMMesh(context, mesh, False)
+        algorithm = getGeodesicAlgorithm(context, mesh, bm)
+        distances, labels = algorithm.getMultiSourceLabels(seed_indices)
+        bm.free()
+
+        #Unreached vertices have no finite distance to store
+        distances = np.where(labels == -1, -1.0, distances)
+        setMeshVertexAttribute(mesh, self.label_attribute, labels, 'INT')
+        setMeshVertexAttribute(mesh, self.distance_attribute, distances, 'FLOAT')
+        self.report({'INFO'}, 'Labelled %d vertices with %d landmarks'%(np.count_nonzero(labels != -1), len(seed_indices)))
+        return {'FINISHED'}
+
+    @classmethod
+    def poll(cls, context):
+        return context.mode == 'OBJECT'
+
+
 #The operators for creating landmarks
 class GeodesicPaths(bpy.types.Operator):
     bl_idname = "genericlandmarks.geodesic_paths";
@@ -195,6 +267,9 @@ class GeodesicPaths(bpy.types.Operator):
     bl_context = "objectmode";
     bl_description = "Show geodesic paths between successive clicks on a mesh surface"
 
+    bounded_paths: bpy.props.BoolProperty(name="Bounded Paths", description="Stop each propagation once the clicked vertex is reached instead of propagating over the whole mesh", default=True)
+    path_radius: bpy.props.FloatProperty(name="Path Radius", description="Do not propagate beyond this geodesic distance (0 is unlimited)", default=0.0, min=0.0)
+
     def modal(self, context, event):
         if event.type in {'ESC'}:
             context.area.header_text_set(text="");
@@ -215,15 +290,13 @@ class GeodesicPaths(bpy.types.Operator):
                 _, v_i, _ = self.kdtree_m.find(m_hitpoint)
                 currentseed = v_i
 
-                if(len(self.chenhan.getSeedIndices()) > 0): 
-                    p_indices = self.chenhan.getSeedIndices()
-                    temp_paths = self.__get_sequenced_shortest_path(p_indices[-1], currentseed)
-                    if(temp_paths):
-                        if(len(temp_paths)):
-                            points_batch = getPathAsBatchesWithPoints(context, self.shader, temp_paths, color=(0.0, 0.25, 0.25, 1), pointsize=10)
-                            lines_batch = getPathAsBatchesWithLines(context, self.shader, temp_paths, color=(0.0, 0.25, 0.25, 1))
-                            self.__temp_path_batches = [points_batch]
-                            self.__temp_path_batches.append(lines_batch)
+                if(len(self.__geo_vertex_indices) > 0 and currentseed != self.__preview_target): 
+                    self.__preview_target = currentseed
+                    seed_index = self.__geo_vertex_indices[-1]
+                    #Straight line until the exact preview comes back from the worker
+                    self.__set_preview_batches(context, [self.M.matrix_world @ self.M.data.vertices[seed_index].co, self.M.matrix_world @ self.M.data.vertices[currentseed].co], PROVISIONAL_PATH_COLOR)
+                    if(seed_index != currentseed and not self.__path_jobs.isPending()):
+                        self.__submit_path(seed_index, currentseed, preview=True)
 
         if (event.type in {'LEFTMOUSE'}):
             hit, onM, m_face_index, m_hitpoint = ScreenPoint3D(context, event, position_mouse = False, use_mesh=self.M);
@@ -243,7 +316,7 @@ class GeodesicPaths(bpy.types.Operator):
             self.report({'ERROR'}, 'Works only with meshes')
             return {'CANCELLED'}
 
-        if(not isFastAlgorithmLoaded()):
+        if(context.active_object.geodesics_method == 'CHENHAN' and not isFastAlgorithmLoaded()):
             self.report({'ERROR'}, 'You need py_chenhancc for this operator to work. Install using pip install py_chenhancc')
             return {'CANCELLED'}
         
@@ -281,22 +354,25 @@ class GeodesicPaths(bpy.types.Operator):
         self.kdtree_m = buildKDTree(context, self.M)
 
         self.bm = getBMMesh(context, self.M, False);
-        self.richmodel = None;
-
-        if(not isFastAlgorithmLoaded):
-            self.richmodel = RichModel(self.bm, self.M);
-            self.richmodel.Preprocess();
-        
-        self.chenhan = ChenhanGeodesics(context, self.M, self.bm, self.richmodel);
+        self.geodesics = getGeodesicAlgorithm(context, self.M, self.bm);
         self.currentseed = 0;
         
-        if(isFastAlgorithmLoaded()):
-            self.richmodel = self.chenhan.getRichModel();
-
+        self.richmodel = None;
+        if(isinstance(self.geodesics, ChenhanGeodesics)):
+            self.richmodel = self.geodesics.getRichModel();
+
+        self.__path_jobs = GeodesicPathJobs(self.M, self.geodesics)
+        #World space arrays per (seed, target) segment and per marker vertex,
+        #the draw batches are rebuilt from these without touching the mesh again
+        self.__segment_paths = {}
+        self.__marker_arrays = {}
+        self.__preview_target = -1
+        self.__poll_timer = self.__poll_path_jobs
+        bpy.app.timers.register(self.__poll_timer, first_interval=PATH_JOBS_POLL_INTERVAL)
         
         self.__geo_vertex_indices = []
 
-        self.__geodesic_paths = []
+        self.__geodesic_paths = np.zeros((0, 3), dtype=np.float32)
         self.__drawbatches = []
         self.__create_shader(context)
 
@@ -309,53 +385,93 @@ class GeodesicPaths(bpy.types.Operator):
         return {'RUNNING_MODAL'}
     
 
-    def __get_sequenced_shortest_path(self, v1, v2,*, local_path = False):
-        path = None;
-        if(v1 != v2):
-            path = self.chenhan.path_between(v1, v2, local_path = local_path);
-        return path
+    def __submit_path(self, seed_index, target_index, *, preview=False):
+        radius = self.path_radius if self.path_radius > 0.0 else None
+        self.__path_jobs.submit(seed_index, target_index, preview=preview, bounded=self.bounded_paths, radius=radius)
+
+    def __set_preview_batches(self, context, path, color):
+        points_batch = getPathAsBatchesWithPoints(context, self.shader, path, color=color, pointsize=10)
+        lines_batch = getPathAsBatchesWithLines(context, self.shader, path, color=color)
+        self.__temp_path_batches = [points_batch, lines_batch]
+
+    def __to_world(self, local_co):
+        M = np.array(self.M.matrix_world, dtype=np.float64)
+        return (np.asarray(local_co, dtype=np.float64).reshape(-1, 3) @ M[:3,:3].T + M[:3,3]).astype(np.float32)
+
+    #bpy.app.timers callback, swaps in the exact paths finished by the worker
+    def __poll_path_jobs(self):
+        finished = self.__path_jobs.poll()
+        if(not finished):
+            return PATH_JOBS_POLL_INTERVAL
+        
+        context = bpy.context
+        rebuild = False
+        for (seed_index, target_index, preview), local_path in finished:
+            path = np.zeros((0, 3), dtype=np.float32) if local_path is None else self.__to_world(local_path)
+            if(preview):
+                if(path.shape[0] and self.__geo_vertex_indices and seed_index == self.__geo_vertex_indices[-1] and target_index == self.__preview_target):
+                    self.__set_preview_batches(context, path, PREVIEW_PATH_COLOR)
+            elif((seed_index, target_index) in self.__segment_paths):
+                self.__segment_paths[(seed_index, target_index)] = (path, getPolylineSegments(path), True)
+                rebuild = True
+        
+        if(rebuild):
+            self.__build_path_batches(context)
+        for window in context.window_manager.windows:
+            for area in window.screen.areas:
+                if(area.type == 'VIEW_3D'):
+                    area.tag_redraw()
+        return PATH_JOBS_POLL_INTERVAL
 
     def __add_vertex_indice(self, context, vid):
         if(vid not in self.__geo_vertex_indices):
+            v = self.M.data.vertices[vid]
+            co = self.__to_world(v.co)
+            circle = getHollowCirclePositions(Vector(co[0]), v.normal, radius=self.marker_ring_size)
+            self.__marker_arrays[vid] = (co, getPolylineSegments(circle, closed=True))
             self.__geo_vertex_indices.append(vid)
+            if(len(self.__geo_vertex_indices) > 1):
+                seed_index = self.__geo_vertex_indices[-2]
+                #Straight line until the worker delivers the exact path
+                straight = np.concatenate((self.__marker_arrays[seed_index][0], co))
+                self.__segment_paths[(seed_index, vid)] = (straight, getPolylineSegments(straight), False)
+                self.__submit_path(seed_index, vid)
+            self.currentseed = vid
+            self.__preview_target = -1
+            self.__build_path_batches(context)
+
+    #Only the cached arrays are concatenated, so the number of batches stays the
+    #same however many segments there are: exact and provisional paths (lines
+    #and points each), the marker points and the marker rings
+    def __build_path_batches(self, context):
+        exact_points, exact_lines, provisional_points, provisional_lines = [], [], [], []
+        for i in range(1, len(self.__geo_vertex_indices)):
+            key = (self.__geo_vertex_indices[i-1], self.__geo_vertex_indices[i])
+            points, lines, exact = self.__segment_paths[key]
+            if(exact):
+                exact_points.append(points)
+                exact_lines.append(lines)
+            else:
+                provisional_points.append(points)
+                provisional_lines.append(lines)
+
+        markers = [self.__marker_arrays[vid] for vid in self.__geo_vertex_indices]
+        self.__geodesic_paths = np.concatenate(exact_points) if exact_points else np.zeros((0, 3), dtype=np.float32)
+        self.__drawbatches = [
+            getMergedPointsBatch(context, self.shader, exact_points, color=(1, 0, 0, 1), pointsize=10),
+            getMergedLinesBatch(context, self.shader, exact_lines, color=(1, 0, 0, 1)),
+            getMergedPointsBatch(context, self.shader, provisional_points, color=PROVISIONAL_PATH_COLOR, pointsize=10),
+            getMergedLinesBatch(context, self.shader, provisional_lines, color=PROVISIONAL_PATH_COLOR),
+            getMergedPointsBatch(context, self.shader, [co for co, __ in markers]),
+            getMergedLinesBatch(context, self.shader, [ring for __, ring in markers]),
+        ]
 
-            if(vid not in self.chenhan.getSeedIndices()):
-                context.window.cursor_modal_set('WAIT')
-                self.chenhan.addSeedIndex(vid);
-                context.window.cursor_modal_set('KNIFE')
-                self.currentseed = vid;
-
-            del self.__drawbatches[:]
-            del self.__geodesic_paths[:]
-
-            for i, vid in enumerate(self.__geo_vertex_indices):
-                co = self.M.matrix_world @ self.M.data.vertices[vid].co
-                point_batch = getPointBatch(context, self.shader, co)
-                hollow_circle_batch = getHollowCircleBatch(context, self.shader, co, self.M.data.vertices[vid].normal, radius=self.marker_ring_size)
-                
-                if(i > 0):
-                    seed_index = self.__geo_vertex_indices[i-1]
-                    target_index = vid
-                    context.window.cursor_modal_set('WAIT')
-                    path_between = self.__get_sequenced_shortest_path(seed_index, target_index)
-                    context.window.cursor_modal_set('KNIFE')
-                    
-                    if(path_between):
-                        if(len(path_between)):
-                            path_batch_points = getPathAsBatchesWithPoints(context, self.shader, path_between, pointsize=10)
-                            path_batch_lines = getPathAsBatchesWithLines(context, self.shader, path_between)
-                            self.__geodesic_paths.extend(path_between)
-                            self.__drawbatches.append(path_batch_points)
-                            self.__drawbatches.append(path_batch_lines)
-
-                self.__drawbatches.append(point_batch)
-                self.__drawbatches.append(hollow_circle_batch)
-
-
-    
     def __finish(self, context):
         # context.window.cursor_modal_set('DEFAULT')        
         context.window.cursor_modal_restore()
+        if(bpy.app.timers.is_registered(self.__poll_timer)):
+            bpy.app.timers.unregister(self.__poll_timer)
+        self.__path_jobs.cancel()
         self.__unregister_handlers(context)
         self.M.show_all_edges = self.mesh_show_all_edges
         self.M.show_wire = self.mesh_show_wire
@@ -18,6 +18,7 @@ from GenericMarkerCreator28 import constants;
 from GenericMarkerCreator28.properties import changeMarkerColor, changeUnlinkedMarkerColor;
 from GenericMarkerCreator28.utils.interactiveutilities import ScreenPoint3D;
 from GenericMarkerCreator28.utils.mathandmatrices import getBMMesh, ensurelookuptable
+from GenericMarkerCreator28.utils.mesharrays import tagMeshArrays;
 from GenericMarkerCreator28.utils.staticutilities import detectMN, applyMarkerColor, addConstraint, getConstraintsKD, deleteObjectWithMarkers, reorderConstraints;
 from GenericMarkerCreator28.utils.staticutilities import getMarkersForMirrorX, getGenericLandmark, getMeshForBlenderMarker, getBlenderMarker;
 from GenericMarkerCreator28.utils.meshmathutils import getKDTree, getBarycentricCoordinateFromPolygonFace, getBarycentricCoordinate, getCartesianFromBarycentre, getGeneralCartesianFromBarycentre, getTriangleArea;
@@ -308,6 +309,7 @@ class SnapLandmarksToVertex(bpy.types.Operator):
         bpy.ops.mesh.set_normals_from_faces()
         bpy.ops.mesh.select_all(action='DESELECT')
         bpy.ops.object.mode_set(mode='OBJECT', toggle=False);
+        tagMeshArrays(mesh)
 
         kdtree = getKDTree(context, mesh)
 
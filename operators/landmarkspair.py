@@ -1,6 +1,8 @@
 import bpy;
 from mathutils import Vector, Matrix;
 
+from GenericMarkerCreator28.utils.mesharrays import tagMeshArrays;
+
 class AssignMeshPair(bpy.types.Operator):
     bl_idname = "genericlandmarks.assignmeshpair";
     bl_label = "Assign Pair";
@@ -24,6 +26,8 @@ class AssignMeshPair(bpy.types.Operator):
         N.select = True;
         context.scene.objects.active = N;
         bpy.ops.object.transform_apply(rotation=True, scale=True);
+        tagMeshArrays(M);
+        tagMeshArrays(N);
                 
         bpy.ops.object.select_all(action="DESELECT");      
         
@@ -18,12 +18,12 @@ from sklearn.mixture  import GaussianMixture;
 from sklearn.metrics import pairwise_distances_argmin_min;
 
 from bpy.props import StringProperty;
-from GenericMarkerCreator28.utils.spectralmagic import getHKSColors, getWKSColors, getGISIFColors, doLowpassFiltering;
+from GenericMarkerCreator28.utils.spectralmagic import getHKSColors, getWKSColors, getGISIFColors, doLowpassFiltering, getProgressiveSpectralShape;
 from GenericMarkerCreator28.utils.staticutilities import applyColoringForMeshErrors;
 from GenericMarkerCreator28.utils.mathandmatrices import getDuplicatedObject;
 from GenericMarkerCreator28.utils.mathandmatrices import setMeshVPOS;
 from GenericMarkerCreator28.utils.trimeshcurvatures import need_curvatures;
-from GenericMarkerCreator28.utils.mathandmatrices import getMeshFaces;
+from GenericMarkerCreator28.utils.mathandmatrices import getMeshTriangles, getMeshTrianglePolygons;
 from GenericMarkerCreator28.utils.staticutilities import addConstraint, getBlenderMarker, detectMorN;
 
 from GenericMarkerCreator28.utils.mathandmatrices import getMeshVPos, get_matC2;
@@ -319,7 +319,10 @@ class SpectralShape(bpy.types.Operator):
             context.view_layer.objects.active = mesh;
             mesh.select_set(True);
             
-        vpos = doLowpassFiltering(context, mesh, eigen_k);
+        if(mesh.progressive_spectral_shape):
+            vpos = getProgressiveSpectralShape(context, mesh, eigen_k, mesh.spectral_shape_k_max);
+        else:
+            vpos = doLowpassFiltering(context, mesh, eigen_k);
         setMeshVPOS(dup_mesh, vpos);
          
     
@@ -399,7 +402,8 @@ class AddSpectralSignatureLandmarks(bpy.types.Operator):
                 print('-----------------');
 #                 print('GMM VALUES (Mean: %f, Closest: %f, Closest Index: %d, In Subset Value: %f, In Subset Index: %d) ::: '%(gmm_value, closest_value, closest_index, cluster_values[closest[0]], closest[0]));
             
-            faces = getMeshFaces(mesh);
+            faces = getMeshTriangles(mesh);
+            face_polygons = getMeshTrianglePolygons(mesh);
             for vid in keyindices:
                 uvw = [0.0, 0.0, 0.0];
                 faces_rows, faces_column = np.where(faces == vid);
@@ -409,7 +413,7 @@ class AddSpectralSignatureLandmarks(bpy.types.Operator):
                 vid1, vid2, vid3 = face_row.tolist();
                 print(vid1, vid2, vid3);
                 co = mesh.data.vertices[face_row[face_column_index]].co;
-                addConstraint(context, mesh, uvw, [vid1, vid2, vid3], co, faceindex=face_row_index, create_visual_landmarks = False);
+                addConstraint(context, mesh, uvw, [vid1, vid2, vid3], co, faceindex=int(face_polygons[face_row_index]), create_visual_landmarks = False);
             
             if(mesh.gisif_symmetries):
                 print('~'*40);
@@ -434,7 +438,7 @@ class AddSpectralSignatureLandmarks(bpy.types.Operator):
                     vid1, vid2, vid3 = face_row.tolist();
                     print(vid1, vid2, vid3);
                     co = mesh.data.vertices[face_row[face_column_index]].co;
-                    addConstraint(context, mesh, uvw, [vid1, vid2, vid3], co, faceindex=face_row_index, create_visual_landmarks = False);
+                    addConstraint(context, mesh, uvw, [vid1, vid2, vid3], co, faceindex=int(face_polygons[face_row_index]), create_visual_landmarks = False);
                     
             
             
@@ -1,7 +1,7 @@
 import bpy
 
 
-from GenericMarkerCreator28.operators.geodesic_operators import GeodesicPaths, GeodesicCutterWithLandmarks
+from GenericMarkerCreator28.operators.geodesic_operators import GeodesicPaths, GeodesicCutterWithLandmarks, GeodesicVoronoiLabels
 
 class GeodesicsPanel(bpy.types.Panel):
     bl_idname = "OBJECT_PT_genericlandmarks_geodesics";
@@ -21,7 +21,11 @@ class GeodesicsPanel(bpy.types.Panel):
             box = layout.box()
             box.label(text='Geodesic Surface Paths')
             row = box.row();
+            row.prop(context.active_object, 'geodesics_method');
+            row = box.row();
             row.operator(GeodesicPaths.bl_idname);
+            row = box.row();
+            row.operator(GeodesicVoronoiLabels.bl_idname);
 
             box = layout.box()
             box.label(text='Landmark Seams')
@@ -41,6 +41,10 @@ class SpectralGeneralPanel(bpy.types.Panel):
             row.prop(context.active_object, 'live_spectral_shape');
             row.operator(SpectralShape.bl_idname);           
             
+            row = box.row();
+            row.prop(context.active_object, 'progressive_spectral_shape');
+            row.prop(context.active_object, 'spectral_shape_k_max');
+            
             row = box.row();
             row.operator(SpectralFeatures.bl_idname);
             
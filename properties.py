@@ -21,6 +21,14 @@ def checkObjectsInScene(scene):
         
         bpy.ops.object.delete()
 
+GEODESIC_METHODS = [
+    ('CHENHAN', 'Exact (Chen-Han)', 'Exact geodesics by window propagation, needs py_chenhancc'),
+    ('DIJKSTRA-TRI', 'Dijkstra (Edges)', 'Shortest paths along the mesh edges, fast preview'),
+    ('DIJKSTRA-QUAD', 'Dijkstra (Edges + Diagonals)', 'Shortest paths along the mesh edges and face diagonals, fast preview'),
+    ('FMM', 'Fast Marching', 'Approximate geodesics by fast marching on the triangles, a sequential reference implementation slower than the heat method'),
+    ('HEAT', 'Heat Method', 'Approximate geodesics from heat diffusion, prefactored once per mesh and fast for many seeds'),
+];
+
 def updateMeanCurvatures(self, context):
     if(self.post_process_colors):
         bpy.ops.genericlandmarks.meancurvatures('EXEC_DEFAULT', currentobject=self.name);
@@ -181,6 +189,7 @@ def registration_landmarks(delete=False):
         bpy.types.Scene.landmarks_use_selection = bpy.props.EnumProperty(name = "Landmarks List", items = get_marker_meshes, description = "Meshes available in the Blender scene to be used for as landmark mesh");
 
         bpy.types.Object.geodesics_show_landmark_seams = bpy.props.BoolProperty(name="Show Landmark Seams", description="If you have to show seams then use modal operator to show the seam paths", default=False)
+        bpy.types.Object.geodesics_method = bpy.props.EnumProperty(name="Geodesics Method", description="Algorithm used for geodesic distances and paths on this mesh. The approximate methods are fast previews for meshes where exact propagation is too slow", items=GEODESIC_METHODS, default='CHENHAN')
         
         # if not checkObjectsInScene in bpy.app.handlers.depsgraph_update_post:
         #     bpy.app.handlers.depsgraph_update_post.append(checkObjectsInScene)
@@ -211,6 +220,7 @@ def registration_landmarks(delete=False):
         del bpy.types.Scene.landmarks_use_selection
 
         del bpy.types.Object.geodesics_show_landmark_seams
+        del bpy.types.Object.geodesics_method
 
 
 
@@ -246,6 +256,8 @@ def registration_spectral(delete=False):
         bpy.types.Object.live_hks = bpy.props.BoolProperty(name='Live HKS', description="Live HKS means reflect the changes in the scene immediately after values are changed (Eigen K or HKS Time)", default=False);
         bpy.types.Object.live_wks = bpy.props.BoolProperty(name='Live WKS', description="Live WKS means reflect the changes in the scene immediately after values are changed (Eigen K or HKS Time)", default=False);
         bpy.types.Object.live_spectral_shape = bpy.props.BoolProperty(name='Live Spectral Shape', description="Perform Live spectral shape", default=False);
+        bpy.types.Object.progressive_spectral_shape = bpy.props.BoolProperty(name='Progressive', description="Solve the spectral shape once for Max K eigenvectors and answer every Eigen K below it by adding or removing eigenvectors", default=True);
+        bpy.types.Object.spectral_shape_k_max = bpy.props.IntProperty(name='Max K', description="Eigenvectors solved for the progressive spectral shape", default=100, min=1);
         bpy.types.Object.live_gisif = bpy.props.BoolProperty(name='Live GISIF', description="Live GISIF means reflect the changes in the scene immediately after values are changed (Treshold or Group Index)", default=False);
         
         bpy.types.Object.post_process_colors = bpy.props.BoolProperty(name='Post Process Colors', description="Apply a postprocessing with histograms on the scalar values when visualized as colors", default=True);
@@ -289,6 +301,8 @@ def registration_spectral(delete=False):
         del bpy.types.Object.live_hks
         del bpy.types.Object.live_wks
         del bpy.types.Object.live_spectral_shape
+        del bpy.types.Object.progressive_spectral_shape
+        del bpy.types.Object.spectral_shape_k_max
         del bpy.types.Object.live_gisif
         
         del bpy.types.Object.post_process_colors
@@ -0,0 +1,42 @@
+import numpy as np;
+import pytest;
+
+#Purpose: A triangulated grid on the z=0 plane, the geodesic distances on it
+#are the euclidean ones
+#Returns: vpos (n*n x 3), faces (2*(n-1)**2 x 3)
+def getPlane(n=5, size=1.0):
+    x, y = np.meshgrid(np.linspace(0.0, size, n), np.linspace(0.0, size, n), indexing='ij');
+    vpos = np.column_stack((x.ravel(), y.ravel(), np.zeros(n * n)));
+    i, j = np.meshgrid(np.arange(n - 1), np.arange(n - 1), indexing='ij');
+    a = (i * n + j).ravel();
+    b, c, d = a + n, a + n + 1, a + 1;
+    faces = np.vstack((np.column_stack((a, b, c)), np.column_stack((a, c, d))));
+    return vpos, faces;
+
+#Purpose: A uv sphere of radius 1 with poles at +-z
+#Returns: vpos (N x 3), faces (F x 3)
+def getSphere(rings=12, segments=24):
+    theta = np.pi * np.arange(1, rings) / rings;
+    phi = 2.0 * np.pi * np.arange(segments) / segments;
+    t, p = np.meshgrid(theta, phi, indexing='ij');
+    body = np.column_stack((np.sin(t).ravel() * np.cos(p).ravel(), np.sin(t).ravel() * np.sin(p).ravel(), np.cos(t).ravel()));
+    vpos = np.vstack(([0.0, 0.0, 1.0], body, [0.0, 0.0, -1.0]));
+    south = len(vpos) - 1;
+    j = np.arange(segments);
+    faces = [np.column_stack((np.zeros(segments, dtype=int), 1 + j, 1 + (j + 1) % segments))];
+    for i in range(rings - 2):
+        a = 1 + i * segments + j;
+        b = 1 + i * segments + (j + 1) % segments;
+        faces.append(np.column_stack((a, a + segments, b + segments)));
+        faces.append(np.column_stack((a, b + segments, b)));
+    base = 1 + (rings - 2) * segments;
+    faces.append(np.column_stack((base + j, np.full(segments, south), base + (j + 1) % segments)));
+    return vpos, np.vstack(faces);
+
+@pytest.fixture
+def plane():
+    return getPlane();
+
+@pytest.fixture
+def sphere():
+    return getSphere();
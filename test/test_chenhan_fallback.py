@@ -0,0 +1,145 @@
+import numpy as np;
+import scipy.sparse as spsp;
+from scipy.sparse.csgraph import dijkstra;
+
+from GenericMarkerCreator28.geodesics.MeshData import EdgeModel, RichModel;
+from GenericMarkerCreator28.geodesics.CICHWithFurtherPriorityQueue import CICHWithFurtherPriorityQueue;
+from GenericMarkerCreator28.geodesics.GeodesicComponents import getTreeArrays, GeodesicTree;
+
+def getModel(vpos, faces):
+    model = RichModel();
+    model.LoadModel(vpos, faces);
+    model.Preprocess();
+    return model;
+
+def getEdgeGraphDistances(vpos, faces, seed):
+    edges = np.vstack((faces[:,[0,1]], faces[:,[1,2]], faces[:,[2,0]]));
+    lengths = np.sqrt(np.sum((vpos[edges[:,0]] - vpos[edges[:,1]])**2, axis=1));
+    graph = spsp.coo_matrix((lengths, (edges[:,0], edges[:,1])), shape=(len(vpos), len(vpos))).tocsr();
+    return dijkstra(graph, directed=False, indices=seed);
+
+def propagate(model, seed, **bounds):
+    alg = CICHWithFurtherPriorityQueue(inputModel=model, indexOfSourceVerts=[seed], **bounds);
+    alg.Execute();
+    return alg;
+
+def test_unit_square_matches_py_chenhancc():
+    model = getModel(np.array([[0,0,0],[1,0,0],[1,1,0],[0,1,0]], dtype=float), np.array([[0,1,2],[0,2,3]]));
+    assert model.GetNumOfEdges() == 10;
+    assert model.GetNumOfBoundries() == 1 and model.GetNumOfComponents() == 1;
+    alg = propagate(model, 0);
+    distances = np.frombuffer(alg.m_InfoAtVertices.disUptodate);
+    assert np.allclose(distances, [0.0, 1.0, np.sqrt(2.0), 1.0]);
+    path, source = alg.FindSourceVertex(2);
+    assert source == 0;
+    assert [(p.index, p.isVertex) for p in path] == [(2, True), (0, True)];
+
+def test_edges_are_consistent(sphere):
+    model = getModel(*sphere);
+    arrays = model.m_EdgeArrays;
+    inner = arrays['indexOfOppositeVert'] != -1;
+    assert model.IsClosedModel() and np.all(inner);
+    assert np.all(arrays['indexOfLeftVert'] == arrays['indexOfRightVert'][arrays['indexOfReverseEdge']]);
+    #the left child edge starts at the left vertex and ends at the opposite vertex
+    assert np.all(arrays['indexOfLeftVert'][arrays['indexOfLeftEdge']] == arrays['indexOfLeftVert']);
+    assert np.all(arrays['indexOfRightVert'][arrays['indexOfLeftEdge']] == arrays['indexOfOppositeVert']);
+
+def test_plane_distances(plane):
+    vpos, faces = plane;
+    model = getModel(vpos, faces);
+    for seed in range(len(vpos)):
+        distances = np.frombuffer(propagate(model, seed).m_InfoAtVertices.disUptodate);
+        euclidean = np.sqrt(np.sum((vpos - vpos[seed])**2, axis=1));
+        assert np.all(distances <= getEdgeGraphDistances(vpos, faces, seed) + 1e-9);
+        assert np.all(distances >= euclidean - 1e-9);
+        #from the corner and the center every straight line stays inside the
+        #triangles it crosses (as in py_chenhancc, windows running along the
+        #boundary can miss a few vertices from the other seeds)
+        if(seed in (0, 12)):
+            assert np.allclose(distances, euclidean, atol=1e-9);
+
+def test_sphere_distances_between_bounds(sphere):
+    vpos, faces = sphere;
+    distances = np.frombuffer(propagate(getModel(vpos, faces), 0).m_InfoAtVertices.disUptodate);
+    upper = getEdgeGraphDistances(vpos, faces, 0);
+    chords = np.sqrt(np.sum((vpos - vpos[0])**2, axis=1));
+    assert np.all(distances <= upper + 1e-9);
+    assert np.all(distances >= chords - 1e-9);
+    #the polyhedron is inscribed in the unit sphere, pole to pole is a bit below pi
+    assert np.pi * 0.98 < distances[-1] < np.pi;
+
+def test_bounded_propagation(sphere):
+    vpos, faces = sphere;
+    model = getModel(vpos, faces);
+    full = np.frombuffer(propagate(model, 0).m_InfoAtVertices.disUptodate);
+    target = 30;
+    alg = propagate(model, 0, indexOfTargetVert=target);
+    assert alg.fTerminatedEarly and alg.GetVisitedFraction() < 1.0;
+    assert np.isclose(alg.m_InfoAtVertices.disUptodate[target], full[target]);
+    alg = propagate(model, 0, maxDistance=1.0);
+    reached = np.frombuffer(alg.m_InfoAtVertices.disUptodate) <= 1.0;
+    assert np.allclose(np.frombuffer(alg.m_InfoAtVertices.disUptodate)[reached], full[reached]);
+    assert alg.GetVisitedFraction() < 1.0;
+
+def test_trace_paths_and_geodesic_tree(sphere):
+    vpos, faces = sphere;
+    model = getModel(vpos, faces);
+    alg = propagate(model, 0);
+    targets = [len(vpos) - 1, 40, 0];
+    first, second, proportions, offsets = alg.TracePaths(targets);
+    assert offsets[0] == 0 and offsets[-1] == len(proportions);
+    points = (1.0 - proportions)[:,None] * vpos[first] + proportions[:,None] * vpos[second];
+    for k, target in enumerate(targets):
+        path, source = alg.FindSourceVertex(target);
+        assert source == 0;
+        expected = np.array([p.Get3DPoint(model) for p in path]);
+        assert np.allclose(points[offsets[k]:offsets[k+1]], expected);
+        length = np.sum(np.sqrt(np.sum(np.diff(expected, axis=0)**2, axis=1)));
+        assert np.isclose(length, alg.m_InfoAtVertices.disUptodate[target]);
+    
+    parents, parentEdges, entryProps = alg.GetGeodesicTree();
+    assert parents[0] == -1 and np.all(parents[1:] >= 0);
+    fromEdge = parentEdges != -1;
+    assert np.all(model.m_EdgeArrays['indexOfOppositeVert'][parentEdges[fromEdge]] == np.flatnonzero(fromEdge));
+    assert np.all((entryProps[fromEdge] >= 0.0) & (entryProps[fromEdge] <= 1.0));
+
+def test_paths_from_compact_tree(sphere):
+    vpos, faces = sphere;
+    model = getModel(vpos, faces);
+    alg = propagate(model, 7);
+    infos = alg.GetVertexDistances();
+    arrays = getTreeArrays(infos);
+    #The records (as py_chenhancc returns them) convert to the same arrays
+    for values, expected in zip(getTreeArrays(list(infos)), arrays):
+        assert values.dtype == expected.dtype and np.array_equal(values, expected);
+    tree = GeodesicTree(model, *arrays);
+    assert tree.nbytes == sum(values.nbytes for values in arrays);
+    
+    targets = list(range(len(vpos)));
+    first, second, proportions, offsets = tree.TracePaths(targets);
+    expected = alg.TracePaths(targets);
+    assert np.array_equal(first, expected[0]) and np.array_equal(second, expected[1]) and np.array_equal(offsets, expected[3]);
+    #entry proportions are stored in float32
+    assert np.allclose(proportions, expected[2], atol=1e-5);
+    path, source = tree.FindSourceVertex(len(vpos) - 1);
+    assert source == 7 and path[0].index == len(vpos) - 1;
+
+def test_edge_model_traces_like_rich_model(sphere):
+    vpos, faces = sphere;
+    model = getModel(vpos, faces);
+    edgemodel = EdgeModel();
+    edgemodel.LoadModel(vpos, faces);
+    edgemodel.Preprocess();
+    assert edgemodel.GetNumOfEdges() == model.GetNumOfEdges();
+    for name, values in model.m_EdgeArrays.items():
+        assert np.array_equal(edgemodel.m_EdgeArrays[name], values);
+    for index in (0, 1, model.GetNumOfEdges() - 1):
+        edge, expected = edgemodel.Edge(index), model.Edge(index);
+        assert edge.indexOfRightEdge == expected.indexOfRightEdge and edge.matrixRotatedToLeftEdge.first == expected.matrixRotatedToLeftEdge.first;
+    
+    arrays = getTreeArrays(propagate(model, 7).GetVertexDistances());
+    targets = list(range(len(vpos)));
+    traced = GeodesicTree(edgemodel, *arrays).TracePaths(targets);
+    expected = GeodesicTree(model, *arrays).TracePaths(targets);
+    for values, expected_values in zip(traced, expected):
+        assert np.array_equal(values, expected_values);
@@ -0,0 +1,201 @@
+import numpy as np;
+import scipy.sparse as spsp;
+from scipy.sparse.linalg import eigsh;
+from scipy.sparse.csgraph import dijkstra;
+
+from GenericMarkerCreator28.utils import meshlaplacians;
+from GenericMarkerCreator28.utils.meshlaplacians import getCotangentLaplacian, getMixedVoronoiAreas, extendEigens, getShiftInvertSolver;
+from GenericMarkerCreator28.utils import spectralsignatures;
+from GenericMarkerCreator28.utils.spectralsignatures import get_hks, HKSColumns, get_wks, getWKS, getHKSTimes, applySpectralFilterBank, getHeatBatch;
+from GenericMarkerCreator28.geodesics.HeatMethod import HeatMethod;
+from GenericMarkerCreator28.geodesics.FastMarching import FastMarching;
+from conftest import getPlane, getSphere;
+
+def getTriangleAreas(vpos, faces):
+    ab = vpos[faces[:,1]] - vpos[faces[:,0]];
+    ac = vpos[faces[:,2]] - vpos[faces[:,0]];
+    return 0.5 * np.sqrt(np.sum(np.cross(ab, ac)**2, axis=1));
+
+def getCornerAngles(vpos, faces):
+    angles = np.zeros(faces.shape);
+    for i in range(3):
+        e1 = vpos[faces[:,(i+1)%3]] - vpos[faces[:,i]];
+        e2 = vpos[faces[:,(i+2)%3]] - vpos[faces[:,i]];
+        cosine = np.sum(e1 * e2, axis=1) / np.sqrt(np.sum(e1**2, axis=1) * np.sum(e2**2, axis=1));
+        angles[:,i] = np.arccos(np.clip(cosine, -1.0, 1.0));
+    return angles;
+
+#The cotangent laplacian as get_matC2 built it before it was vectorized, one
+#sparse matrix per corner
+def getLoopCotangentLaplacian(vpos, faces):
+    angles = getCornerAngles(vpos, faces);
+    N = vpos.shape[0];
+    L = spsp.csr_matrix((N, N), dtype=np.double);
+    for i in range(1,4):
+        i1, i2, i3 = (i-1) % 3, i % 3, (i+1) % 3;
+        L = L + spsp.csr_matrix((-1.0 / np.tan(angles[:, i3]), (faces[:,i1], faces[:,i2])), shape=(N, N));
+    L = 0.5 * (L + L.T);
+    diagonals = -np.asarray(np.sum(L, 1)).ravel();
+    return spsp.diags(diagonals) + L;
+
+#A plane grid with jittered interior vertices, it has obtuse triangles
+def getJitteredPlane(n=7):
+    vpos, faces = getPlane(n);
+    interior = (vpos[:,0] > 0.0) & (vpos[:,0] < 1.0) & (vpos[:,1] > 0.0) & (vpos[:,1] < 1.0);
+    rng = np.random.default_rng(3);
+    vpos[interior, :2] += rng.uniform(-0.3, 0.3, (np.count_nonzero(interior), 2)) / (n - 1);
+    return vpos, faces;
+
+def getRandomBasis(N=40, K=8):
+    rng = np.random.default_rng(7);
+    eva = np.concatenate(([0.0], np.sort(rng.uniform(0.5, 30.0, K-1))));
+    eve = rng.standard_normal((N, K));
+    areas = rng.uniform(0.5, 1.5, N);
+    return eva, eve, spsp.diags(areas);
+
+def test_cotangent_laplacian_matches_loop():
+    for vpos, faces in (getJitteredPlane(), getSphere(6, 10)):
+        L = getCotangentLaplacian(vpos, faces);
+        assert np.allclose(L.toarray(), getLoopCotangentLaplacian(vpos, faces).toarray(), atol=1e-10);
+        assert np.allclose(L.dot(np.ones(len(vpos))), 0.0, atol=1e-10);
+
+def test_mixed_areas_sum_to_surface_area():
+    for vpos, faces in (getPlane(6), getJitteredPlane(), getSphere()):
+        areas = getMixedVoronoiAreas(vpos, faces);
+        assert np.all(areas > 0.0);
+        assert np.isclose(areas.sum(), getTriangleAreas(vpos, faces).sum());
+
+def test_extend_eigens_matches_eigsh():
+    vpos, faces = getSphere(10, 20);
+    L = getCotangentLaplacian(vpos, faces);
+    A = spsp.diags(getMixedVoronoiAreas(vpos, faces));
+    #1 + 3 + 5 eigenvalues close the first eigen spaces of the sphere
+    direct_eva, __ = eigsh(L, 9, M=A, which='LM', sigma=-1e-8);
+    eva, eve = extendEigens(A, L, direct_eva[:4], eigsh(L, 4, M=A, which='LM', sigma=-1e-8)[1], 9);
+    assert np.allclose(eva, np.sort(direct_eva), atol=1e-8);
+    assert np.allclose(L.dot(eve), A.dot(eve) * eva[None,:], atol=1e-7);
+    assert np.allclose(eve.T.dot(A.dot(eve)), np.eye(9), atol=1e-7);
+
+def test_shift_invert_factors_are_capped():
+    vpos, faces = getSphere(8, 16);
+    L = getCotangentLaplacian(vpos, faces);
+    A = spsp.diags(getMixedVoronoiAreas(vpos, faces));
+    previous = meshlaplacians.SHIFT_INVERT_MAX_BYTES;
+    try:
+        solver = getShiftInvertSolver(A, L, -0.5);
+        factor_bytes = meshlaplacians.SHIFT_INVERT_FACTOR_BYTES[(id(L), id(A), -0.5)];
+        assert factor_bytes > 0;
+        meshlaplacians.setShiftInvertMaxBytes(factor_bytes);
+        getShiftInvertSolver(A, L, -0.25);
+        key = (id(L), id(A), -0.25);
+        #The older factor was evicted to fit the cap, the solvers still work
+        assert (id(L), id(A), -0.5) not in meshlaplacians.SHIFT_INVERT_FACTORS;
+        assert key in meshlaplacians.SHIFT_INVERT_FACTORS;
+        b = np.ones(len(vpos));
+        assert np.allclose((L + 0.5 * A).dot(solver(b)), b);
+        #and the factors of a collected matrix are dropped with it
+        del L;
+        assert key not in meshlaplacians.SHIFT_INVERT_FACTORS;
+    finally:
+        meshlaplacians.setShiftInvertMaxBytes(previous);
+
+def test_hks_matches_loop():
+    eva, eve, A = getRandomBasis();
+    times = getHKSTimes(12, 0.1, 10.0);
+    k = np.zeros((eve.shape[0], len(times)));
+    for idx, t in enumerate(times):
+        k[:,idx] = (np.exp(-t*eva)[None,:]*eve*eve).sum(axis=1);
+    vertex_areas = A.diagonal();
+    expected = k / ((vertex_areas[:,None]*k).sum(axis=0) / vertex_areas.sum());
+    hks = get_hks(eva, eve, A, 12, 0.1, 10.0);
+    assert np.allclose(hks, expected);
+    columns = HKSColumns(eva, np.square(eve), A, times);
+    for index in (0, 5, 11):
+        assert np.allclose(columns.column(index), expected[:,index]);
+
+def test_wks_matches_loop():
+    eva, eve, __ = getRandomBasis();
+    #get_wks, one energy step at a time over the sorted eigen pairs
+    idx = np.argsort(np.abs(eva));
+    sorted_eva, sorted_eve = np.abs(eva)[idx[1:]], eve[:, idx[1:]];
+    energy_steps = np.log(np.linspace(sorted_eva[1], sorted_eva[-1], 6));
+    sigma = 7 * (energy_steps.max() - energy_steps.min()) / energy_steps.size;
+    expected = np.zeros((eve.shape[0], 6));
+    for index, e in enumerate(energy_steps):
+        coeff = np.exp(-(e-np.log(sorted_eva))**2/(2*sigma));
+        expected[:, index] = 1/coeff.sum() * (sorted_eve**2).dot(coeff);
+    assert np.allclose(get_wks(eva, eve, num_steps=6), expected);
+    assert np.allclose(get_wks(eva, eve, num_steps=6, max_bytes=256), expected);
+
+    #getWKS
+    log_E = np.log(np.maximum(np.abs(eva), 1e-6));
+    e = np.linspace(log_E[1], np.max(log_E) / 1.02, 5);
+    sigma_inv = 2 * ((e[1]-e[0]) * 6)**2;
+    expected = np.zeros((eve.shape[0], 5));
+    for i in range(5):
+        weights = np.exp((-(e[i] - log_E)**2) / sigma_inv);
+        expected[:,i] = np.sum(eve**2 * weights[None,:], 1) / np.sum(weights);
+    assert np.allclose(getWKS(None, eva, eve, 5, 6), expected);
+    assert np.allclose(getWKS(None, eva, eve, 5, 6, dtype=np.float32), expected, rtol=1e-5);
+
+def test_filter_bank_chunks():
+    __, eve, __ = getRandomBasis();
+    bank = np.random.default_rng(1).uniform(size=(eve.shape[1], 4));
+    expected = np.square(eve).dot(bank);
+    assert np.allclose(applySpectralFilterBank(eve, bank, max_bytes=100), expected);
+    assert np.allclose(applySpectralFilterBank(eve, bank, eigen_vectors_squared=np.square(eve), max_bytes=100), expected);
+
+def test_heat_batch_matches_single_sources(monkeypatch):
+    eva, eve, __ = getRandomBasis();
+    sources, times = [0, 5, 9], [0.01, 0.1];
+    for chunk_bytes in (64 * 1024 * 1024, 1):
+        monkeypatch.setattr(spectralsignatures, 'HEAT_BATCH_CHUNK_BYTES', chunk_bytes);
+        heat = getHeatBatch(eva, eve, sources, times, 10.0);
+        heat_stn = getHeatBatch(eva, eve, sources, times, 10.0, dtype=np.float32);
+        heat_snt = getHeatBatch(eva, eve, sources, times, 10.0, layout='SNT', dtype=np.float32);
+        assert heat_stn.dtype == np.float32 and heat_snt.dtype == np.float32;
+        for s, source in enumerate(sources):
+            for i, t in enumerate(times):
+                expected = eve.dot(10.0 * eve[source] * np.exp(-eva*t));
+                assert np.allclose(heat[s, i], expected);
+                assert np.allclose(heat_stn[s, i], expected, rtol=1e-5, atol=1e-4);
+                assert np.allclose(heat_snt[s, :, i], expected, rtol=1e-5, atol=1e-4);
+
+#Distances on the plane grid from the corner vertex 0, the grid is n x n with
+#spacing h and every square is split along the diagonal away from vertex 0
+def test_plane_distances():
+    n = 9;
+    vpos, faces = getPlane(n);
+    h = 1.0 / (n - 1);
+    i, j = np.meshgrid(np.arange(n), np.arange(n), indexing='ij');
+    euclidean = np.sqrt(np.sum(vpos**2, axis=1));
+    #Edge paths take the diagonals first, then the straight edges
+    grid = (np.sqrt(2.0) * np.minimum(i, j) + np.abs(i - j)).ravel() * h;
+
+    edges = np.vstack((faces[:,[0,1]], faces[:,[1,2]], faces[:,[2,0]]));
+    lengths = np.sqrt(np.sum((vpos[edges[:,0]] - vpos[edges[:,1]])**2, axis=1));
+    graph = spsp.coo_matrix((lengths, (edges[:,0], edges[:,1])), shape=(len(vpos), len(vpos))).tocsr();
+    assert np.allclose(dijkstra(graph, directed=False, indices=0), grid);
+
+    fmm = FastMarching(vpos, faces).distances(0);
+    assert np.all(fmm >= euclidean - 1e-9) and np.all(fmm <= grid + 1e-9);
+    assert np.max(np.abs(fmm - euclidean)) < 0.25 * h;
+
+    heat = HeatMethod(vpos, faces).distances(0);
+    assert np.max(np.abs(heat - euclidean)) < 0.6 * h;
+
+#Distances on the unit sphere from the north pole are the polar angles
+def test_sphere_distances(sphere):
+    vpos, faces = sphere;
+    arc = np.arccos(np.clip(vpos[:,2], -1.0, 1.0));
+
+    fmm = FastMarching(vpos, faces).distances(0);
+    assert np.max(np.abs(fmm - arc)) < 0.03;
+
+    heat = HeatMethod(vpos, faces).distances(0);
+    assert np.max(np.abs(heat - arc)) < 0.05;
+
+    bounded = FastMarching(vpos, faces).distances(0, radius=1.0);
+    reached = np.isfinite(bounded);
+    assert np.allclose(bounded[reached], fmm[reached]);
+    assert np.all(fmm[~reached] > 1.0);
@@ -9,6 +9,7 @@ from mathutils import Vector, Matrix;
 from mathutils.bvhtree import BVHTree;
 
 from gpu_extras.batch import batch_for_shader
+import numpy as np;
 
 UP_VECTOR_X = Vector((1, 0, 0))
 UP_VECTOR_Y = Vector((0, 1, 0))
@@ -343,6 +344,13 @@ def getPointBatch(context, useshader, location,*, color= (1, 0, 0, 1), pointsize
     return {'type': batch_type, 'batch': batch, 'color': color, 'pointsize': 5}
 
 def getHollowCircleBatch(context, useshader, location, normal,*, radius=5, resolution=20, color= (1, 0, 0, 1), linewidth=1):
+    positions = getHollowCirclePositions(location, normal, radius=radius, resolution=resolution)
+    batch_type = 'LINE_LOOP'
+    batch = batch_for_shader(useshader, 'LINE_LOOP', {'pos': positions})
+    return {'type': batch_type, 'batch': batch, 'color': color, 'linewidth': linewidth }
+
+#Positions of the LINE_LOOP drawn by getHollowCircleBatch
+def getHollowCirclePositions(location, normal,*, radius=5, resolution=20):
     fl_resolution = float(resolution);
 
     positions = []
@@ -375,10 +383,7 @@ def getHollowCircleBatch(context, useshader, location, normal,*, radius=5, resol
     
     positions.extend(positions_along_tangents)
     positions.extend(positions_along_normals)
-
-    batch_type = 'LINE_LOOP'
-    batch = batch_for_shader(useshader, 'LINE_LOOP', {'pos': positions})
-    return {'type': batch_type, 'batch': batch, 'color': color, 'linewidth': linewidth }
+    return positions
 
 
 def getPathBatch(context, useshader, path, *, color= (1, 0, 0, 1), pointsize=5):
@@ -840,4 +845,30 @@ def getMappedContourSegments(context, subject, reference, isocontours, reference
             mapped_segment = {'start':map_co_start, 'end':map_co_end, 'contour_index':segment['contour_index']};
             mappedcontours[0].append(mapped_segment);
     
-    return mappedcontours;
\ No newline at end of file
+    return mappedcontours;
+
+#Purpose: To turn a polyline (or a loop) into the vertex pairs of a 'LINES'
+#batch, so that many of them can be drawn by one batch
+#Returns: numpy (2 * segments) x 3 (float32)
+def getPolylineSegments(path, *, closed=False):
+    path = np.asarray(path, dtype=np.float32).reshape(-1, 3)
+    ends = np.roll(path, -1, axis=0) if closed else path[1:]
+    starts = path if closed else path[:-1]
+    segments = np.empty((starts.shape[0] * 2, 3), dtype=np.float32)
+    segments[0::2] = starts
+    segments[1::2] = ends
+    return segments
+
+#Purpose: One 'LINES' batch for any number of polylines given by getPolylineSegments
+def getMergedLinesBatch(context, useshader, segments, *, color= (1, 0, 0, 1), linewidth=1):
+    batch_type = 'LINES'
+    positions = np.concatenate(segments) if len(segments) else np.zeros((0, 3), dtype=np.float32)
+    batch = batch_for_shader(useshader, batch_type, {'pos': positions})
+    return {'type': batch_type, 'batch': batch, 'color': color, 'linewidth': linewidth}
+
+#Purpose: One 'POINTS' batch for any number of point arrays
+def getMergedPointsBatch(context, useshader, points, *, color= (1, 0, 0, 1), pointsize=5):
+    batch_type = 'POINTS'
+    positions = np.concatenate([np.asarray(p, dtype=np.float32).reshape(-1, 3) for p in points]) if len(points) else np.zeros((0, 3), dtype=np.float32)
+    batch = batch_for_shader(useshader, batch_type, {'pos': positions})
+    return {'type': batch_type, 'batch': batch, 'color': color, 'pointsize': pointsize}
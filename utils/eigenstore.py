@@ -0,0 +1,63 @@
+import bpy, os, hashlib, shutil;
+import numpy as np;
+import scipy.sparse as spsp;
+
+#On-disk store of the generalized eigen basis (L x = lambda A x) used by the
+#HKS, WKS and GISIF signatures. Every entry is a folder named after a hash of the
+#geometry fingerprint, eigen_k and the laplacian/area models, holding
+#eva.npy, eve.npy, A.npy (diagonal of the mass matrix) and L.npz.
+#The arrays are memory-mapped when loaded, so reopening a scan does not
+#have to read the whole N x K eigenvector matrix into memory
+EIGEN_STORE_FOLDER = 'eigenbasis';
+
+#Purpose: The folder holding the eigen basis entries of a mesh. It lives under
+#the signatures_dir of the mesh (next to the .blend by default) and falls back
+#to the blender temporary directory for unsaved files
+def getEigenStoreDirectory(mesh):
+    base = bpy.path.abspath(mesh.signatures_dir) if mesh.signatures_dir else '';
+    if(not base or not os.path.isdir(base)):
+        base = bpy.app.tempdir;
+    return os.path.join(base, EIGEN_STORE_FOLDER);
+
+def getEigenStoreKey(fingerprint, eigen_k, laplacian_model, area_model):
+    key = '%s-k%d-l%s-a%s'%(fingerprint, eigen_k, laplacian_model, area_model);
+    return hashlib.sha1(key.encode('utf-8')).hexdigest();
+
+def saveEigenBasis(mesh, key, eva, eve, L, A):
+    store = getEigenStoreDirectory(mesh);
+    entry = os.path.join(store, key);
+    if(os.path.isdir(entry)):
+        return entry;
+    #Write into a temporary folder and rename it so that a crash or a full
+    #disk never leaves a half written entry behind
+    partial = entry + '.partial';
+    try:
+        os.makedirs(partial, exist_ok=True);
+        np.save(os.path.join(partial, 'eva.npy'), np.asarray(eva));
+        np.save(os.path.join(partial, 'eve.npy'), np.asarray(eve));
+        np.save(os.path.join(partial, 'A.npy'), spsp.csr_matrix(A).diagonal());
+        spsp.save_npz(os.path.join(partial, 'L.npz'), spsp.csr_matrix(L));
+        os.replace(partial, entry);
+    except OSError as e:
+        print('COULD NOT SAVE THE EIGEN BASIS TO ', entry, e);
+        shutil.rmtree(partial, ignore_errors=True);
+        return None;
+    print('SAVED EIGEN BASIS TO ', entry);
+    return entry;
+
+#Returns: (found, eva, eve, L, A) with eva and eve memory-mapped read only
+def loadEigenBasis(mesh, key, *, mmap_mode='r'):
+    entry = os.path.join(getEigenStoreDirectory(mesh), key);
+    if(not os.path.isdir(entry)):
+        return False, None, None, None, None;
+    try:
+        eva = np.load(os.path.join(entry, 'eva.npy'), mmap_mode=mmap_mode);
+        eve = np.load(os.path.join(entry, 'eve.npy'), mmap_mode=mmap_mode);
+        areas = np.load(os.path.join(entry, 'A.npy'));
+        L = spsp.load_npz(os.path.join(entry, 'L.npz')).tocsr();
+    except (OSError, ValueError) as e:
+        print('COULD NOT LOAD THE EIGEN BASIS FROM ', entry, e);
+        return False, None, None, None, None;
+    A = spsp.dia_matrix((areas, [0]), shape=(areas.shape[0], areas.shape[0]));
+    print('LOADED EIGEN BASIS FROM ', entry);
+    return True, eva, eve, L, A;
@@ -11,6 +11,7 @@ from GenericMarkerCreator28.utils.staticutilities import getMarkerOwner, getGene
 from GenericMarkerCreator28.utils.meshmathutils import getBarycentricCoordinateFromPolygonFace, getGeneralCartesianFromBarycentre;
 from GenericMarkerCreator28.utils.mathandmatrices import getDuplicatedObject, getMeshVPos, setMeshVPOS, getWKSLaplacianMatrixCotangent, getColumnFilledMatrix;
 from GenericMarkerCreator28.utils.mathandmatrices import getBMMesh, ensurelookuptable;
+from GenericMarkerCreator28.utils.mesharrays import tagMeshArrays;
 
 '''
 apply_shape (String) - If not none create a shape key with a name in string value "apply_shape". 
@@ -79,6 +80,7 @@ def deformWithMapping(context, owner_mesh, map_to, apply_on_mesh, mapped_points,
         bm.to_mesh(apply_on_mesh.data);
         bm.free();
         bpy.ops.object.modifier_apply(modifier=v_group_name);
+        tagMeshArrays(apply_on_mesh);
     
     elif(invalid_indices.shape[0] == vpos.shape[0]):
         print('NO SOLUTION AVAILABLE FROM THIS MAPPING');
@@ -95,6 +97,7 @@ def deformWithMapping(context, owner_mesh, map_to, apply_on_mesh, mapped_points,
 
         for vertex in owner_mesh.data.vertices:
             shape_key.data[vertex.index].co = vpos[vertex.index]
+        tagMeshArrays(owner_mesh)
 
             
     return getMeshVPos(apply_on_mesh), invalid_indices.shape[0];
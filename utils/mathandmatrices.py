@@ -6,6 +6,12 @@ from scipy.sparse.linalg import eigsh;
 from scipy.sparse.linalg import lsqr;
 from mathutils import Vector;
 
+from GenericMarkerCreator28.utils.mesharrays import getMeshArrays, tagMeshArrays;
+from GenericMarkerCreator28.utils.meshlaplacians import SPARSITY_PATTERNS, SparsityPattern, assembleWithPattern;
+from GenericMarkerCreator28.utils.meshlaplacians import getCornerCotangents, getCotangentWeightsCOO, getCotangentWeightMatrix, getCotangentLaplacian, getMixedVoronoiAreas;
+from GenericMarkerCreator28.utils.meshlaplacians import SHIFT_INVERT_FACTORS, SHIFT_INVERT_STATS, isCholmodLoaded, getShiftInvertSolver, getShiftInvertOperator, shiftInvertEigsh, getShiftInvertStats;
+from GenericMarkerCreator28.utils.meshlaplacians import get_eigen, get_eigen2, extendEigens;
+
 # the representation of a point will be a tuple (x,y)
 # the representation of a polygon wil be a list of points [(x1,y1), (x2,y2), (x3,y3), ... ]
 # it is assumed that polygon is regular i.e. lines don't intersect each other (otherwise, it is questionable whether it is a polygon)
@@ -91,110 +97,20 @@ def solveLaplacianPositionsSoftConstraints(L, delta):
 
 def meanCurvatureLaplaceWeights(context, mesh, symmetric = False, normalized=False):
     start = time.time();
+    vpos = getMeshVPos(mesh);
+    faces = getMeshTriangles(mesh);
     
-    bm = getBMMesh(context, mesh, useeditmode=False);
-    ensurelookuptable(bm);
-    
-    rows = [];
-    cols = [];
-    data = [];
-    n = len(mesh.data.vertices);
-    for f in bm.faces:
-        v1, v2, v3 = [l.vert for l in f.loops];
-        v1v2 = v1.co - v2.co;
-        v1v3 = v1.co - v3.co;
-        
-        v2v1 = v2.co - v1.co;
-        v2v3 = v2.co - v3.co;
-        
-        v3v1 = v3.co - v1.co;
-        v3v2 = v3.co - v2.co;            
-        
-        cot1 = v2v1.dot(v3v1) / max(v2v1.cross(v3v1).length,1e-06);
-        cot2 = v3v2.dot(v1v2) / max(v3v2.cross(v1v2).length,1e-06);
-        cot3 = v1v3.dot(v2v3) / max(v1v3.cross(v2v3).length,1e-06);
-        
-        rows.append(v2.index);
-        cols.append(v3.index);
-        data.append(cot1);
-        
-        rows.append(v3.index);
-        cols.append(v2.index);
-        data.append(cot1);
-        
-        rows.append(v3.index);
-        cols.append(v1.index);
-        data.append(cot2);
-        
-        rows.append(v1.index);
-        cols.append(v3.index);
-        data.append(cot2);
-        
-        rows.append(v1.index);
-        cols.append(v2.index);
-        data.append(cot3);
-        
-        rows.append(v2.index);
-        cols.append(v1.index);
-        data.append(cot3);           
-    
-    W = spsp.csr_matrix((data, (rows, cols)), shape = (n,n));
+    topology = getMeshTopologyKey(mesh);
     
-    if(symmetric and not normalized):
-        sum_vector = W.sum(axis=0);
-        d = spsp.dia_matrix((sum_vector, [0]), shape=(n,n));
-        L = d - W;
-    elif(symmetric and normalized):
-        sum_vector = W.sum(axis=0);
-        sum_vector_powered = np.power(sum_vector, -0.5);
-        d = spsp.dia_matrix((sum_vector_powered, [0]), shape=(n,n));
-        eye = spsp.identity(n);
-        L = eye - d * W * d;
-    elif (not symmetric and normalized):
-        sum_vector = W.sum(axis=0);
-        sum_vector_powered = np.power(sum_vector, -1.0);
-        d = spsp.dia_matrix((sum_vector_powered, [0]), shape=(n,n));
-        eye = spsp.identity(n);
-        L = eye - d * W;
+    if(not symmetric and not normalized):
+        L = getCotangentWeightMatrix(vpos, faces, scale=1.0, topology=topology);
     else:
-        L = W;
-    
-    bm.free();
-       
-    if(not context.mode == "OBJECT"):
-        bpy.ops.object.mode_set(mode='OBJECT', toggle=False);
+        L = getCotangentLaplacian(vpos, faces, symmetric=symmetric, normalized=normalized, scale=1.0, topology=topology);
     
     end = time.time();
     print("FINISHED CONSTRUCTING WEIGHTS FOR ", mesh.name, " IN ", (end - start)); 
     return L;
 
-#Purpose: To return a sparse matrix representing a laplacian matrix with
-#cotangent weights in the upper square part and anchors as the lower rows
-#Inputs: mesh (polygon mesh object), anchorsIdx (indices of the anchor points)
-#Returns: L (An (N+K) x N sparse matrix, where N is the number of vertices
-#and K is the number of anchors)
-def getLaplacianMatrixCotangent(context, mesh, anchorsIdx=[], anchorWeights=[], *, defaultWeight=1.0):
-    (I, J, V, _) = getLaplacianMeshUpperIdxs(context, mesh, True);
-    #Now fill in the anchors and finish making the Laplacian matrix
-    N = len(mesh.data.vertices);
-    K = len(anchorsIdx);
-    for i in range(K):
-        I.append(N+i);
-        J.append(anchorsIdx[i]);
-        V.append(1.0);
-    [I, J, V] = [np.array(I), np.array(J), np.array(V)];
-    L = spsp.coo_matrix((V, (I, J)), shape=(N+K, N)).tocsr();
-    return L;
-
-def getLaplacianMeshNormalized(context, mesh, cotangent = False):
-    (I, J, V, weights) = getLaplacianMeshUpperIdxs(context, mesh, cotangent);
-    N = len(mesh.data.vertices);
-    L = spsp.coo_matrix((V, (I, J)), shape=(N, N)).tocsr();
-    weights = np.array(weights)[:, None];
-    weights[weights == 0] = 1;
-    L = L/weights;
-    return L;
-
 def getFaceCotangent(v1, v2, f, mesh):
     if not f:
         return 0.0;
@@ -319,7 +235,7 @@ def getRowsColumnsData(vpos, faces, edges, index=0):
 def getMeshAdjacency(mesh):
     vpos = getMeshVPos(mesh);
     V_N = vpos.shape[0];
-    faces = getMeshFaces(mesh);
+    faces = getMeshTriangles(mesh);
     edges = getEdgeVertices(mesh);
     
     r1, c1, d1 = getRowsColumnsData(vpos, faces, edges, index=0);
@@ -333,23 +249,20 @@ def getMeshAdjacency(mesh):
 
 #Purpose: To return a sparse matrix representing a laplacian matrix with
 #cotangent weights in the upper square part and anchors as the lower rows
-#Inputs: mesh (polygon mesh object), anchorsIdx (indices of the anchor points)
+#Inputs: mesh (polygon mesh object), anchorsIdx (indices of the anchor points),
+#anchorWeights (weight of each anchor row, defaultWeight if not given)
 #Returns: L (An (N+K) x N sparse matrix, where N is the number of vertices
 #and K is the number of anchors)
 def getLaplacianMatrixCotangent(context, mesh, anchorsIdx=[], anchorWeights=[], *, defaultWeight=1.0):
-    (I, J, V, _) = getLaplacianMeshUpperIdxs(context, mesh, True);
-    #Now fill in the anchors and finish making the Laplacian matrix
-    N = len(mesh.data.vertices);
-    K = len(anchorsIdx);
-    for i in range(K):
-        I.append(N+i);
-        J.append(anchorsIdx[i]);
-        V.append(1.0);
-    [I, J, V] = [np.array(I), np.array(J), np.array(V)];
-    L = spsp.coo_matrix((V, (I, J)), shape=(N+K, N)).tocsr();
-    return L;
+    vpos = getMeshVPos(mesh);
+    faces = getMeshTriangles(mesh);
+    return getCotangentLaplacian(vpos, faces, anchors=anchorsIdx, anchor_weights=anchorWeights, default_weight=defaultWeight, topology=getMeshTopologyKey(mesh));
 
 def getLaplacianMeshNormalized(context, mesh, cotangent = False):
+    if(cotangent):
+        vpos = getMeshVPos(mesh);
+        faces = getMeshTriangles(mesh);
+        return getCotangentLaplacian(vpos, faces, symmetric=False, normalized=True, topology=getMeshTopologyKey(mesh));
     (I, J, V, weights) = getLaplacianMeshUpperIdxs(context, mesh, cotangent);
     N = len(mesh.data.vertices);
     L = spsp.coo_matrix((V, (I, J)), shape=(N, N)).tocsr();
@@ -358,65 +271,28 @@ def getLaplacianMeshNormalized(context, mesh, cotangent = False):
     L = L/weights;
     return L;
 
+##############################################################
+##              Cotangent Laplacian Assembly                ##
+##############################################################
+
 def angle(e1,e2):
     return np.arccos((e1*e2).sum(axis=1)/(np.linalg.norm(e1,axis=1)*np.linalg.norm(e2,axis=1)));
 
 
-#Sparse matrix of weights for each vertex to its neighbours
+#Sparse matrix of weights for each vertex to its neighbours (negative semi-definite)
 def get_matC(context, mesh):
-    ver = getMeshVPos(mesh);
-    tri = getMeshFaces(mesh);
-    
-    v1 = ver[tri[:,0],:]
-    v2 = ver[tri[:,1],:]
-    v3 = ver[tri[:,2],:]        
-    e1 = v2-v1
-    e2 = v3-v2
-    e3 = v1-v3  
-    
-    hcot_12 = 0.5/np.tan(angle(-e2,e3))
-    hcot_13 = 0.5/np.tan(angle(-e1,e2))
-    hcot_23 = 0.5/np.tan(angle(-e3,e1))
-    
-    data = np.array([hcot_12,hcot_23,hcot_13]).flatten()
-    row_ind = np.array([tri[:,0],tri[:,1],tri[:,2]]).flatten()
-    col_ind = np.array([tri[:,1],tri[:,2],tri[:,0]]).flatten()
-    M = N = ver.shape[0]
-    matC = spsp.csr_matrix((data,(row_ind,col_ind)),shape=(M,N))
-    matC = matC + matC.T
-    dia = -matC.sum(axis=1).A.flatten()
-    matC = matC + spsp.dia_matrix((dia,0), shape=(M,N))
-    
-    return matC;
+    return -get_matC2(context, mesh);
 
 #Sparse matrix of weights for each vertex to its neighbours
 def get_matC2(context, mesh):
     vertices = getMeshVPos(mesh);
-    faces = getMeshFaces(mesh);
-    angles = getMeshFaceAngles(mesh);
-    num_vertices = vertices.shape[0];    
-    cot_angles = 1.0 / np.tan(angles);
-    L = spsp.csr_matrix((num_vertices, num_vertices), dtype=np.double);
-    for i in range(1,4):
-        i1 = (i-1) % 3;
-        i2 = (i) % 3;
-        i3 = (i+1) % 3;
-        v = -1.0 / np.tan(angles[:, i3]);
-        i = faces[:,i1];
-        j = faces[:,i2];
-        add_mat = spsp.csr_matrix((v, (i, j)), shape=(num_vertices, num_vertices), dtype=np.double);
-        L = L + add_mat;
-        
-    L = 0.5 * (L + L.T);
-    diagonals = -np.sum(L,1).reshape(num_vertices, );
-    D = spsp.dia_matrix((diagonals, [0]), shape=(num_vertices, num_vertices), dtype=np.double);
-    L = D + L;    
-    return L;
+    faces = getMeshTriangles(mesh);
+    return getCotangentLaplacian(vertices, faces, topology=getMeshTopologyKey(mesh));
 
 #Matrix M is always a diagonal matrix that is used for AX=b (example eigen decomposition_
 def get_matM(context, mesh, ANormalize=False):
     ver = getMeshVPos(mesh);
-    tri = getMeshFaces(mesh);
+    tri = getMeshTriangles(mesh);
     
     v1 = ver[tri[:,0],:]
     v2 = ver[tri[:,1],:]
@@ -432,7 +308,7 @@ def get_matM(context, mesh, ANormalize=False):
     data = (area/3).repeat(3)
     row_ind = col_ind = tri.flatten()
     M = N = ver.shape[0]
-    matM = spsp.csr_matrix((data,(row_ind,col_ind)),shape=(M,N))
+    matM = assembleWithPattern(row_ind, col_ind, data, (M,N), getMeshTopologyKey(mesh), 'BARYCENTRIC_MASS')
     return matM, matM;
 
 #Matrix M is always a diagonal matrix that is used for AX=b (example eigen decomposition_
@@ -442,10 +318,10 @@ def get_matM2(context, mesh, ANormalize=True):
         d[key] += 1;
         return val; 
     vertices = getMeshVPos(mesh);
-    faces = getMeshFaces(mesh);
+    faces = getMeshTriangles(mesh);
     num_vertices = vertices.shape[0];
     num_faces = faces.shape[0];
-    angles = getMeshFaceAngles(mesh);
+    angles = getMeshTriangleAngles(mesh);
     cotangles = 1.0 / np.tan(angles);
     squared_edge_length = np.zeros((num_faces, 3));
     faces_area = np.zeros((num_faces, 1));
@@ -534,11 +410,11 @@ def get_matM3(context, mesh, ANormalize=True):
     #Positions of each vertex as a numpy N x 3  (float)
     vertices = getMeshVPos(mesh);
     #Vertex indices in each row representing a face index as numpy N x 3 (int)
-    faces = getMeshFaces(mesh);    
+    faces = getMeshTriangles(mesh);    
     num_vertices = vertices.shape[0];
     num_faces = faces.shape[0];    
     #Angle of the corner of a face in each row representing a face index as numpy N x 3 (float)
-    angles = getMeshFaceAngles(mesh);
+    angles = getMeshTriangleAngles(mesh);
     #Cotangent applied to all the angles in a face
     cotangles = 1.0 / np.tan(angles);
     squared_edge_length = np.zeros((num_faces, 3));
@@ -629,45 +505,73 @@ def get_matM3(context, mesh, ANormalize=True):
     
     return Am, np.array(A.data);
 
-def get_eigen(matM,matC,n):
-    eva, eve = eigsh(matC,k=n,M=matM,sigma=-1e-8,which='LM');
-    print('SHAPE OF EIGENS :: %s, %s'%(eva.shape, eve.shape));
-    return eva,eve
-
-def get_eigen2(matM, matC, n):
-    num_vertices = matC.shape[0];
-    #Calculate the eigen values and vectors
-#     eva, eve = eigs(L,k=K,M=A,sigma=-1e-5,which='LM');
-    eva, eve = eigsh(matC,k=n,M=matM,sigma=-1e-8,which='LM');
-    #Sort the eigen values from smallest to highest
-    # and ensure to use the real part of eigen values, because there might be complex numbers
-    eva = np.abs(np.real(eva));
-    idx = np.argsort(eva);
-    eva = eva[idx];
-    eve = eve[:, idx];    
-    eve = np.real(eve);
-    print('SHAPE OF EIGENS :: %s, %s'%(eva.shape, eve.shape));
-    return eva, eve;
+#Matrix M is always a diagonal matrix that is used for AX=b (example eigen decomposition_
+def get_matM_mixed(context, mesh, ANormalize=True):
+    vertices = getMeshVPos(mesh);
+    faces = getMeshTriangles(mesh);
+    num_vertices = vertices.shape[0];
+    A = np.maximum(getMixedVoronoiAreas(vertices, faces), 1e-8);
+    if(ANormalize):
+        A = A / A.sum();
+    Am = spsp.dia_matrix((A, [0]), shape=(num_vertices, num_vertices));
+    return Am, A;
+
+#Purpose: Regression harness for the vertex area models. Compares every model of
+#getMeshVoronoiAreas against the mixed voronoi areas of model 4 and checks
+#that the unnormalized mixed areas add up to the surface area of the mesh
+#Inputs: mesh (blender object), include_slow (also run getMeshVoronoiAreasSlow,
+#which is O(V.F) and only sensible on small meshes)
+#Returns: dictionary of model name -> max absolute difference of normalized areas
+def compareVoronoiAreaModels(context, mesh, include_slow=False):
+    vertices = getMeshVPos(mesh);
+    faces = getMeshTriangles(mesh);
+    mixed = getMixedVoronoiAreas(vertices, faces);
+    surface_area, __ = getFaceAreas(context, mesh);
+    print('MIXED VORONOI TOTAL : %f, SURFACE AREA : %f'%(mixed.sum(), surface_area.sum()));
+    
+    reference = np.maximum(mixed, 1e-8);
+    reference = reference / reference.sum();
+    models = {'BARYCENTRIC':1, 'MATM2':2, 'MATM3':3};
+    differences = {'SURFACE_AREA':abs(mixed.sum() - surface_area.sum())};
+    for name, model in models.items():
+        __, A = getMeshVoronoiAreas(context, mesh, model=model);
+        A = np.asarray(A, dtype=float).reshape(-1);
+        differences[name] = np.max(np.abs((A / A.sum()) - reference));
+    if(include_slow):
+        __, A = getMeshVoronoiAreasSlow(context, mesh);
+        differences['SLOW'] = np.max(np.abs(A - reference));
+    
+    for name, difference in differences.items():
+        print('VORONOI MODEL %s MAX DIFFERENCE : %s'%(name, difference));
+    return differences;
 
 def getWKSLaplacianMatrixCotangent(context, mesh, model=2):
     if(model == 1):
         return get_matC(context, mesh);
     return get_matC2(context, mesh);
 
-def getMeshVoronoiAreas(context, mesh, model=2):
+def getMeshVoronoiAreas(context, mesh, model=4):
     if(model == 1):
         return get_matM(context, mesh);
-    return get_matM2(context, mesh);
-
-def getWKSEigens(mesh, L, A, K=3, model=1):
+    elif(model == 2):
+        return get_matM2(context, mesh);
+    elif(model == 3):
+        return get_matM3(context, mesh);
+    return get_matM_mixed(context, mesh);
+
+#When eva and eve of an earlier solve are given they are reused: a smaller K
+#slices them and a larger K only solves for the missing eigen pairs
+def getWKSEigens(mesh, L, A, K=3, model=1, *, eva=None, eve=None):
+    if(eva is not None and eve is not None and len(eva)):
+        return extendEigens(A, L, eva, eve, K);
     if(model == 1):
         return get_eigen(A, L, K);    
     return get_eigen2(A, L, K);
 
 def getMeshVoronoiAreasSlow(context, mesh):
     vertices = getMeshVPos(mesh);
-    faces = getMeshFaces(mesh);
-    angles = getMeshFaceAngles(mesh);
+    faces = getMeshTriangles(mesh);
+    angles = getMeshTriangleAngles(mesh);
     squared_edge_length = 0*faces;
     
     num_vertices = vertices.shape[0];
@@ -716,69 +620,117 @@ def getMeshVoronoiAreasSlow(context, mesh):
     print('FINISHING WITH AREA COMPUTATION FINALIZATION');
     return Am, A;
 
+#Writes all the positions with one foreach_set. If vpos has fewer rows than the
+#mesh has vertices only the first vpos.shape[0] vertices are moved
 def setMeshVPOS(mesh, vpos):
-    for index in range(vpos.shape[0]):
-        vect = vpos[index];
-        try:
-            mesh.data.vertices[index].co = vect;
-        except ValueError:
-            print(index, vect);
-            mesh.data.vertices[index].co = vect[0];
-            raise ValueError;
+    vertices = mesh.data.vertices;
+    vpos = np.asarray(vpos, dtype=np.float32).reshape(-1, 3);
+    if(vpos.shape[0] != len(vertices)):
+        co = np.empty(len(vertices) * 3, dtype=np.float32);
+        vertices.foreach_get('co', co);
+        co.shape = (len(vertices), 3);
+        co[:vpos.shape[0]] = vpos;
+        vpos = co;
+    vertices.foreach_set('co', vpos.ravel());
+    mesh.data.update();
+    tagMeshArrays(mesh);
+
+#Purpose: To write one value per vertex into a named attribute, created (or
+#recreated if its type differs) as needed
+#Inputs: values (N), attribute_type ('INT' or 'FLOAT')
+#Blender before 2.91 has no generic attributes, there the values go into a
+#bmesh vertex layer of the same name one vertex at a time
+def setMeshVertexAttribute(mesh, name, values, attribute_type='FLOAT'):
+    dtype = np.int32 if attribute_type == 'INT' else np.float32;
+    values = np.ascontiguousarray(values, dtype=dtype).ravel();
+    if(hasattr(mesh.data, 'attributes')):
+        attribute = mesh.data.attributes.get(name);
+        if(attribute and (attribute.data_type != attribute_type or attribute.domain != 'POINT')):
+            mesh.data.attributes.remove(attribute);
+            attribute = None;
+        if(not attribute):
+            attribute = mesh.data.attributes.new(name=name, type=attribute_type, domain='POINT');
+        attribute.data.foreach_set('value', values);
+    else:
+        bm = bmesh.new();
+        bm.from_mesh(mesh.data);
+        layers = bm.verts.layers.int if attribute_type == 'INT' else bm.verts.layers.float;
+        layer = layers.get(name) or layers.new(name);
+        for v, value in zip(bm.verts, values.tolist()):
+            v[layer] = value;
+        bm.to_mesh(mesh.data);
+        bm.free();
     mesh.data.update();
 
 def getMeshVPos(mesh, extra_points=[]):
-    dg = bpy.context.evaluated_depsgraph_get()
-    eval_obj = bpy.context.object.evaluated_get(dg)
-    obj_data = eval_obj.to_mesh()
-    
-    vpos = [];
-    for v in obj_data.vertices:
-        vpos.append([v.co.x, v.co.y, v.co.z]);
-    
-    for p in extra_points:
-        vpos.append([p.x, p.y, p.z]);
-    
-    return np.array(vpos);
+    vpos = getMeshArrays(mesh).vpos;
+    if(len(extra_points)):
+        extra_vpos = np.array([[p.x, p.y, p.z] for p in extra_points], dtype=float);
+        return np.vstack((vpos, extra_vpos));
+    return vpos;
 
 def getMeshNormals(mesh):
-    N = len(mesh.data.vertices);
-    normals = np.zeros((N,3));
-    for v in mesh.data.vertices:
-        normals[v.index] = v.normal.normalized().to_tuple();
-    
-    return normals;
-
-
+    return getMeshArrays(mesh).normals;
+
+#Purpose: To get the angle at every corner of the given faces
+#Inputs: vpos (numpy N x 3), faces (numpy F x k, rows padded with -1),
+#sizes (corners of each face as numpy F, None if all the faces have k corners)
+#Returns: numpy F x k of angles, 0 in the padded corners
+def getCornerAngles(vpos, faces, sizes=None):
+    k = faces.shape[1];
+    if(sizes is None):
+        sizes = np.full(faces.shape[0], k, dtype=int);
+    rows = np.arange(faces.shape[0]);
+    f_angles = np.zeros(faces.shape, dtype=float);
+    for i in range(k):
+        inside = i < sizes;
+        sizes_i = np.maximum(sizes, 1);
+        p_corner = vpos[faces[rows, (i-1) % sizes_i]];
+        c_corner = vpos[faces[rows, np.minimum(i, sizes_i-1)]];
+        n_corner = vpos[faces[rows, (i+1) % sizes_i]];
+        e_prev = p_corner - c_corner;
+        e_next = n_corner - c_corner;
+        cross_length = np.sqrt(np.sum(np.cross(e_prev, e_next)**2, axis=1));
+        f_angles[:,i] = np.where(inside, np.arctan2(cross_length, np.sum(e_prev * e_next, axis=1)), 0.0);
+    return f_angles;
+
+#Angle at every corner of a face, the same as BMLoop.calc_angle for each loop of the face
 def getMeshFaceAngles(mesh):
-    bm = getBMMesh(bpy.context, mesh, useeditmode=False);
-    ensurelookuptable(bm);
-    f_angles = [];
-    for f in bm.faces:
-        v_angles = [l.calc_angle() for l in f.loops];
-        f_angles.append(v_angles);
-    bm.free();
-    return np.array(f_angles, dtype=float);
+    arrays = getMeshArrays(mesh);
+    return getCornerAngles(arrays.vpos, arrays.faces, arrays.loop_total);
+
+#Angle at every corner of the triangles given by getMeshTriangles
+def getMeshTriangleAngles(mesh):
+    return getCornerAngles(getMeshVPos(mesh), getMeshTriangles(mesh));
 
 def getMeshFaces(mesh):
-    loops = mesh.data.loops;
-    faces = mesh.data.polygons;
-    f_vids = [];
-    for f in faces:
-        vids = [];
-        for lid in f.loop_indices:
-            vids.append(loops[lid].vertex_index);
-        f_vids.append(vids);
-    
-    return np.array(f_vids, dtype=int);
+    return getMeshArrays(mesh).faces;
+
+def getMeshTopologyKey(mesh):
+    return getMeshArrays(mesh).topologyKey();
+
+def getMeshFingerprint(mesh):
+    return getMeshArrays(mesh).fingerprint();
+
+#Same as getMeshFaces for triangle meshes, the loop triangles otherwise.
+#Row i belongs to the polygon getMeshTrianglePolygons(mesh)[i]
+def getMeshTriangles(mesh):
+    arrays = getMeshArrays(mesh);
+    if(arrays.isTriangleMesh()):
+        return arrays.faces;
+    return arrays.triangles;
+
+def getMeshTrianglePolygons(mesh):
+    arrays = getMeshArrays(mesh);
+    if(arrays.isTriangleMesh()):
+        return np.arange(arrays.num_faces);
+    return arrays.triangle_polygons;
+
+def getMeshFaceAreas(mesh):
+    return getMeshArrays(mesh).face_areas;
 
 def getMeshFaceNormals(mesh):
-    faces = mesh.data.polygons;
-    np_face_normals = np.zeros((len(faces), 3), dtype=float);
-    for f in faces:
-        np_face_normals[f.index] = f.normal.to_tuple();
-    
-    return np_face_normals;
+    return getMeshArrays(mesh).face_normals;
 
 def getEdgeFaces(mesh):
     bm = getBMMesh(bpy.context, mesh, useeditmode=False);
@@ -794,30 +746,19 @@ def getEdgeFaces(mesh):
     return np_edge_faces;
 
 def getEdgeVertices(mesh):
-    np_edge_vertices = np.zeros((len(mesh.data.edges), 2), dtype=int);
-    for e in mesh.data.edges:
-        np_edge_vertices[e.index] = [vid for vid in e.vertices];    
-    return np_edge_vertices;
+    return getMeshArrays(mesh).edges;
 
+#Weights of a vertex group on the evaluated vertices (see MeshArrays.vertex_weights)
 def getMeshVertexWeights(mesh, group_name):
     assert(group_name != '');
-    N = len(mesh.data.vertices);
-    weights = np.zeros((N), dtype=float);
+    arrays = getMeshArrays(mesh);
     try:
         vgroup = mesh.vertex_groups[group_name];
     except KeyError:
-        return weights;
-    
-    weights_values = [];
-    for i in range(N):
-        try:
-            weight = vgroup.weight(i);
-        except RuntimeError:
-            weight = 0.0;
-        weights_values.append(weight);
-        
-    
-    return np.array(weights_values, dtype=float); 
+        return np.zeros((arrays.num_vertices), dtype=float);
+    if(vgroup.index >= arrays.vertex_weights.shape[1]):
+        return np.zeros((arrays.num_vertices), dtype=float);
+    return arrays.vertex_weights[:,vgroup.index].toarray().ravel();
     
 
 def getDuplicatedObject(context, meshobject, meshname="Duplicated", wire = False):
@@ -872,11 +813,8 @@ def averageFaceArea(c, mesh):
     return 1.0 / (10.0 * np.sqrt(np.mean(area)));
 
 def getFaceAreas(c, mesh):
-    faces = mesh.data.polygons;
-    loops = mesh.data.loops;
-    verts = mesh.data.vertices;
     vpos = getMeshVPos(mesh);
-    fids = np.array([[loops[lid].vertex_index for lid in f.loop_indices] for f in faces]);
+    fids = getMeshTriangles(mesh);
     ab = vpos[fids[:, 1]] - vpos[fids[:, 0]];
     ac = vpos[fids[:, 2]] - vpos[fids[:, 0]];
     cross_vectors = np.cross(ab, ac);
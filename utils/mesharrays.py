@@ -0,0 +1,253 @@
+import bpy, zlib, hashlib;
+import numpy as np;
+import scipy.sparse as spsp;
+from bpy.app.handlers import persistent;
+
+#Snapshots of the mesh buffers as contiguous numpy arrays. Every getter in
+#mathandmatrices (getMeshVPos, getMeshFaces, getMeshNormals etc) is a view
+#over one of these snapshots, so the per-element walk over
+#mesh.data.vertices/polygons/loops happens once per mesh state and in bulk
+#using foreach_get instead of one python object at a time.
+#Snapshots are keyed by object name and stay valid until the depsgraph reports
+#a geometry update for that object (see onDepsgraphUpdate)
+MESH_ARRAYS = {};
+#Geometry update counter of every object name seen by onDepsgraphUpdate
+MESH_UPDATES = {};
+MESH_ARRAYS_STATS = {'hits':0, 'misses':0};
+
+def readonly(array):
+    array.setflags(write=False);
+    return array;
+
+#Purpose: To read a float attribute of a bpy collection in one bulk copy
+#Inputs: collection (bpy_prop_collection), attribute (name of the attribute),
+#count (elements in the collection), width (components per element)
+#Returns: numpy array of shape (count, width) or (count,) if width is 1
+def bulkFloats(collection, attribute, count, width=1, dtype=np.float64):
+    #foreach_get is fastest when the buffer matches the internal float type
+    buffer = np.empty(count * width, dtype=np.float32);
+    if(count):
+        collection.foreach_get(attribute, buffer);
+    buffer = buffer.astype(dtype);
+    if(width > 1):
+        buffer.shape = (count, width);
+    return buffer;
+
+#Purpose: To read an integer attribute of a bpy collection in one bulk copy
+#Inputs: collection (bpy_prop_collection), attribute (name of the attribute),
+#count (elements in the collection), width (components per element)
+#Returns: numpy array of shape (count, width) or (count,) if width is 1
+def bulkInts(collection, attribute, count, width=1, dtype=np.int64):
+    buffer = np.empty(count * width, dtype=np.int32);
+    if(count):
+        collection.foreach_get(attribute, buffer);
+    buffer = buffer.astype(dtype);
+    if(width > 1):
+        buffer.shape = (count, width);
+    return buffer;
+
+class MeshArrays():
+    #Positions of each vertex as a numpy N x 3 (float)
+    vpos = None;
+    #Unit vertex normals as a numpy N x 3 (float)
+    normals = None;
+    #Vertex indices of every polygon as numpy F x k (int), k=3 for triangles.
+    #Rows line up with face_normals and face_areas. On meshes with mixed
+    #polygon sizes k is the largest size and shorter rows are padded with -1
+    faces = None;
+    #Face normals as a numpy F x 3 (float)
+    face_normals = None;
+    #Face areas as a numpy F (float)
+    face_areas = None;
+    #Loop triangles (tessellation of the polygons) as numpy T x 3 (int)
+    triangles = None;
+    #Polygon index of every loop triangle as numpy T (int)
+    triangle_polygons = None;
+    #Vertex index of every loop as numpy L (int)
+    loop_vertex = None;
+    #First loop and loop count of every polygon as numpy F (int)
+    loop_start = None;
+    loop_total = None;
+    #Vertex indices of every edge as numpy E x 2 (int)
+    edges = None;
+    #Weights of the vertex groups as a csr matrix N x G (column VertexGroup.index)
+    vertex_weights = None;
+    num_vertices = 0;
+    num_edges = 0;
+    num_faces = 0;
+    num_loops = 0;
+    #Lazily computed key of the connectivity, see topologyKey
+    topology_key = None;
+    #Lazily computed hash of positions and connectivity, see fingerprint
+    geometry_fingerprint = None;
+    #Element counts of the original (not evaluated) mesh data the snapshot was
+    #taken from. Generating modifiers make these differ from the counts above
+    source_counts = None;
+    #Address of that mesh data, it changes when the object gets other data
+    source_pointer = 0;
+
+    def __init__(self, meshdata, num_groups=0):
+        self.num_vertices = len(meshdata.vertices);
+        self.num_edges = len(meshdata.edges);
+        self.num_faces = len(meshdata.polygons);
+        self.num_loops = len(meshdata.loops);
+
+        self.vpos = readonly(bulkFloats(meshdata.vertices, 'co', self.num_vertices, 3));
+        normals = bulkFloats(meshdata.vertices, 'normal', self.num_vertices, 3);
+        lengths = np.sqrt(np.sum(normals**2, axis=1));
+        lengths[lengths == 0.0] = 1.0;
+        self.normals = readonly(normals / lengths[:,None]);
+
+        self.loop_vertex = readonly(bulkInts(meshdata.loops, 'vertex_index', self.num_loops));
+        self.loop_start = readonly(bulkInts(meshdata.polygons, 'loop_start', self.num_faces));
+        self.loop_total = readonly(bulkInts(meshdata.polygons, 'loop_total', self.num_faces));
+        self.face_normals = readonly(bulkFloats(meshdata.polygons, 'normal', self.num_faces, 3));
+        self.face_areas = readonly(bulkFloats(meshdata.polygons, 'area', self.num_faces));
+        self.edges = readonly(bulkInts(meshdata.edges, 'vertices', self.num_edges, 2));
+
+        meshdata.calc_loop_triangles();
+        num_triangles = len(meshdata.loop_triangles);
+        self.triangles = readonly(bulkInts(meshdata.loop_triangles, 'vertices', num_triangles, 3));
+        self.triangle_polygons = readonly(bulkInts(meshdata.loop_triangles, 'polygon_index', num_triangles));
+
+        self.faces = readonly(self.polygonVertices());
+        self.vertex_weights = self.readVertexWeights(meshdata, num_groups);
+
+    #Vertex group memberships have no foreach_get, so the memberships of all
+    #the groups are read in one pass per snapshot instead of one pass per
+    #group and call
+    def readVertexWeights(self, meshdata, num_groups):
+        N = self.num_vertices;
+        if(not num_groups):
+            return spsp.csr_matrix((N, 0), dtype=np.float64);
+        memberships = [(v.index, g.group, g.weight) for v in meshdata.vertices for g in v.groups];
+        memberships = np.array(memberships, dtype=np.float64).reshape(-1, 3);
+        rows, cols = memberships[:,0].astype(np.int64), memberships[:,1].astype(np.int64);
+        return spsp.csr_matrix((memberships[:,2], (rows, cols)), shape=(N, num_groups));
+
+    #Vertex indices of each polygon. Meshes with a uniform polygon size
+    #(all triangles or all quads) give a dense F x k array. Mixed meshes are
+    #padded with -1 up to the largest polygon, so row i is still polygon i.
+    #Code that needs triangles should use the triangles array together with
+    #triangle_polygons instead
+    def polygonVertices(self):
+        if(not self.num_faces):
+            return np.zeros((0, 3), dtype=np.int64);
+        k = int(self.loop_total.max());
+        corners = self.loop_start[:,None] + np.arange(k)[None,:];
+        if(np.all(self.loop_total == k)):
+            return self.loop_vertex[corners];
+        inside = np.arange(k)[None,:] < self.loop_total[:,None];
+        return np.where(inside, self.loop_vertex[np.where(inside, corners, 0)], -1);
+
+    def isTriangleMesh(self):
+        return self.faces.shape[1] == 3;
+
+    #Content hash of the vertex and face buffers. Identical geometry gives the
+    #same fingerprint across sessions, so it can address data stored on disk
+    def fingerprint(self):
+        if(self.geometry_fingerprint is None):
+            digest = hashlib.blake2b(digest_size=16);
+            digest.update(np.ascontiguousarray(self.vpos).tobytes());
+            digest.update(np.ascontiguousarray(self.faces).tobytes());
+            self.geometry_fingerprint = digest.hexdigest();
+        return self.geometry_fingerprint;
+
+    #Key of the connectivity alone. Two snapshots of the same mesh that only
+    #differ in vertex positions (animation, sculpting) share this key
+    def topologyKey(self):
+        if(self.topology_key is None):
+            crc = zlib.crc32(self.faces.tobytes());
+            self.topology_key = (self.num_vertices, self.faces.shape, zlib.crc32(self.edges.tobytes(), crc));
+        return self.topology_key;
+
+    #True if the object still has the same mesh data with the element counts it
+    #had when the snapshot was taken. Catches topology edits and data swaps the
+    #depsgraph handler has not reported yet (it only runs once an operator
+    #returns). Position edits are not caught, code writing them calls
+    #tagMeshArrays
+    def matches(self, meshdata):
+        return self.source_pointer == meshdata.as_pointer() and self.source_counts == getElementCounts(meshdata);
+
+def getElementCounts(meshdata):
+    return (len(meshdata.vertices), len(meshdata.edges), len(meshdata.polygons), len(meshdata.loops));
+
+def getUpdateCounter(mesh):
+    return MESH_UPDATES.get(mesh.name, 0);
+
+#Purpose: To mark the geometry of a mesh object as changed. The depsgraph
+#handler does this once an operator returns, so code that writes the
+#geometry (setMeshVPOS, bm.to_mesh, modifier_apply, vertex co) and may read it
+#back in the same operator calls this right after the write
+#Inputs: mesh (blender object of type MESH)
+def tagMeshArrays(mesh):
+    MESH_UPDATES[mesh.name] = getUpdateCounter(mesh) + 1;
+
+#Purpose: To get the snapshot of the evaluated geometry (modifiers applied)
+#of a blender mesh object. The evaluated mesh is only built (and released with
+#to_mesh_clear) when the object had a geometry update since the last snapshot
+#Inputs: mesh (blender object of type MESH)
+#Returns: MeshArrays instance
+def getMeshArrays(mesh):
+    snapshot, counter = MESH_ARRAYS.get(mesh.name, (None, -1));
+    if(snapshot and counter == getUpdateCounter(mesh) and snapshot.matches(mesh.data)):
+        MESH_ARRAYS_STATS['hits'] += 1;
+        return snapshot;
+    
+    MESH_ARRAYS_STATS['misses'] += 1;
+    counter = getUpdateCounter(mesh);
+    dg = bpy.context.evaluated_depsgraph_get();
+    eval_obj = mesh.evaluated_get(dg);
+    obj_data = eval_obj.to_mesh();
+    try:
+        snapshot = MeshArrays(obj_data, len(mesh.vertex_groups));
+    finally:
+        eval_obj.to_mesh_clear();
+    snapshot.source_counts = getElementCounts(mesh.data);
+    snapshot.source_pointer = mesh.data.as_pointer();
+    MESH_ARRAYS[mesh.name] = (snapshot, counter);
+    return snapshot;
+
+def getMeshArraysStats():
+    stats = dict(MESH_ARRAYS_STATS);
+    stats['entries'] = len(MESH_ARRAYS);
+    return stats;
+
+def clearMeshArrays(mesh=None):
+    if(mesh):
+        MESH_ARRAYS.pop(mesh.name, None);
+    else:
+        MESH_ARRAYS.clear();
+        MESH_UPDATES.clear();
+        MESH_ARRAYS_STATS['hits'] = 0;
+        MESH_ARRAYS_STATS['misses'] = 0;
+
+#Bump the update counter of every object whose evaluated geometry changed.
+#Updates of a mesh datablock are reported on the objects using it as well
+@persistent
+def onDepsgraphUpdate(scene, depsgraph):
+    for update in depsgraph.updates:
+        if(not update.is_updated_geometry):
+            continue;
+        id_data = update.id;
+        if(isinstance(id_data, bpy.types.Object) and id_data.type == 'MESH'):
+            name = id_data.original.name;
+            MESH_UPDATES[name] = MESH_UPDATES.get(name, 0) + 1;
+
+#Object names may refer to entirely different meshes after loading a file
+@persistent
+def onLoadPost(dummy):
+    clearMeshArrays();
+
+def register():
+    if(onDepsgraphUpdate not in bpy.app.handlers.depsgraph_update_post):
+        bpy.app.handlers.depsgraph_update_post.append(onDepsgraphUpdate);
+    if(onLoadPost not in bpy.app.handlers.load_post):
+        bpy.app.handlers.load_post.append(onLoadPost);
+
+def unregister():
+    if(onDepsgraphUpdate in bpy.app.handlers.depsgraph_update_post):
+        bpy.app.handlers.depsgraph_update_post.remove(onDepsgraphUpdate);
+    if(onLoadPost in bpy.app.handlers.load_post):
+        bpy.app.handlers.load_post.remove(onLoadPost);
+    clearMeshArrays();
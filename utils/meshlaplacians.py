@@ -0,0 +1,349 @@
+import time, weakref;
+from collections import OrderedDict;
+import numpy as np;
+import scipy.sparse as spsp;
+from scipy.sparse.linalg import eigsh, splu, LinearOperator;
+__cholmodLoaded = False;
+try:
+    from sksparse.cholmod import cholesky, CholmodError;
+    __cholmodLoaded = True;
+except ImportError:
+    pass;
+
+#Cotangent laplacians, vertex areas and their generalized eigen pairs built
+#from plain vertex and triangle arrays. Nothing here touches bpy, the mesh
+#level wrappers in mathandmatrices read the arrays of a blender object and
+#call these (and re-export them)
+
+#Sparsity patterns of the assembled matrices keyed by (topology key, matrix name)
+SPARSITY_PATTERNS = OrderedDict();
+SPARSITY_PATTERNS_MAX = 16;
+
+#The CSR structure of a matrix assembled from COO triplets whose rows and
+#columns only depend on the connectivity. Building it sorts and deduplicates
+#the triplets once. After that a matrix with new values (same triplet order)
+#is a single bincount scatter into the data array
+class SparsityPattern():
+    shape = None;
+    indptr = None;
+    indices = None;
+    #Position in the CSR data array of every COO triplet
+    scatter = None;
+    nnz = 0;
+    
+    def __init__(self, rows, cols, shape):
+        self.shape = shape;
+        keys = rows.astype(np.int64) * shape[1] + cols.astype(np.int64);
+        unique_keys, self.scatter = np.unique(keys, return_inverse=True);
+        self.scatter = self.scatter.reshape(-1);
+        self.nnz = unique_keys.shape[0];
+        self.indices = (unique_keys % shape[1]).astype(np.int32);
+        row_counts = np.bincount(unique_keys // shape[1], minlength=shape[0]);
+        self.indptr = np.zeros(shape[0]+1, dtype=np.int32);
+        np.cumsum(row_counts, out=self.indptr[1:]);
+    
+    def assemble(self, values):
+        data = np.bincount(self.scatter, weights=values, minlength=self.nnz);
+        matrix = spsp.csr_matrix((data, self.indices, self.indptr), shape=self.shape, copy=False);
+        matrix.has_sorted_indices = True;
+        return matrix;
+
+#Purpose: To assemble a sparse matrix from COO triplets, reusing the CSR
+#structure when a matrix with the same name was built for the same topology
+#Inputs: rows, cols, values (COO triplets), shape (matrix shape), topology
+#(key of the connectivity the rows and cols came from or None to skip the
+#cache), name (the kind of matrix being built)
+#Returns: csr_matrix
+def assembleWithPattern(rows, cols, values, shape, topology=None, name=''):
+    if(topology is None):
+        return spsp.coo_matrix((values, (rows, cols)), shape=shape).tocsr();
+    key = (topology, name, shape);
+    pattern = SPARSITY_PATTERNS.get(key, None);
+    if(pattern is None or pattern.scatter.shape[0] != values.shape[0]):
+        pattern = SparsityPattern(rows, cols, shape);
+        SPARSITY_PATTERNS[key] = pattern;
+        while(len(SPARSITY_PATTERNS) > SPARSITY_PATTERNS_MAX):
+            SPARSITY_PATTERNS.popitem(last=False);
+    SPARSITY_PATTERNS.move_to_end(key);
+    return pattern.assemble(values);
+
+#Purpose: To compute the cotangent of the angle at every corner of a triangle mesh
+#Inputs: vpos (N x 3 float), faces (F x 3 int), epsilon (smallest denominator
+#used for degenerate triangles)
+#Returns: cotangents (F x 3 float), column i is the cotangent at faces[:,i]
+def getCornerCotangents(vpos, faces, epsilon=1e-6):
+    cotangents = np.zeros(faces.shape, dtype=float);
+    for i in range(3):
+        e1 = vpos[faces[:,(i+1)%3]] - vpos[faces[:,i]];
+        e2 = vpos[faces[:,(i+2)%3]] - vpos[faces[:,i]];
+        cross_length = np.sqrt(np.sum(np.cross(e1, e2)**2, axis=1));
+        cotangents[:,i] = np.sum(e1 * e2, axis=1) / np.maximum(cross_length, epsilon);
+    return cotangents;
+
+#Purpose: To get the cotangent weights of all edges as COO triplets. The corner
+#at faces[:,i] weighs the opposite edge in both directions, duplicates (the
+#two faces sharing an edge) are summed when the triplets are converted
+#Inputs: vpos (N x 3 float), faces (F x 3 int), scale (0.5 for the usual
+#0.5 * (cot(alpha) + cot(beta)) weights, 1.0 for full cotangents)
+#Returns: rows, cols, weights (each 6F long)
+def getCotangentWeightsCOO(vpos, faces, scale=0.5):
+    cotangents = getCornerCotangents(vpos, faces) * scale;
+    opposite_1 = faces[:,[1, 2, 0]].T.ravel();
+    opposite_2 = faces[:,[2, 0, 1]].T.ravel();
+    weights = cotangents.T.ravel();
+    rows = np.concatenate((opposite_1, opposite_2));
+    cols = np.concatenate((opposite_2, opposite_1));
+    return rows, cols, np.concatenate((weights, weights));
+
+def getCotangentWeightMatrix(vpos, faces, scale=0.5, topology=None):
+    N = vpos.shape[0];
+    rows, cols, weights = getCotangentWeightsCOO(vpos, faces, scale);
+    return assembleWithPattern(rows, cols, weights, (N, N), topology, 'COTANGENT_WEIGHTS');
+
+#Purpose: The single cotangent laplacian builder used by the spectral, curvature
+#and deformation code. The matrix is positive semi-definite, L = D - W, where W
+#holds the cotangent weights and D their row sums
+#Inputs: vpos (N x 3 float), faces (F x 3 int),
+#symmetric and normalized select the variant:
+#   normalized=False                   -> D - W
+#   symmetric=True,  normalized=True   -> I - D^-1/2 W D^-1/2
+#   symmetric=False, normalized=True   -> I - D^-1 W
+#scale (multiplier of the cotangents), anchors (vertex indices appended as
+#extra rows), anchor_weights (value of each anchor row, default_weight if empty),
+#topology (see getMeshTopologyKey, reuses the sparsity pattern of the mesh)
+#Returns: L (An (N+K) x N sparse matrix, K is the number of anchors)
+def getCotangentLaplacian(vpos, faces, *, symmetric=True, normalized=False, scale=0.5, anchors=[], anchor_weights=[], default_weight=1.0, topology=None):
+    N = vpos.shape[0];
+    rows, cols, weights = getCotangentWeightsCOO(vpos, faces, scale);
+    degree = np.bincount(rows, weights=weights, minlength=N);
+    
+    if(not normalized):
+        diagonal = degree;
+        off_diagonal = -weights;
+    elif(symmetric):
+        valid = degree > 0.0;
+        inverse_sqrt = np.zeros(N);
+        inverse_sqrt[valid] = np.power(degree[valid], -0.5);
+        diagonal = valid.astype(float);
+        off_diagonal = -weights * inverse_sqrt[rows] * inverse_sqrt[cols];
+    else:
+        valid = degree != 0.0;
+        inverse = np.zeros(N);
+        inverse[valid] = 1.0 / degree[valid];
+        diagonal = valid.astype(float);
+        off_diagonal = -weights * inverse[rows];
+    
+    K = len(anchors);
+    anchors = np.asarray(anchors, dtype=int).reshape(K);
+    if(len(anchor_weights)):
+        anchor_values = np.asarray(anchor_weights, dtype=float).reshape(K);
+    else:
+        anchor_values = np.full(K, default_weight, dtype=float);
+    
+    diagonal_index = np.arange(N);
+    I = np.concatenate((rows, diagonal_index, N + np.arange(K)));
+    J = np.concatenate((cols, diagonal_index, anchors));
+    V = np.concatenate((off_diagonal, diagonal, anchor_values));
+    if(topology is not None and K):
+        topology = (topology, anchors.tobytes());
+    return assembleWithPattern(I, J, V, (N+K, N), topology, 'COTANGENT');
+
+#Purpose: Mixed Voronoi area of every vertex (Meyer et al. 2003, "Discrete
+#Differential-Geometry Operators for Triangulated 2-Manifolds"). Non-obtuse
+#triangles give each corner its Voronoi region, obtuse triangles give half of
+#their area to the obtuse corner and a quarter to the others
+#Inputs: vpos (N x 3 float), faces (F x 3 int)
+#Returns: A (length N array of areas, sums to the surface area)
+def getMixedVoronoiAreas(vpos, faces):
+    N = vpos.shape[0];
+    cotangents = getCornerCotangents(vpos, faces);
+    squared_edge_length = np.zeros(faces.shape, dtype=float);
+    corner_dots = np.zeros(faces.shape, dtype=float);
+    for i in range(3):
+        e1 = vpos[faces[:,(i+1)%3]] - vpos[faces[:,i]];
+        e2 = vpos[faces[:,(i+2)%3]] - vpos[faces[:,i]];
+        #Length of the edge opposite to corner i
+        squared_edge_length[:,i] = np.sum((e2 - e1)**2, axis=1);
+        corner_dots[:,i] = np.sum(e1 * e2, axis=1);
+    
+    ab = vpos[faces[:,1]] - vpos[faces[:,0]];
+    ac = vpos[faces[:,2]] - vpos[faces[:,0]];
+    faces_area = 0.5 * np.sqrt(np.sum(np.cross(ab, ac)**2, axis=1));
+    
+    weighted = squared_edge_length * cotangents;
+    voronoi = 0.125 * (weighted[:,[1, 2, 0]] + weighted[:,[2, 0, 1]]);
+    obtuse_corner = corner_dots < 0.0;
+    obtuse_face = np.any(obtuse_corner, axis=1);
+    obtuse_share = np.where(obtuse_corner, 0.5, 0.25) * faces_area[:,None];
+    corner_areas = np.where(obtuse_face[:,None], obtuse_share, voronoi);
+    
+    return np.bincount(faces.ravel(), weights=corner_areas.ravel(), minlength=N);
+
+##############################################
+##  Shift-invert factorizations              ##
+##############################################
+
+#Factorizations of (matC - sigma matM) keyed by the identity of the matrices and
+#the shift, least recently used first. The laplacian and mass matrices of a mesh
+#state live in the spectral cache, so repeated eigen solves for different K or
+#tolerances reuse the factor. An entry is dropped as soon as either matrix is
+#garbage collected, or when the factors hold more than SHIFT_INVERT_MAX_BYTES
+SHIFT_INVERT_FACTORS = OrderedDict();
+#Bytes held by every factor in SHIFT_INVERT_FACTORS, same keys
+SHIFT_INVERT_FACTOR_BYTES = {};
+SHIFT_INVERT_MAX_BYTES = 512 * 1024 * 1024;
+SHIFT_INVERT_STATS = {'factorizations':0, 'reuses':0, 'evictions':0, 'factor_time':0.0, 'iteration_time':0.0};
+
+def isCholmodLoaded():
+    return __cholmodLoaded;
+
+def dropShiftInvertFactor(key):
+    SHIFT_INVERT_FACTORS.pop(key, None);
+    SHIFT_INVERT_FACTOR_BYTES.pop(key, None);
+
+def getShiftInvertBytes():
+    return sum(SHIFT_INVERT_FACTOR_BYTES.values());
+
+#Purpose: To change the byte cap of the cached factors, e.g. to the part of the
+#spectral cache budget they may use, evicting the oldest ones above it
+def setShiftInvertMaxBytes(max_bytes):
+    global SHIFT_INVERT_MAX_BYTES;
+    SHIFT_INVERT_MAX_BYTES = int(max_bytes);
+    enforceShiftInvertBudget();
+
+#Evict least recently used factors until they fit in SHIFT_INVERT_MAX_BYTES.
+#The newest factor is kept even if it alone is larger, it is in use
+def enforceShiftInvertBudget():
+    total = getShiftInvertBytes();
+    while(total > SHIFT_INVERT_MAX_BYTES and len(SHIFT_INVERT_FACTORS) > 1):
+        key = next(iter(SHIFT_INVERT_FACTORS));
+        total -= SHIFT_INVERT_FACTOR_BYTES.get(key, 0);
+        dropShiftInvertFactor(key);
+        SHIFT_INVERT_STATS['evictions'] += 1;
+
+#Memory of a factor, the values and row indices of its nonzeros and the
+#column pointers
+def getFactorBytes(factor, size):
+    if(hasattr(factor, 'nnz')):
+        nnz = factor.nnz;
+    else:
+        nnz = factor.L().nnz;
+    return nnz * (np.dtype(np.float64).itemsize + np.dtype(np.int32).itemsize) + (size + 1) * np.dtype(np.int32).itemsize;
+
+#Purpose: To factorize (matC - sigma matM) once per pair of matrices. A sparse
+#Cholesky factor is used when scikit-sparse is installed (the shifted
+#cotangent laplacian is positive definite for sigma < 0), a sparse LU otherwise
+#Returns: a function solving (matC - sigma matM) x = b
+def getShiftInvertSolver(matM, matC, sigma=-1e-8):
+    key = (id(matC), id(matM), sigma);
+    try:
+        solver = SHIFT_INVERT_FACTORS[key];
+        SHIFT_INVERT_FACTORS.move_to_end(key);
+        SHIFT_INVERT_STATS['reuses'] += 1;
+        return solver;
+    except KeyError:
+        pass;
+    
+    start = time.time();
+    shifted = spsp.csc_matrix(matC - sigma * matM);
+    factor = None;
+    if(isCholmodLoaded()):
+        try:
+            factor = cholesky(shifted);
+            solver = factor;
+        except CholmodError:
+            factor = None;
+    if(factor is None):
+        factor = splu(shifted);
+        solver = factor.solve;
+    elapsed = time.time() - start;
+    
+    SHIFT_INVERT_STATS['factorizations'] += 1;
+    SHIFT_INVERT_STATS['factor_time'] += elapsed;
+    print('FACTORIZED SHIFTED OPERATOR IN %.3f SECONDS'%(elapsed));
+    SHIFT_INVERT_FACTORS[key] = solver;
+    SHIFT_INVERT_FACTOR_BYTES[key] = getFactorBytes(factor, shifted.shape[0]);
+    weakref.finalize(matC, dropShiftInvertFactor, key);
+    weakref.finalize(matM, dropShiftInvertFactor, key);
+    enforceShiftInvertBudget();
+    return solver;
+
+#Purpose: The cached shift-invert factor as the OPinv operator of eigsh
+def getShiftInvertOperator(matM, matC, sigma=-1e-8):
+    solver = getShiftInvertSolver(matM, matC, sigma);
+    def solve(x):
+        return solver(np.asarray(x, dtype=np.float64).ravel());
+    return LinearOperator(matC.shape, matvec=solve, dtype=np.float64);
+
+#Purpose: eigsh in shift-invert mode with the cached factorization, timing the
+#ARPACK iterations apart from the factorization
+def shiftInvertEigsh(matM, matC, n, sigma=-1e-8, *, OPinv=None, **kwargs):
+    if(OPinv is None):
+        OPinv = getShiftInvertOperator(matM, matC, sigma);
+    start = time.time();
+    eva, eve = eigsh(matC, k=n, M=matM, sigma=sigma, which='LM', OPinv=OPinv, **kwargs);
+    elapsed = time.time() - start;
+    SHIFT_INVERT_STATS['iteration_time'] += elapsed;
+    print('EIGEN ITERATIONS FOR %s PAIRS IN %.3f SECONDS'%(n, elapsed));
+    return eva, eve;
+
+def getShiftInvertStats():
+    stats = dict(SHIFT_INVERT_STATS);
+    stats['factors'] = len(SHIFT_INVERT_FACTORS);
+    stats['bytes'] = getShiftInvertBytes();
+    stats['max_bytes'] = SHIFT_INVERT_MAX_BYTES;
+    return stats;
+
+def get_eigen(matM,matC,n):
+    eva, eve = shiftInvertEigsh(matM, matC, n);
+    print('SHAPE OF EIGENS :: %s, %s'%(eva.shape, eve.shape));
+    return eva,eve
+
+def get_eigen2(matM, matC, n):
+    num_vertices = matC.shape[0];
+    #Calculate the eigen values and vectors
+#     eva, eve = eigs(L,k=K,M=A,sigma=-1e-5,which='LM');
+    eva, eve = shiftInvertEigsh(matM, matC, n);
+    #Sort the eigen values from smallest to highest
+    # and ensure to use the real part of eigen values, because there might be complex numbers
+    eva = np.abs(np.real(eva));
+    idx = np.argsort(eva);
+    eva = eva[idx];
+    eve = eve[:, idx];    
+    eve = np.real(eve);
+    print('SHAPE OF EIGENS :: %s, %s'%(eva.shape, eve.shape));
+    return eva, eve;
+
+#Purpose: To grow a set of converged generalized eigen pairs of matC x = eva matM x
+#to the first n pairs without solving for the known ones again. The shift-invert
+#operator is deflated with the matM-orthogonal projector P = I - U (U'MU)^-1 U'M,
+#so the known eigen vectors U map to zero and ARPACK converges to the next ones
+#Inputs: matM, matC (sparse mass and laplacian), eva, eve (k known eigen pairs),
+#n (total number of eigen pairs wanted)
+#Returns: (eva, eve) with the first n eigen pairs sorted by eigenvalue
+def extendEigens(matM, matC, eva, eve, n, sigma=-1e-8):
+    known = eva.shape[0];
+    if(known >= n):
+        return eva[:n], eve[:, :n];
+    if(known == 0):
+        return get_eigen2(matM, matC, n);
+    
+    U = np.asarray(eve);
+    MU = matM.dot(U);
+    #Solving with the gram matrix keeps the projector exact even if U is
+    #only approximately M-orthonormal (e.g. loaded from a float file)
+    W = np.linalg.solve(U.T.dot(MU), MU.T);
+    solver = getShiftInvertSolver(matM, matC, sigma);
+    def deflatedSolve(x):
+        y = solver(np.asarray(x, dtype=np.float64).ravel());
+        return y - U.dot(W.dot(y));
+    
+    OPinv = LinearOperator(matC.shape, matvec=deflatedSolve, dtype=np.float64);
+    new_eva, new_eve = shiftInvertEigsh(matM, matC, n-known, sigma, OPinv=OPinv);
+    new_eve = new_eve - U.dot(W.dot(new_eve));
+    
+    eva = np.concatenate((np.asarray(eva), new_eva));
+    eve = np.hstack((U, new_eve));
+    idx = np.argsort(eva);
+    print('EXTENDED EIGENS FROM %s TO %s'%(known, n));
+    return eva[idx], eve[:, idx];
@@ -3,17 +3,104 @@ import numpy as np;
 import scipy as sp;
 import scipy.sparse as spsp;
 from scipy.sparse.linalg import eigsh, eigs;
-import numpy.matlib as np_mlib;
+from collections import OrderedDict;
 
 from GenericMarkerCreator28.utils.mathandmatrices import getBMMesh, ensurelookuptable, getMeshFaces, getMeshVPos, setMeshVPOS, getMeshFaceAngles;
 from GenericMarkerCreator28.utils.mathandmatrices import meanCurvatureLaplaceWeights, getLaplacianMatrixCotangent, getLaplacianMeshNormalized;
-from GenericMarkerCreator28.utils.mathandmatrices import getWKSEigens, getWKSLaplacianMatrixCotangent, getMeshVoronoiAreas;
+from GenericMarkerCreator28.utils.mathandmatrices import getWKSEigens, getWKSLaplacianMatrixCotangent, getMeshVoronoiAreas, getMeshFingerprint;
+from GenericMarkerCreator28.utils.eigenstore import getEigenStoreKey, loadEigenBasis, saveEigenBasis;
+from GenericMarkerCreator28.utils.meshlaplacians import getShiftInvertBytes, setShiftInvertMaxBytes;
+from GenericMarkerCreator28.utils.spectralsignatures import SpectralFilter, lowpassResponse, bandpassResponse, exaggerationResponse, heatResponse, ProgressiveSpectralShape;
+from GenericMarkerCreator28.utils.spectralsignatures import getHeatBatch, iterHeatBatch, getHKSTimes, get_hks, HKSColumns, applySpectralFilterBank, get_wks, getWKS;
 
-CACHE = {};
+#In-memory cache of the spectral matrices of every mesh, most recently used
+#last. CACHE[mesh.name] is a dictionary of named matrices (WKS_L, WKS_eve,
+#HKS_MATRIX etc). An entry is dropped when the geometry fingerprint of its mesh
+#changes and least recently used entries are evicted once the cache holds more
+#than the budget set in the addon preferences
+CACHE = OrderedDict();
+#Geometry fingerprint each entry of CACHE was computed for
+CACHE_FINGERPRINTS = {};
+CACHE_STATS = {'hits':0, 'misses':0, 'evictions':0, 'invalidations':0};
+#Budget used when the addon preferences are not available
+CACHE_BUDGET_DEFAULT = 2048 * 1024 * 1024;
+#Part of the budget the shift-invert factorizations of the cached laplacians
+#may hold (see utils/meshlaplacians.py). They count against the budget too
+SHIFT_INVERT_BUDGET_FRACTION = 0.25;
+#Laplacian and area models used for the HKS, WKS and GISIF eigen basis. They
+#are part of the on-disk store key, so change them together with the defaults
+#of getWKSLaplacianMatrixCotangent and getMeshVoronoiAreas
+WKS_LAPLACIAN_MODEL = 2;
+WKS_AREA_MODEL = 4;
+#Cache entries computed from the eigen basis. They are dropped whenever the
+#basis changes so that no signature is shown for a stale basis
+SPECTRAL_DERIVED_PROPERTIES = ['HKS_MATRIX', 'HKS_COLUMNS', 'WKS_MATRIX', 'GISIF_Threshold', 'GISIF_Groups'];
+
+def getCacheBudget():
+    try:
+        preferences = bpy.context.preferences.addons['GenericMarkerCreator28'].preferences;
+        return preferences.spectral_cache_budget * 1024 * 1024;
+    except (KeyError, AttributeError):
+        return CACHE_BUDGET_DEFAULT;
+
+#Purpose: Memory held by a cached value. Memory-mapped arrays are backed by the
+#eigen store on disk and are not counted
+def getCacheValueBytes(value):
+    if(isinstance(value, np.memmap)):
+        return 0;
+    if(isinstance(value, np.ndarray)):
+        return value.nbytes;
+    if(spsp.issparse(value)):
+        if(spsp.isspmatrix_dia(value)):
+            return value.data.nbytes + value.offsets.nbytes;
+        value = value.tocsr();
+        return value.data.nbytes + value.indices.nbytes + value.indptr.nbytes;
+    if(isinstance(value, (list, tuple))):
+        return sum([getCacheValueBytes(item) for item in value]);
+    #Helper objects (e.g. HKSColumns) report their own size
+    return getattr(value, 'nbytes', 0);
+
+def getCacheEntryBytes(name):
+    return sum([getCacheValueBytes(value) for value in CACHE.get(name, {}).values()]);
+
+def getMatrixCacheStats():
+    stats = dict(CACHE_STATS);
+    stats['entries'] = len(CACHE);
+    stats['bytes'] = sum([getCacheEntryBytes(name) for name in CACHE]);
+    stats['factor_bytes'] = getShiftInvertBytes();
+    stats['budget'] = getCacheBudget();
+    return stats;
+
+def clearMatrixCache(mesh=None):
+    if(mesh):
+        CACHE.pop(mesh.name, None);
+        CACHE_FINGERPRINTS.pop(mesh.name, None);
+    else:
+        CACHE.clear();
+        CACHE_FINGERPRINTS.clear();
+        for key in CACHE_STATS:
+            CACHE_STATS[key] = 0;
+
+#Evict least recently used meshes until the cache, with the factorizations of
+#its laplacians, fits in the budget. The mesh being worked on (the most recent
+#entry) is never evicted. Evicted matrices release their factorizations
+def enforceCacheBudget():
+    budget = getCacheBudget();
+    setShiftInvertMaxBytes(budget * SHIFT_INVERT_BUDGET_FRACTION);
+    sizes = OrderedDict([(name, getCacheEntryBytes(name)) for name in CACHE]);
+    total = sum(sizes.values());
+    while(total + getShiftInvertBytes() > budget and len(sizes) > 1):
+        name, size = sizes.popitem(last=False);
+        CACHE.pop(name, None);
+        CACHE_FINGERPRINTS.pop(name, None);
+        CACHE_STATS['evictions'] += 1;
+        total -= size;
+        print('EVICTED SPECTRAL CACHE OF ', name, ' FREED BYTES ', size);
 
 def setMatrixCache(context, mesh, property, value):
     updateMatrixCache(context, mesh);
     CACHE[mesh.name][property] = value;
+    enforceCacheBudget();
 
 #For some known properties the matrix cache can be set if it doesn't exist. For other properties 
 #just return false and null value if they don't exist in the memory
@@ -22,6 +109,7 @@ def getMatrixCache(context, mesh, property):
     try:
         reading = CACHE[mesh.name][property];
     except KeyError:
+        CACHE_STATS['misses'] += 1;
         if(property == 'WKS_L'):
             WKS_L = getWKSLaplacianMatrixCotangent(context, mesh);
             setMatrixCache(context, mesh, 'WKS_L', WKS_L);
@@ -31,13 +119,92 @@ def getMatrixCache(context, mesh, property):
             setMatrixCache(context, mesh, 'WKS_VORONOI', WKS_VORONOI);
             return True, WKS_VORONOI;                
         return False, [];    
+    CACHE_STATS['hits'] += 1;
     return True, reading;
-        
+
+#Create the entry of a mesh, or drop it if the mesh geometry changed since it
+#was filled, and mark it as the most recently used
 def updateMatrixCache(context, mesh):
-    try:
-        meshdata = CACHE[mesh.name];
-    except KeyError:
+    fingerprint = getMeshFingerprint(mesh);
+    if(mesh.name in CACHE and CACHE_FINGERPRINTS.get(mesh.name) != fingerprint):
+        print('GEOMETRY CHANGED, DROPPING SPECTRAL CACHE OF ', mesh.name);
+        del CACHE[mesh.name];
+        CACHE_STATS['invalidations'] += 1;
+    if(mesh.name not in CACHE):
         CACHE[mesh.name] = {};
+        CACHE_FINGERPRINTS[mesh.name] = fingerprint;
+    CACHE.move_to_end(mesh.name);
+
+def clearDerivedSignatures(context, mesh):
+    updateMatrixCache(context, mesh);
+    for property in SPECTRAL_DERIVED_PROPERTIES:
+        CACHE[mesh.name].pop(property, None);
+
+#Purpose: To make sure the cached eigen basis (WKS_eva, WKS_eve) holds at least
+#K generalized eigen pairs. The cache keeps the largest basis computed so far,
+#a larger K looks in the on-disk eigen store and otherwise solves only for the
+#missing eigen pairs. WKS_k and the signatures computed from the basis are
+#left alone, the first pairs of a grown basis are the ones they were built from
+#Inputs: mesh (blender object of type MESH), K (number of eigenvalues/eigenvectors)
+#Returns: (L, A, eva, eve, grown) with the whole cached basis (K or more pairs),
+#grown is True if the basis had to be computed or loaded
+def ensureSpectralBasis(context, mesh, K):
+    WKS_EVA_Exists, WKS_EVA = getMatrixCache(context, mesh, 'WKS_eva');
+    WKS_EVE_Exists, WKS_EVE = getMatrixCache(context, mesh, 'WKS_eve');
+    basis_exists = (WKS_EVA_Exists and WKS_EVE_Exists);
+    
+    if(basis_exists and WKS_EVA.shape[0] >= K):
+        __, WKS_L = getMatrixCache(context, mesh, 'WKS_L');
+        __, WKS_VORONOI = getMatrixCache(context, mesh, 'WKS_VORONOI');
+        return WKS_L, WKS_VORONOI, WKS_EVA, WKS_EVE, False;
+    
+    print('GETTING SPECTRAL EIGENS : ', K, WKS_EVA_Exists, WKS_EVE_Exists);
+    key = getEigenStoreKey(getMeshFingerprint(mesh), K, WKS_LAPLACIAN_MODEL, WKS_AREA_MODEL);
+    found, STORED_EVA, STORED_EVE, WKS_L, WKS_VORONOI = loadEigenBasis(mesh, key);
+    if(found):
+        WKS_EVA, WKS_EVE = STORED_EVA, STORED_EVE;
+        setMatrixCache(context, mesh, 'WKS_L', WKS_L);
+        setMatrixCache(context, mesh, 'WKS_VORONOI', WKS_VORONOI);
+    else:
+        __, WKS_L = getMatrixCache(context, mesh, 'WKS_L');
+        __, WKS_VORONOI = getMatrixCache(context, mesh, 'WKS_VORONOI');
+        if(basis_exists):
+            WKS_EVA, WKS_EVE = getWKSEigens(mesh, WKS_L, WKS_VORONOI, K, eva=WKS_EVA, eve=WKS_EVE);
+        else:
+            WKS_EVA, WKS_EVE = getWKSEigens(mesh, WKS_L, WKS_VORONOI, K);
+        saveEigenBasis(mesh, key, WKS_EVA, WKS_EVE, WKS_L, WKS_VORONOI);
+    
+    #The squares are sliced from the whole basis, so they have to grow with it
+    CACHE[mesh.name].pop('WKS_eve_squared', None);
+    setMatrixCache(context, mesh, 'WKS_eva', WKS_EVA);
+    setMatrixCache(context, mesh, 'WKS_eve', WKS_EVE);
+    return WKS_L, WKS_VORONOI, WKS_EVA, WKS_EVE, True;
+
+#Purpose: To get the laplacian, mass matrix and first K generalized eigen pairs
+#shared by the HKS, WKS and GISIF signatures. WKS_k is the K the signatures
+#are currently computed for, lowering it only slices the cached basis and
+#raising it grows the basis (see ensureSpectralBasis)
+#Inputs: mesh (blender object of type MESH), K (number of eigenvalues/eigenvectors)
+#Returns: (L, A, eva, eve, changed) where changed is True if K or the basis
+#changed since the last call
+def getSpectralBasis(context, mesh, K):
+    k_exists, cache_k = getMatrixCache(context, mesh, 'WKS_k');
+    WKS_L, WKS_VORONOI, WKS_EVA, WKS_EVE, grown = ensureSpectralBasis(context, mesh, K);
+    changed = (grown or not k_exists or cache_k != K);
+    if(changed):
+        setMatrixCache(context, mesh, 'WKS_k', K);
+        clearDerivedSignatures(context, mesh);
+    return WKS_L, WKS_VORONOI, WKS_EVA[:K], WKS_EVE[:, :K], changed;
+
+#Purpose: The squared eigenvectors (N x K) that every point signature (HKS, WKS,
+#GISIF) is a weighted sum of. They are squared once per basis and sliced per K
+def getSquaredEigenvectors(context, mesh, K):
+    squared_exists, WKS_EVE_SQUARED = getMatrixCache(context, mesh, 'WKS_eve_squared');
+    if(not squared_exists):
+        __, WKS_EVE = getMatrixCache(context, mesh, 'WKS_eve');
+        WKS_EVE_SQUARED = np.square(WKS_EVE);
+        setMatrixCache(context, mesh, 'WKS_eve_squared', WKS_EVE_SQUARED);
+    return WKS_EVE_SQUARED[:, :K];
 
 ##############################################################
 ##        Spectral Representations / Heat Flow              ##
@@ -59,23 +226,50 @@ def getLaplacianSpectrum(context, mesh, K):
     
     return (eigvalues, eigvectors);
 
+#Purpose: A SpectralFilter over the first K eigen pairs of the cached generalized
+#eigen basis (the same basis used by HKS, WKS and GISIF). The K of the
+#signatures (WKS_k) and their cached matrices are not touched
+def getSpectralFilter(context, mesh, K):
+    K = min(len(mesh.data.vertices)-1, K);
+    __, WKS_VORONOI, WKS_EVA, WKS_EVE, __ = ensureSpectralBasis(context, mesh, K);
+    return SpectralFilter(WKS_EVA[:K], WKS_EVE[:, :K], WKS_VORONOI);
+
 #Purpose: Given a mesh, to use the first K eigenvectors of its Laplacian
 #to perform a lowpass filtering
 #Inputs: mesh (polygon mesh object), K (number of eigenvalues/eigenvectors)
-#Returns: Nothing (should update mesh.VPos)
+#Returns: the filtered vertex positions, with a_matrix the projection as a
+#LinearOperator and with eigenvectors the K x N transposed eigenvectors
 def doLowpassFiltering(context, mesh, K, *, a_matrix=False, eigenvectors=False):
-    (_, U) = getLaplacianSpectrum(context, mesh, K);
+    spectral_filter = getSpectralFilter(context, mesh, K);
+    filtered = spectral_filter.apply(getMeshVPos(mesh));
     if(not a_matrix and not eigenvectors):
-        return U.dot(U.T.dot(getMeshVPos(mesh)));
-    UMatrix = spsp.csr_matrix(U);
+        return filtered;
     if(a_matrix and not eigenvectors):
-        UdotUT = spsp.csr_matrix(UMatrix.dot(UMatrix.T));
-        return U.dot(U.T.dot(getMeshVPos(mesh))), UdotUT;
+        return filtered, spectral_filter.asOperator();
     if(not a_matrix and eigenvectors):
-        return U.dot(U.T.dot(getMeshVPos(mesh))), U.T;
-    UdotUT = spsp.csr_matrix(UMatrix.dot(UMatrix.T));
-    return U.dot(U.T.dot(getMeshVPos(mesh))), UdotUT, U.T;
+        return filtered, spectral_filter.eigenvectors.T;
+    return filtered, spectral_filter.asOperator(), spectral_filter.eigenvectors.T;
     
+#Purpose: The spectral shape of a mesh with K eigenvectors, answered from a
+#ProgressiveSpectralShape over the whole cached eigen basis. The basis is only
+#grown (to k_max pairs) when it holds fewer than K, and neither growing it nor
+#moving K touches the signatures computed from it
+def getProgressiveSpectralShape(context, mesh, K, k_max=100):
+    N = len(mesh.data.vertices);
+    K = min(N-1, K);
+    shape_exists, SPECTRAL_SHAPE = getMatrixCache(context, mesh, 'SPECTRAL_SHAPE');
+    if(not shape_exists or SPECTRAL_SHAPE.k_max < K):
+        __, WKS_EVA = getMatrixCache(context, mesh, 'WKS_eva');
+        if(len(WKS_EVA) < K):
+            K_basis = min(N-1, max(K, k_max));
+        else:
+            K_basis = K;
+        __, WKS_VORONOI, WKS_EVA, WKS_EVE, __ = ensureSpectralBasis(context, mesh, K_basis);
+        print('GETTING PROGRESSIVE SPECTRAL SHAPE FOR K MAX ', WKS_EVA.shape[0]);
+        SPECTRAL_SHAPE = ProgressiveSpectralShape(SpectralFilter(WKS_EVA, WKS_EVE, WKS_VORONOI), getMeshVPos(mesh));
+        setMatrixCache(context, mesh, 'SPECTRAL_SHAPE', SPECTRAL_SHAPE);
+    return SPECTRAL_SHAPE.reconstruction(K);
+
 #Purpose: Given a mesh, to simulate heat flow by projecting initial conditions
 #onto the eigenvectors of the Laplacian matrix, and then to sum up the heat
 #flow of each eigenvector after it's decayed after an amount of time t
@@ -86,15 +280,20 @@ def doLowpassFiltering(context, mesh, K, *, a_matrix=False, eigenvectors=False):
 #the initial vertices at the beginning of time
 #Returns: heat (a length N array of heat values on the mesh)
 def getHeat(context, mesh, eigvalues, eigvectors, t, initialVertices, heatValue = 100.0):
-    N = len(mesh.data.vertices);
-    I = np.zeros(N);
-    I[initialVertices] = heatValue;
-    coeffs = I[None, :].dot(eigvectors);
-    coeffs = coeffs.flatten();
+    #The projection of the impulse is the sum of the eigenvector rows of the
+    #heated vertices, no need to build the length N impulse vector
+    initialVertices = np.unique(np.asarray(initialVertices, dtype=np.int64).ravel());
+    coeffs = heatValue * np.sum(eigvectors[initialVertices], axis=0);
     coeffs = coeffs*np.exp(-eigvalues*t);
     heat = eigvectors.dot(coeffs[:, None]);
     return heat;
 
+#Purpose: getHeatBatch on the cached eigen basis of a mesh with K eigenvectors
+def getHeatKernels(context, mesh, K, sources, times, heatValue = 100.0, *, layout='STN', dtype=np.float64):
+    K = min(len(mesh.data.vertices)-1, K);
+    __, __, WKS_EVA, WKS_EVE, __ = ensureSpectralBasis(context, mesh, K);
+    return getHeatBatch(WKS_EVA[:K], WKS_EVE[:, :K], sources, times, heatValue, layout=layout, dtype=dtype);
+
 #Purpose: Given a mesh, to approximate its curvature at some measurement scale
 #by recording the amount of heat that stays at each vertex after a unit impulse
 #of heat is applied.  This is called the "Heat Kernel Signature" (HKS)
@@ -105,161 +304,58 @@ def getHKSEigens(mesh, L, K=5, t=20.0, *,eva=None, eve=None, A = None):
     eva, eve = eigsh(L, K, M=A, which='LM', sigma=-1e-8);
     return eva, eve;
 
-#eigenvalues, eigenvectors, the diagonal matrix M, and times for which HKS is propogated;
-def get_hks(eival, eivec,mat_M, num_times=100, log_start_value = 0.1, log_end_value=10.0):
-#     times = np.logspace(np.log(0.1),np.log(10.0),num=num_times);
-    print('LOG VALUES ::: ', log_start_value, log_end_value, num_times)
-    times = np.logspace(np.log(log_start_value),np.log(log_end_value),num=max(int(num_times), 1));
-    vertex_areas = spsp.csr_matrix(mat_M).data;
-    k = np.zeros((eivec.shape[0],len(times)))
-    for idx,t in enumerate(times):
-        k[:,idx] = (np.exp(-t*eival)[None,:]*eivec*eivec).sum(axis=1)
-    average_temperature = (vertex_areas[:,None]*k).sum(axis=0) / vertex_areas.sum();
-    hks = k/average_temperature;
-    print('HKS SHAPE : ', hks.shape);
-    return hks;
-
-def get_wks(eigen_values, eigen_vectors, energy_steps=None, absolute_sigma=None, num_steps=None, relative_sigma=None):
-    eigen_values = np.abs(eigen_values);
-    idx = np.argsort(eigen_values);
-    eigen_values = eigen_values[idx[1:]];
-    eigen_vectors = eigen_vectors[:, idx[1:]];
-
-    if not energy_steps:
-        assert num_steps != None
-        energy_steps = np.log(np.linspace(eigen_values[1], eigen_values[-1], num_steps))
-
-    if not absolute_sigma:
-        if relative_sigma != None:
-            absolute_sigma = (energy_steps.max() - energy_steps.min()) * relative_sigma
-        else:
-            # from paper
-            delta = (energy_steps.max() - energy_steps.min()) / energy_steps.size
-            absolute_sigma = 7 * delta
-
-    nv = eigen_vectors.shape[0]
-#    nev = eigen_vectors.shape[1]
-    num_steps = energy_steps.size
-
-    desc = np.zeros((nv, num_steps))
-    for idx, e in enumerate(energy_steps):
-        coeff = np.exp(-(e-np.log(eigen_values))**2/(2*absolute_sigma))
-        desc[:, idx] = 1/coeff.sum() * (eigen_vectors**2).dot(coeff)
-    
-    print('WKS SHAPE ', desc.shape);
-    return desc;
-
-def getWKS(mesh, eva, eve, WKS_E=10, wks_variance=6):
-    num_vertices = len(mesh.data.vertices);
-    #Calculation of WKS Signature
-    WKS = np.zeros((num_vertices,WKS_E));
-    log_E = np.log(np.maximum(np.abs(eva), 1e-6)).T;
-    e = np.linspace(log_E[1], np.max(log_E) / 1.02, WKS_E);
-    sigma = (e[1]-e[0])*wks_variance;
-    sigma_inv = (2*sigma**2);
-    C = np.zeros((1, WKS_E));
-        
-    for i in range(WKS_E):
-        np_tiled = np.exp((-(e[i] - log_E)**2) / sigma_inv);
-        np_sum = np.sum( eve**2 * np_mlib.repmat(np_tiled, num_vertices, 1), 1);
-        np_sum.shape = (np_sum.shape[0], );
-        WKS[:,i] = np_sum;
-        expo = np.exp((-(e[i]-log_E)**2) / sigma_inv);
-        np_sum_expo = np.sum(expo);
-        C[:,i] = np_sum_expo;
-    
-    #Normalized the WKS Matrix
-    WKS[:,:] = WKS[:,:] / np_mlib.repmat(C, num_vertices, 1);    
-    print('WKS SHAPE ', WKS.shape);
-    return WKS;
-
-
-def getHKSColors(context, mesh, K=5, HKS_T=20.0, HKS_CURRENT_T = 20, HKS_LOG_START=0.1, HKS_LOG_END=10.0):
+#With lazy=True (the panel default) only the displayed time column is computed,
+#otherwise the whole N x T HKS matrix is built and cached
+def getHKSColors(context, mesh, K=5, HKS_T=20.0, HKS_CURRENT_T = 20, HKS_LOG_START=0.1, HKS_LOG_END=10.0, *, lazy=True):
     K = min(len(mesh.data.vertices)-1, K);
-    k_exists, cache_k = getMatrixCache(context, mesh, 'WKS_k');
-    
-    WKS_L_Exists, WKS_L = getMatrixCache(context, mesh, 'WKS_L');
-    WKS_VORONOI_Exists, WKS_VORONOI = getMatrixCache(context, mesh, 'WKS_VORONOI');
-    
-    WKS_EVA_Exists, WKS_EVA = getMatrixCache(context, mesh, 'WKS_eva');
-    WKS_EVE_Exists, WKS_EVE = getMatrixCache(context, mesh, 'WKS_eve');
+    WKS_L, WKS_VORONOI, WKS_EVA, WKS_EVE, __ = getSpectralBasis(context, mesh, K);
         
     hks_t_exists, cache_hks_t = getMatrixCache(context, mesh, 'HKS_T'); 
     hks_log_start_exists, cache_hks_log_start = getMatrixCache(context, mesh, 'HKS_LOG_START');    
     hks_log_end_exists, cache_hks_log_end = getMatrixCache(context, mesh, 'HKS_LOG_END');       
-    hks_matrix_exists, HKS_MATRIX = getMatrixCache(context, mesh, 'HKS_MATRIX');
-           
-    if(not k_exists):
-        setMatrixCache(context, mesh, 'WKS_k', K);
-    
-    if(not WKS_L_Exists):
-        print('GETTING HKS LAPLACIANS :');
-#         HKS_L = getLaplacianMatrixCotangent(context, mesh, []);
-        WKS_L = getWKSLaplacianMatrixCotangent(context, mesh);
-        setMatrixCache(context, mesh, 'WKS_L', WKS_L);
-    
-    if(not WKS_VORONOI_Exists):    
-        print('GETTING WKS VORONOI :');    
-        WKS_VORONOI, __ = getMeshVoronoiAreas(context, mesh);
-        setMatrixCache(context, mesh, 'WKS_VORONOI', WKS_VORONOI);
-    
-    if(cache_k != K or not WKS_EVA_Exists or not WKS_EVE_Exists):
-        print('GETTING HKS EIGENS : ', '%s = %s'%(cache_k, K), WKS_EVA_Exists, WKS_EVE_Exists);
-#         HKS_EVA, HKS_EVE = getHKSEigens(mesh, HKS_L, K);
-        WKS_EVA, WKS_EVE = getWKSEigens(mesh, WKS_L, WKS_VORONOI, K); 
-        setMatrixCache(context, mesh, 'WKS_k', K);
-        setMatrixCache(context, mesh, 'WKS_eva', WKS_EVA);
-        setMatrixCache(context, mesh, 'WKS_eve', WKS_EVE);
+    hks_property = 'HKS_COLUMNS' if lazy else 'HKS_MATRIX';
+    hks_matrix_exists, HKS_MATRIX = getMatrixCache(context, mesh, hks_property);
     
     if(cache_hks_t != HKS_T or cache_hks_log_start != HKS_LOG_START or cache_hks_log_end != HKS_LOG_END or not hks_t_exists or not hks_matrix_exists or not hks_log_start_exists or not hks_log_end_exists):
-        HKS_MATRIX = get_hks(WKS_EVA, WKS_EVE, WKS_VORONOI, num_times=HKS_T, log_start_value = HKS_LOG_START, log_end_value=HKS_LOG_END);
+        WKS_EVE_SQUARED = getSquaredEigenvectors(context, mesh, K);
+        if(lazy):
+            times = getHKSTimes(HKS_T, HKS_LOG_START, HKS_LOG_END);
+            HKS_MATRIX = HKSColumns(WKS_EVA, WKS_EVE_SQUARED, WKS_VORONOI, times);
+        else:
+            HKS_MATRIX = get_hks(WKS_EVA, WKS_EVE, WKS_VORONOI, num_times=HKS_T, log_start_value = HKS_LOG_START, log_end_value=HKS_LOG_END, eivec_squared=WKS_EVE_SQUARED);
+        CACHE[mesh.name].pop('HKS_MATRIX', None);
+        CACHE[mesh.name].pop('HKS_COLUMNS', None);
         setMatrixCache(context, mesh, 'HKS_T', HKS_T);
-        setMatrixCache(context, mesh, 'HKS_MATRIX', HKS_MATRIX);
+        setMatrixCache(context, mesh, 'HKS_LOG_START', HKS_LOG_START);
+        setMatrixCache(context, mesh, 'HKS_LOG_END', HKS_LOG_END);
+        setMatrixCache(context, mesh, hks_property, HKS_MATRIX);
         
     
     print('GETTING HKS COLOR VALUES');    
-    heat = HKS_MATRIX[:,min(int(HKS_T-1), HKS_CURRENT_T)];
+    current_t = min(int(HKS_T-1), HKS_CURRENT_T);
+    if(lazy):
+        heat = HKS_MATRIX.column(current_t);
+        #The column may be new, let the budget account for it
+        enforceCacheBudget();
+    else:
+        heat = HKS_MATRIX[:,current_t];
     print('FINISHED AND RETURNING THE COMPUTED HKS VALUES :');
     return heat, K;
 
 def getWKSColors(context, mesh, K=3, WKS_E=6, WKS_CURRENT_E=0, wks_variance=0.0):
     K = min(len(mesh.data.vertices)-1, K);
-    
-    k_exists, cache_k = getMatrixCache(context, mesh, 'WKS_k');
-    WKS_L_Exists, WKS_L = getMatrixCache(context, mesh, 'WKS_L');
-    WKS_VORONOI_Exists, WKS_VORONOI = getMatrixCache(context, mesh, 'WKS_VORONOI');
-    WKS_EVA_Exists, WKS_EVA = getMatrixCache(context, mesh, 'WKS_eva');
-    WKS_EVE_Exists, WKS_EVE = getMatrixCache(context, mesh, 'WKS_eve');
+    WKS_L, WKS_VORONOI, WKS_EVA, WKS_EVE, __ = getSpectralBasis(context, mesh, K);
     
     wks_e_exists, cache_wks_e = getMatrixCache(context, mesh, 'WKS_E');    
     wks_matrix_exists, WKS_MATRIX = getMatrixCache(context, mesh, 'WKS_MATRIX');
     wks_relative_sigma_exists, WKS_RELATIVE_SIGMA = getMatrixCache(context, mesh, 'WKS_RELATIVE_SIGMA');
     
-    if(not k_exists):
-        setMatrixCache(context, mesh, 'WKS_k', K);
-    
-    if(not WKS_L_Exists):        
-        WKS_L = getWKSLaplacianMatrixCotangent(context, mesh);
-        print('GETTING WKS LAPLACIANS :');
-        setMatrixCache(context, mesh, 'WKS_L', WKS_L);
-        
-    if(not WKS_VORONOI_Exists):    
-        print('GETTING WKS VORONOI :');    
-        WKS_VORONOI, __ = getMeshVoronoiAreas(context, mesh);
-        setMatrixCache(context, mesh, 'WKS_VORONOI', WKS_VORONOI);
-    
-    if(cache_k != K or not WKS_EVA_Exists or not WKS_EVE_Exists):
-        print('GETTING WKS EIGENS : ', '%s = %s'%(cache_k, K), WKS_EVA_Exists, WKS_EVE_Exists);
-        WKS_EVA, WKS_EVE = getWKSEigens(mesh, WKS_L, WKS_VORONOI, K);        
-        setMatrixCache(context, mesh, 'WKS_k', K);
-        setMatrixCache(context, mesh, 'WKS_eva', WKS_EVA);
-        setMatrixCache(context, mesh, 'WKS_eve', WKS_EVE);
-    
     if(cache_wks_e != WKS_E or not wks_e_exists or not wks_matrix_exists or wks_variance !=  WKS_RELATIVE_SIGMA):
+        WKS_EVE_SQUARED = getSquaredEigenvectors(context, mesh, K);
         if(wks_variance > 0.0):
-            WKS_MATRIX = get_wks(WKS_EVA, WKS_EVE, num_steps=WKS_E, relative_sigma=wks_variance);
+            WKS_MATRIX = get_wks(WKS_EVA, WKS_EVE, num_steps=WKS_E, relative_sigma=wks_variance, eigen_vectors_squared=WKS_EVE_SQUARED);
         else:
-            WKS_MATRIX = get_wks(WKS_EVA, WKS_EVE, num_steps=WKS_E);
+            WKS_MATRIX = get_wks(WKS_EVA, WKS_EVE, num_steps=WKS_E, eigen_vectors_squared=WKS_EVE_SQUARED);
             
         setMatrixCache(context, mesh, 'WKS_E', WKS_E);
         setMatrixCache(context, mesh, 'WKS_MATRIX', WKS_MATRIX);
@@ -299,42 +395,17 @@ def getGISIFGroups(mesh, eva, eve, threshold_ratio=0.1):
 
 def getGISIFColors(context, mesh, K=20, threshold_ratio=0.1, show_group_index = 0, linear_gisif_iterations=0):
     K = min(len(mesh.data.vertices)-1, K);
+    WKS_L, WKS_VORONOI, WKS_EVA, WKS_EVE, basis_changed = getSpectralBasis(context, mesh, K);
     
-    k_exists, cache_k = getMatrixCache(context, mesh, 'WKS_k');
-    WKS_L_Exists, WKS_L = getMatrixCache(context, mesh, 'WKS_L');
-    WKS_VORONOI_Exists, WKS_VORONOI = getMatrixCache(context, mesh, 'WKS_VORONOI');
-    WKS_EVA_Exists, WKS_EVA = getMatrixCache(context, mesh, 'WKS_eva');
-    WKS_EVE_Exists, WKS_EVE = getMatrixCache(context, mesh, 'WKS_eve');
-    
-    GISIF_THRESHOLD_Exists, GISIF_Threshold = getMatrixCache(context, mesh, 'GISIF_Threshold');
-    GISIF_GROUPS_Exists, GISIF_Groups = getMatrixCache(context, mesh, 'GISIF_Groups');
-    
-    if(not k_exists):
-        setMatrixCache(context, mesh, 'WKS_k', K);
-    
-    if(not WKS_L_Exists):        
-        WKS_L = getWKSLaplacianMatrixCotangent(context, mesh);
-        print('GETTING GISIF LAPLACIANS :');
-        setMatrixCache(context, mesh, 'WKS_L', WKS_L);
-        
-    if(not WKS_VORONOI_Exists):    
-        print('GETTING GISIF VORONOI :');    
-        WKS_VORONOI, __ = getMeshVoronoiAreas(context, mesh);
-        setMatrixCache(context, mesh, 'WKS_VORONOI', WKS_VORONOI);
-    
-    if(cache_k != K or not WKS_EVA_Exists or not WKS_EVE_Exists):
-        print('GETTING GISIF EIGENS : ', '%s = %s'%(cache_k, K), WKS_EVA_Exists, WKS_EVE_Exists);
-        WKS_EVA, WKS_EVE = getWKSEigens(mesh, WKS_L, WKS_VORONOI, K);
-        
+    if(basis_changed):
         mesh.spectral_soft_update = True;
         #Find the standard deviation between the eigenvalues and apply
         mesh.gisif_threshold = np.std(WKS_EVA);
         threshold_ratio = mesh.gisif_threshold;
         mesh.spectral_soft_update = False;
-        
-        setMatrixCache(context, mesh, 'WKS_k', K);
-        setMatrixCache(context, mesh, 'WKS_eva', WKS_EVA);
-        setMatrixCache(context, mesh, 'WKS_eve', WKS_EVE);
+    
+    GISIF_THRESHOLD_Exists, GISIF_Threshold = getMatrixCache(context, mesh, 'GISIF_Threshold');
+    GISIF_GROUPS_Exists, GISIF_Groups = getMatrixCache(context, mesh, 'GISIF_Groups');
     
     if(GISIF_Threshold != threshold_ratio or not GISIF_THRESHOLD_Exists):
         print('GETTING GISIF GROUPS :');
@@ -0,0 +1,278 @@
+import numpy as np;
+import scipy.sparse as spsp;
+from scipy.sparse.linalg import LinearOperator;
+
+#Spectral filters and point signatures (HKS, WKS) computed from a generalized
+#eigen basis given as plain arrays. Nothing here touches bpy, spectralmagic
+#gets the cached basis of a blender mesh and calls these (and re-exports them)
+
+#Bytes of the per chunk product getHeatBatch works with
+HEAT_BATCH_CHUNK_BYTES = 64 * 1024 * 1024;
+
+#Spectral filtering with a truncated generalized eigen basis (L u = lambda A u,
+#u'Au = 1). A signal X (N x d) is filtered as U diag(h(lambda)) U'AX, two thin
+#products through the K spectral coefficients, so the N x N projection U U'A
+#is never formed
+class SpectralFilter():
+    #Eigenvalues (K) and mass-orthonormal eigenvectors (N x K)
+    eigenvalues = None;
+    eigenvectors = None;
+    #Mass matrix (N x N sparse) the eigenvectors are orthonormal under
+    mass = None;
+    
+    def __init__(self, eva, eve, A):
+        self.eigenvalues = np.asarray(eva);
+        self.eigenvectors = eve;
+        self.mass = A;
+    
+    #Per frequency gains of a transfer function. It is either a callable of the
+    #eigenvalues, an array with one gain per eigenvector or None (all pass)
+    def getResponse(self, transfer=None):
+        if(transfer is None):
+            return None;
+        if(callable(transfer)):
+            return np.asarray(transfer(self.eigenvalues), dtype=np.float64);
+        return np.asarray(transfer, dtype=np.float64);
+    
+    #Spectral coefficients U'AX (K x d) of a signal X (N x d or N)
+    def coefficients(self, X):
+        return self.eigenvectors.T.dot(self.mass.dot(X));
+    
+    #Signal synthesized from spectral coefficients (K x d or K)
+    def synthesize(self, coefficients):
+        return self.eigenvectors.dot(coefficients);
+    
+    def apply(self, X, transfer=None):
+        coefficients = self.coefficients(X);
+        response = self.getResponse(transfer);
+        if(response is not None):
+            coefficients = (response * coefficients.T).T;
+        return self.synthesize(coefficients);
+    
+    #The filter as an N x N scipy LinearOperator, applied without forming it
+    def asOperator(self, transfer=None):
+        size = self.eigenvectors.shape[0];
+        return LinearOperator((size, size), matvec=lambda x: self.apply(np.ravel(x), transfer), matmat=lambda X: self.apply(X, transfer), dtype=np.float64);
+
+#Transfer functions for SpectralFilter, functions of the eigenvalues
+def lowpassResponse(cutoff):
+    return lambda eva: (eva <= cutoff).astype(np.float64);
+
+def bandpassResponse(low, high):
+    return lambda eva: ((eva >= low) & (eva <= high)).astype(np.float64);
+
+#Scales the frequencies in [low, high] by gain (gain > 1 exaggerates details)
+def exaggerationResponse(gain, low, high):
+    return lambda eva: 1.0 + (gain - 1.0) * ((eva >= low) & (eva <= high));
+
+def heatResponse(t):
+    return lambda eva: np.exp(-t * eva);
+
+#Spectral shapes (low pass reconstructions) of a mesh for every k <= k_max from
+#one set of spectral coefficients C = U'AX (k_max x 3). The reconstruction for k
+#is sum_{i<k} u_i c_i, so moving the eigen_k slider from k1 to k2 only adds
+#(or removes) the terms between them instead of filtering again
+class ProgressiveSpectralShape():
+    k_max = 0;
+    #Mass-orthonormal eigenvectors N x k_max
+    eigenvectors = None;
+    #Spectral coefficients of the vertex positions k_max x 3
+    coefficients = None;
+    #Reconstruction for current_k (N x 3)
+    current_k = 0;
+    current = None;
+    
+    def __init__(self, spectral_filter, vpos):
+        self.k_max = spectral_filter.eigenvectors.shape[1];
+        self.eigenvectors = spectral_filter.eigenvectors;
+        self.coefficients = spectral_filter.coefficients(vpos);
+        self.current_k = 0;
+        self.current = np.zeros((vpos.shape[0], vpos.shape[1]));
+    
+    @property
+    def nbytes(self):
+        return self.coefficients.nbytes + self.current.nbytes;
+    
+    def reconstruction(self, k):
+        k = min(max(int(k), 0), self.k_max);
+        if(abs(k - self.current_k) > k):
+            #Rebuilding from zero touches fewer eigenvectors
+            self.current = self.eigenvectors[:, :k].dot(self.coefficients[:k]);
+        elif(k > self.current_k):
+            self.current += self.eigenvectors[:, self.current_k:k].dot(self.coefficients[self.current_k:k]);
+        elif(k < self.current_k):
+            self.current -= self.eigenvectors[:, k:self.current_k].dot(self.coefficients[k:self.current_k]);
+        self.current_k = k;
+        return self.current;
+
+#Purpose: Heat diffused from S single vertex sources at T times, all projected
+#onto the eigen basis with products (S*T x K) . (K x N). The products are
+#written straight into the output block in its dtype, a few sources at a time
+#so that the 'SNT' transpose only needs a chunk sized temporary
+#Inputs: eigvalues (K), eigvectors (N x K), sources (S vertex indices), times
+#(T times), heatValue (initial heat at each source), layout ('STN' gives
+#S x T x N, 'SNT' gives S x N x T), dtype (np.float32 halves the block)
+#Returns: heat block, heat[s, i] is getHeat for sources[s] and times[i]
+def getHeatBatch(eigvalues, eigvectors, sources, times, heatValue = 100.0, *, layout='STN', dtype=np.float64):
+    sources = np.asarray(sources, dtype=np.int64).ravel();
+    times = np.atleast_1d(np.asarray(times, dtype=np.float64));
+    num_vertices, num_eigens = eigvectors.shape;
+    num_sources, num_times = sources.shape[0], times.shape[0];
+    
+    basis = np.ascontiguousarray(np.asarray(eigvectors).T, dtype=dtype);
+    decay = np.exp(-np.outer(times, eigvalues));
+    if(layout == 'SNT'):
+        heat = np.empty((num_sources, num_vertices, num_times), dtype=dtype);
+    else:
+        heat = np.empty((num_sources, num_times, num_vertices), dtype=dtype);
+    
+    chunk = max(1, int(HEAT_BATCH_CHUNK_BYTES // max(num_times * num_vertices * basis.itemsize, 1)));
+    for start in range(0, num_sources, chunk):
+        stop = min(start + chunk, num_sources);
+        coefficients = heatValue * np.asarray(eigvectors[sources[start:stop]]);
+        weighted = (coefficients[:, None, :] * decay[None, :, :]).reshape(-1, num_eigens).astype(dtype, copy=False);
+        if(layout == 'SNT'):
+            block = weighted.dot(basis);
+            block.shape = (stop - start, num_times, num_vertices);
+            heat[start:stop] = block.transpose(0, 2, 1);
+        else:
+            np.dot(weighted, basis, out=heat[start:stop].reshape(-1, num_vertices));
+    return heat;
+
+#Purpose: getHeatBatch over chunks of the sources, for source counts whose full
+#block does not fit in memory. Chunks hold at most max_bytes of output
+#Returns: generator of (sources chunk, heat block of the chunk)
+def iterHeatBatch(eigvalues, eigvectors, sources, times, heatValue = 100.0, *, layout='STN', dtype=np.float64, max_bytes=256*1024*1024):
+    sources = np.asarray(sources, dtype=np.int64).ravel();
+    times = np.atleast_1d(times);
+    source_bytes = times.shape[0] * eigvectors.shape[0] * np.dtype(dtype).itemsize;
+    chunk = max(1, int(max_bytes // source_bytes));
+    for start in range(0, sources.shape[0], chunk):
+        chunk_sources = sources[start:start+chunk];
+        yield chunk_sources, getHeatBatch(eigvalues, eigvectors, chunk_sources, times, heatValue, layout=layout, dtype=dtype);
+
+def getHKSTimes(num_times=100, log_start_value=0.1, log_end_value=10.0):
+    return np.logspace(np.log(log_start_value),np.log(log_end_value),num=max(int(num_times), 1));
+
+#eigenvalues, eigenvectors, the diagonal matrix M, and times for which HKS is propogated;
+#The N x T signature is one product of the squared eigenvectors with the
+#K x T table exp(-t*eigenvalue). The squared eigenvectors can be passed in
+#(eivec_squared) when they are already cached
+def get_hks(eival, eivec,mat_M, num_times=100, log_start_value = 0.1, log_end_value=10.0, *, eivec_squared=None):
+#     times = np.logspace(np.log(0.1),np.log(10.0),num=num_times);
+    print('LOG VALUES ::: ', log_start_value, log_end_value, num_times)
+    times = getHKSTimes(num_times, log_start_value, log_end_value);
+    vertex_areas = spsp.csr_matrix(mat_M).diagonal();
+    if(eivec_squared is None):
+        eivec_squared = np.square(eivec);
+    k = eivec_squared.dot(np.exp(-np.outer(eival, times)));
+    average_temperature = vertex_areas.dot(k) / vertex_areas.sum();
+    hks = k/average_temperature;
+    print('HKS SHAPE : ', hks.shape);
+    return hks;
+
+#HKS evaluated one time column at a time. Only the columns that are displayed
+#are computed, each in O(N*K), and kept for when the slider returns to them
+class HKSColumns():
+    #Squared eigenvectors N x K
+    squared = None;
+    eigenvalues = None;
+    times = None;
+    #Area weighted sum of the squared eigenvectors (K), normalizes each column
+    #to an average temperature of one like get_hks
+    average_weights = None;
+    #Computed columns by time index
+    columns = None;
+    
+    def __init__(self, eival, eivec_squared, mat_M, times):
+        vertex_areas = spsp.csr_matrix(mat_M).diagonal();
+        self.squared = eivec_squared;
+        self.eigenvalues = np.asarray(eival);
+        self.times = times;
+        self.average_weights = vertex_areas.dot(eivec_squared) / vertex_areas.sum();
+        self.columns = {};
+    
+    @property
+    def nbytes(self):
+        return sum([column.nbytes for column in self.columns.values()]);
+    
+    def column(self, index):
+        index = min(max(int(index), 0), self.times.shape[0]-1);
+        try:
+            return self.columns[index];
+        except KeyError:
+            decay = np.exp(-self.times[index] * self.eigenvalues);
+            hks = self.squared.dot(decay) / self.average_weights.dot(decay);
+            self.columns[index] = hks;
+            return hks;
+
+#Purpose: To evaluate point signatures that are weighted sums of squared
+#eigenvectors, desc = (eve**2) . bank, with one matrix product
+#Inputs: eigen_vectors (N x K), bank (K x E filter bank), eigen_vectors_squared
+#(optional cached N x K squares), max_bytes (optional bound on the temporaries,
+#the vertices are then processed in chunks and the squares computed per chunk),
+#dtype (dtype of the returned descriptor, e.g. np.float32 to halve its size)
+#Returns: desc (N x E)
+def applySpectralFilterBank(eigen_vectors, bank, *, eigen_vectors_squared=None, max_bytes=None, dtype=np.float64):
+    num_vertices, num_eigens = eigen_vectors.shape;
+    num_steps = bank.shape[1];
+    if(max_bytes is None):
+        if(eigen_vectors_squared is None):
+            eigen_vectors_squared = np.square(eigen_vectors);
+        return eigen_vectors_squared.dot(bank).astype(dtype, copy=False);
+    
+    desc = np.empty((num_vertices, num_steps), dtype=dtype);
+    #Squares of a chunk and its product, both in float64
+    row_bytes = (num_eigens + num_steps) * 8;
+    chunk = max(1, int(max_bytes // row_bytes));
+    for start in range(0, num_vertices, chunk):
+        stop = min(start + chunk, num_vertices);
+        if(eigen_vectors_squared is None):
+            squared = np.square(eigen_vectors[start:stop]);
+        else:
+            squared = eigen_vectors_squared[start:stop];
+        desc[start:stop] = squared.dot(bank);
+    return desc;
+
+#The filter bank of get_wks is built over the eigenvalues sorted by magnitude
+#without the first one. Its rows are scattered back to the original eigen
+#order (the dropped eigenvalue gets a zero row) so the eigenvectors, or their
+#cached squares, are used as they are instead of being reordered
+def get_wks(eigen_values, eigen_vectors, energy_steps=None, absolute_sigma=None, num_steps=None, relative_sigma=None, *, eigen_vectors_squared=None, max_bytes=None, dtype=np.float64):
+    eigen_values = np.abs(eigen_values);
+    idx = np.argsort(eigen_values);
+    eigen_values = eigen_values[idx[1:]];
+
+    if not energy_steps:
+        assert num_steps != None
+        energy_steps = np.log(np.linspace(eigen_values[1], eigen_values[-1], num_steps))
+
+    if not absolute_sigma:
+        if relative_sigma != None:
+            absolute_sigma = (energy_steps.max() - energy_steps.min()) * relative_sigma
+        else:
+            # from paper
+            delta = (energy_steps.max() - energy_steps.min()) / energy_steps.size
+            absolute_sigma = 7 * delta
+
+    coeff = np.exp(-(energy_steps[None,:] - np.log(eigen_values)[:,None])**2/(2*absolute_sigma));
+    bank = np.zeros((idx.shape[0], energy_steps.size));
+    bank[idx[1:]] = coeff / coeff.sum(axis=0)[None,:];
+    
+    desc = applySpectralFilterBank(eigen_vectors, bank, eigen_vectors_squared=eigen_vectors_squared, max_bytes=max_bytes, dtype=dtype);
+    print('WKS SHAPE ', desc.shape);
+    return desc;
+
+def getWKS(mesh, eva, eve, WKS_E=10, wks_variance=6, *, max_bytes=None, dtype=np.float64):
+    #Calculation of WKS Signature
+    log_E = np.log(np.maximum(np.abs(eva), 1e-6)).T;
+    e = np.linspace(log_E[1], np.max(log_E) / 1.02, WKS_E);
+    sigma = (e[1]-e[0])*wks_variance;
+    sigma_inv = (2*sigma**2);
+    #K x E filter bank, every energy filter normalized to sum one
+    bank = np.exp((-(e[None,:] - log_E[:,None])**2) / sigma_inv);
+    bank = bank / np.sum(bank, axis=0)[None,:];
+    
+    WKS = applySpectralFilterBank(eve, bank, max_bytes=max_bytes, dtype=dtype);
+    print('WKS SHAPE ', WKS.shape);
+    return WKS;
@@ -10,6 +10,7 @@ from functools import reduce;
 
 from GenericMarkerCreator28.utils.meshmathutils import getKDTree, getBarycentricCoordinate, getBarycentricCoordinateFromPolygonFace;
 from GenericMarkerCreator28.utils.mathandmatrices import getBMMesh, ensurelookuptable;
+from GenericMarkerCreator28.utils.mesharrays import tagMeshArrays;
 
 
 import matplotlib.colors as clrs;
@@ -349,6 +350,7 @@ def remeshMarkersAsVertices(context, mesh):
    
     for vid, co in verts_and_locations:
         mesh.data.vertices[vid].co = co;
+    tagMeshArrays(mesh);
     print('AUTOCORRECT THE MESH LANDMARKS WITH NEW TOPOLOGY');    
     autoCorrectLandmarksData(context, mesh);
     
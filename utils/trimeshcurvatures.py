@@ -4,7 +4,7 @@
 import bpy;
 from mathutils import Vector;
 import numpy as np;
-from GenericMarkerCreator28.utils.mathandmatrices import getBMMesh, ensurelookuptable, getMeshFaces, getMeshVPos;
+from GenericMarkerCreator28.utils.mathandmatrices import getBMMesh, ensurelookuptable, getMeshTriangles, getMeshVPos;
 #Implementation of Principal curvatures and directions as per the paper
 #Rusinkiewicz, Szymon. "Estimating curvatures and their derivatives on 
 #triangle meshes." 3D Data Processing, Visualization and Transmission, 
@@ -17,7 +17,7 @@ def need_normals(mesh):
     
     #PURE NUMPY STEPS BELOW
     vertices = getMeshVPos(mesh);
-    faces = getMeshFaces(mesh);
+    faces = getMeshTriangles(mesh);
     n = vertices.shape[0];
     f_n = faces.shape[0];
     #Create an initial empty list of vectors for size equal to no. of vertices in mesh